@@ -1 +1,16 @@
+from __future__ import annotations
+
+from typing import Any
+
 __version__ = "3.1.0"
+
+__all__ = ["clear_replaces", "remake"]
+
+
+def __getattr__(name: str) -> Any:
+    # Import the API lazily, it needs Django to be set up
+    if name in __all__:
+        from django_remake_migrations import api
+
+        return getattr(api, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,529 @@
+"""
+Python API to remake migrations and clear their replaces.
+
+The functions run the steps of a remake, or clear the replaces of the remade
+migrations, and return their outcome as structured results. The management
+commands parse their options, call these functions and print the results, so
+that tooling can chain several operations in a single loaded Django process.
+Progress messages are discarded, unless a stream is given to write them to.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import io
+from collections.abc import Iterable
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from importlib import import_module
+from pathlib import Path
+from typing import TextIO
+
+from django.apps import apps as django_apps
+from django.core.management import CommandError
+from django.core.management.base import OutputWrapper
+from django.core.management.color import Style
+from django.db.migrations import Migration
+from django.db.migrations.exceptions import BadMigrationError
+from django.db.migrations.loader import MigrationLoader
+
+from django_remake_migrations.benchmark import MigrationSetStats, measure_migration_set
+from django_remake_migrations.cache import cache_key, load_output, store_output
+from django_remake_migrations.conf import app_settings
+from django_remake_migrations.disk import unload_app_migrations, write_if_changed
+from django_remake_migrations.formatting import BlackFormatter, format_files
+from django_remake_migrations.journal import PHASES, RemakeJournal
+from django_remake_migrations.management.migration_writer import (
+    REPLACES_MODULE_NAME,
+    CustomMigrationWriter,
+)
+from django_remake_migrations.memoization import CacheCounters, FieldMemo
+from django_remake_migrations.profiling import MigrationProfiler
+from django_remake_migrations.steps import (
+    MigrationKey,
+    NewMigration,
+    Remake,
+    is_first_party,
+    validate_app_labels,
+)
+
+__all__ = [
+    "ClearReplacesResult",
+    "NewMigration",
+    "RemakeResult",
+    "clear_replaces",
+    "remake",
+]
+
+
+@dataclass
+class RemakeResult:
+    """Outcome of a remake."""
+
+    old_migrations: dict[str, list[MigrationKey]] = field(default_factory=dict)
+    """Keys of the old migrations, by app label."""
+
+    new_migrations: list[NewMigration] = field(default_factory=list)
+    """Migrations written with their replaces by this run."""
+
+    written_files: list[Path] = field(default_factory=list)
+    """Files written by the remake, including the replaces modules."""
+
+    skipped_files: list[Path] = field(default_factory=list)
+    """Files which were left untouched, their content didn't change."""
+
+    new_modules: dict[str, str] = field(default_factory=dict)
+    """Packages of the new migrations written side by side, by app label."""
+
+    phase_durations: dict[str, float] = field(default_factory=dict)
+    """Time spent in each phase, in seconds."""
+
+    measurements: tuple[MigrationSetStats, MigrationSetStats] | None = None
+    """Measurements of the old and the new migrations, with ``measure``."""
+
+    profiler: MigrationProfiler | None = None
+    """Time spent generating the migrations, with ``profile``."""
+
+    cache_counters: dict[str, CacheCounters] = field(default_factory=dict)
+    """Hits and misses of the field memoization, if enabled."""
+
+
+@dataclass
+class ClearReplacesResult:
+    """Outcome of clearing the replaces of remade migrations."""
+
+    found: list[MigrationKey] = field(default_factory=list)
+    """Remade migrations, in the order they were processed."""
+
+    cleared: list[MigrationKey] = field(default_factory=list)
+    """Remade migrations whose replaces were, or would be, cleared."""
+
+    deleted: list[MigrationKey] = field(default_factory=list)
+    """Replaced migrations which were, or would be, deleted."""
+
+    deleted_by: dict[MigrationKey, list[MigrationKey]] = field(default_factory=dict)
+    """Deleted migrations, by the remade migration which replaced them."""
+
+    removed_modules: list[str] = field(default_factory=list)
+    """Apps whose replaces module was, or would be, removed."""
+
+    written_files: list[Path] = field(default_factory=list)
+    """Remade migration files rewritten without their replaces."""
+
+    skipped_files: list[Path] = field(default_factory=list)
+    """Files which were left untouched, their content didn't change."""
+
+
+def remake(
+    apps: Iterable[str] = (),
+    *,
+    keep_old_migrations: bool = False,
+    side_by_side: bool = False,
+    clear_side_by_side: bool = False,
+    streaming: bool = False,
+    jobs: int = 1,
+    date: dt.date | None = None,
+    cache_dir: str | Path | None = None,
+    keep_last: int | None = None,
+    older_than: dt.date | None = None,
+    until_ref: str | None = None,
+    resume: bool = False,
+    phase: str | None = None,
+    reset_phase: bool = False,
+    journal_path: str | Path | None = None,
+    measure: bool = False,
+    profile: bool = False,
+    stdout: TextIO | OutputWrapper | None = None,
+    stderr: TextIO | OutputWrapper | None = None,
+    style: Style | None = None,
+) -> RemakeResult:
+    """
+    Remake the migrations of the given apps, all first party apps by default.
+
+    The options are the same as those of the ``remakemigrations`` command.
+    The progress of the run is recorded in a journal only if a
+    ``journal_path`` is given, which ``resume`` and ``phase`` require.
+
+    Raises:
+        django.core.management.CommandError: if the options can't be combined,
+            or if the remake fails.
+
+    """
+    if profile and jobs > 1:
+        raise CommandError(
+            "--profile can't be used with --jobs, the worker processes aren't profiled."
+        )
+    result = RemakeResult()
+    field_memo = FieldMemo()
+    if profile:
+        result.profiler = MigrationProfiler()
+    with ExitStack() as stack:
+        if app_settings.REMAKE_MIGRATIONS_MEMOIZE_FIELDS:
+            stack.enter_context(field_memo.memoize())
+            result.cache_counters = field_memo.counters
+        if result.profiler is not None:
+            # Outside the memoization, to time the cache hits too
+            stack.enter_context(result.profiler.profile())
+        if keep_last is not None or older_than or until_ref:
+            if resume or phase or streaming or cache_dir or side_by_side:
+                raise CommandError(
+                    "--keep-last, --older-than and --until-ref can't be used "
+                    "with --resume, --phase, --streaming, --cache-dir "
+                    "or --side-by-side."
+                )
+            run = Remake(
+                f"remaked_{date or dt.date.today():%Y%m%d}",
+                app_labels=validate_app_labels(apps),
+                generated_on=date,
+                stdout=stdout,
+                stderr=stderr,
+                style=style,
+            )
+            _remake_window(
+                run,
+                result,
+                keep_old_migrations,
+                keep_last=keep_last,
+                older_than=older_than,
+                until_ref=until_ref,
+                measure=measure,
+            )
+        else:
+            run = _remake_phases(
+                result,
+                apps,
+                keep_old_migrations=keep_old_migrations,
+                side_by_side=side_by_side,
+                clear_side_by_side=clear_side_by_side,
+                streaming=streaming,
+                jobs=jobs,
+                date=date,
+                cache_dir=Path(cache_dir) if cache_dir else None,
+                resume=resume,
+                phase=phase,
+                reset_phase=reset_phase,
+                journal_path=Path(journal_path) if journal_path else None,
+                measure=measure,
+                stdout=stdout,
+                stderr=stderr,
+                style=style,
+            )
+
+    written = list(dict.fromkeys(run.formatted_files))
+    result.old_migrations = run.old_migrations
+    result.new_migrations = run.new_migrations
+    result.written_files = written
+    result.skipped_files = [
+        path for path in dict.fromkeys(run.skipped_files) if path not in written
+    ]
+    result.new_modules = run.new_modules
+    result.phase_durations = run.phase_durations
+    return result
+
+
+def _remake_phases(
+    result: RemakeResult,
+    apps: Iterable[str],
+    *,
+    keep_old_migrations: bool,
+    side_by_side: bool,
+    clear_side_by_side: bool,
+    streaming: bool,
+    jobs: int,
+    date: dt.date | None,
+    cache_dir: Path | None,
+    resume: bool,
+    phase: str | None,
+    reset_phase: bool,
+    journal_path: Path | None,
+    measure: bool,
+    stdout: TextIO | OutputWrapper | None,
+    stderr: TextIO | OutputWrapper | None,
+    style: Style | None,
+) -> Remake:
+    """Run the phases of the remake, recording them in the journal."""
+    if reset_phase and not phase:
+        raise CommandError("--reset-phase can only be used with --phase.")
+    if clear_side_by_side and (not side_by_side or resume or phase):
+        raise CommandError(
+            "--clear-side-by-side can only be used with --side-by-side, on a new run."
+        )
+    if resume or phase:
+        if measure or cache_dir:
+            raise CommandError(
+                "--measure and --cache-dir can't be used to resume a run."
+            )
+        if journal_path is None:
+            raise CommandError("A journal path is needed to resume a run.")
+        journal = _load_journal(journal_path)
+        if phase in journal.completed_phases and not reset_phase:
+            # Running the 'old' phase again would take the new
+            # migrations for the old ones, for instance
+            raise CommandError(
+                f"The {phase!r} phase already completed, use --reset-phase "
+                "to run it again."
+            )
+        phases = [phase] if phase else journal.pending_phases
+    else:
+        journal = RemakeJournal(
+            migration_name=f"remaked_{date or dt.date.today():%Y%m%d}",
+            keep_old_migrations=keep_old_migrations,
+            streaming=streaming,
+            side_by_side=side_by_side,
+            date=date.isoformat() if date else "",
+            app_labels=validate_app_labels(apps),
+        )
+        phases = list(PHASES)
+
+    if journal.streaming and app_settings.REMAKE_MIGRATIONS_MINIMIZE_MIGRATIONS:
+        raise CommandError(
+            "--streaming can't be used with REMAKE_MIGRATIONS_MINIMIZE_MIGRATIONS, "
+            "which needs the migrations of all apps at once."
+        )
+    if journal.streaming and app_settings.REMAKE_MIGRATIONS_MAX_OPERATIONS:
+        raise CommandError(
+            "--streaming can't be used with REMAKE_MIGRATIONS_MAX_OPERATIONS, "
+            "which needs the migrations of all apps at once."
+        )
+    if (
+        app_settings.REMAKE_MIGRATIONS_MAX_OPERATIONS
+        and app_settings.REMAKE_MIGRATIONS_REPLACES_ALL
+    ):
+        raise CommandError(
+            "REMAKE_MIGRATIONS_MAX_OPERATIONS can't be used with "
+            "REMAKE_MIGRATIONS_REPLACES_ALL, each part of a split migration "
+            "needs to replace its own old migrations."
+        )
+    run = Remake(
+        journal.migration_name,
+        app_labels=journal.app_labels,
+        generated_on=dt.date.fromisoformat(journal.date) if journal.date else None,
+        jobs=jobs,
+        stdout=stdout,
+        stderr=stderr,
+        style=style,
+    )
+    run.old_migrations = journal.old_migrations
+    run.renamed_files = journal.renamed_files
+    run.journal_path = journal_path
+    if resume and phases:
+        run.log_info(f"Resuming from the {phases[0]!r} phase...")
+
+    if measure:
+        before_stats = _measure_migrations(run, "old")
+    key = cached_output = None
+    if cache_dir is not None:
+        key = cache_key(
+            [
+                app_config.label
+                for app_config in django_apps.get_app_configs()
+                if is_first_party(app_config)
+            ],
+            migration_name=run.migration_name,
+            generated_on=run.generated_on,
+            selected_apps=run.app_labels,
+            keep_old_migrations=journal.keep_old_migrations,
+            side_by_side=journal.side_by_side,
+        )
+        cached_output = load_output(cache_dir, key)
+    if journal.side_by_side:
+        run.new_modules = run.side_by_side_modules(
+            # Resumed runs continue with the migrations they wrote
+            check_empty=not (resume or phase),
+            clear=clear_side_by_side,
+        )
+    for phase_name in phases:
+        if phase_name == "post":
+            # Post commands see the files as they will be committed
+            run.format_written_files()
+        with run.use_migration_modules(run.new_modules, phase_name):
+            if (
+                phase_name == "post"
+                and cache_dir is not None
+                and key
+                and cached_output is None
+            ):
+                store_output(cache_dir, key, run.remake_output())
+            if cached_output is not None and phase_name in {"make", "update"}:
+                if phase_name == "make":
+                    run.log_info("Restoring new migrations from the cache...")
+                    run.restore_output(cached_output)
+            else:
+                run.run_phase(phase_name, journal)
+        # Save progress, to be able to resume from the next phase
+        journal.mark_completed(phase_name)
+        run.save_journal(journal)
+        if measure and phase_name == "update":
+            after_stats = _measure_migrations(run, "new")
+            result.measurements = (before_stats, after_stats)
+    if journal_path is not None and not journal.pending_phases:
+        # Nothing left to resume
+        journal_path.unlink(missing_ok=True)
+    run.format_written_files()
+    with run.use_migration_modules(run.new_modules, "post"):
+        run.write_state_snapshot()
+    return run
+
+
+def _remake_window(
+    run: Remake,
+    result: RemakeResult,
+    keep_old_migrations: bool,
+    keep_last: int | None,
+    older_than: dt.date | None,
+    until_ref: str | None,
+    measure: bool,
+) -> None:
+    """Replace the migrations older than the cutoff, keep the recent ones."""
+    if measure:
+        before_stats = _measure_migrations(run, "old")
+    run.compact_old_migrations(
+        keep_old_migrations,
+        keep_last=keep_last,
+        older_than=older_than,
+        until_ref=until_ref,
+    )
+    if measure:
+        after_stats = _measure_migrations(run, "new")
+        result.measurements = (before_stats, after_stats)
+    run.format_written_files()
+    run.run_post_commands()
+    run.write_state_snapshot()
+
+
+def _measure_migrations(run: Remake, which: str) -> MigrationSetStats:
+    """Measure the migrations on disk, reporting when they can't be applied."""
+    run.log_info(f"Measuring {which} migrations...")
+    stats = measure_migration_set(run.first_party_app_labels())
+    if stats.migrate_time is None:
+        run.log_error(
+            f"The {which} migrations can't be applied to SQLite, the fresh "
+            f"migrate time isn't measured. {stats.migrate_error}"
+        )
+    return stats
+
+
+def _load_journal(journal_path: Path) -> RemakeJournal:
+    """Load the journal of the previous run."""
+    if not journal_path.exists():
+        raise CommandError(
+            f"No journal found at {journal_path}, run the command "
+            "without --resume or --phase first."
+        )
+    return RemakeJournal.load(journal_path)
+
+
+def clear_replaces(
+    app_label: str | None = None,
+    *,
+    dry_run: bool = False,
+    remove_replaced: bool = False,
+    stderr: TextIO | OutputWrapper | None = None,
+) -> ClearReplacesResult:
+    """
+    Clear the replaces of the remade migrations, of all first party apps by default.
+
+    The options are the same as those of the ``delete_remaked_migrations``
+    command. With ``remove_replaced``, the files of the replaced migrations
+    are deleted too.
+    """
+    result = ClearReplacesResult()
+    unformatted_files: list[Path] = []
+    formatter = BlackFormatter()
+    for app, migrations in sorted(_find_remaked_migrations(app_label).items()):
+        for migration_name, file_path, migration in migrations:
+            key = (app, migration_name)
+            result.found.append(key)
+            if not migration.replaces:
+                continue
+            result.cleared.append(key)
+            replaces = [
+                (replaced_app, replaced_name)
+                for replaced_app, replaced_name in migration.replaces
+            ]
+            if dry_run:
+                deleted = replaces if remove_replaced else []
+            else:
+                migration.replaces = []  # type: ignore[misc]
+                writer = CustomMigrationWriter(migration)
+                file_formatter = formatter.file_formatter(file_path)
+                if not write_if_changed(file_path, writer.write, file_formatter):
+                    result.skipped_files.append(file_path)
+                else:
+                    result.written_files.append(file_path)
+                    if file_formatter is None:
+                        unformatted_files.append(file_path)
+                deleted = _delete_migration_files(replaces) if remove_replaced else []
+            if deleted:
+                result.deleted_by[key] = deleted
+                result.deleted.extend(deleted)
+
+        # The module shared by the migrations isn't needed anymore
+        replaces_module = migrations[-1][1].parent / f"{REPLACES_MODULE_NAME}.py"
+        if replaces_module.exists():
+            if not dry_run:
+                replaces_module.unlink()
+            result.removed_modules.append(app)
+
+    format_files(unformatted_files, stderr=stderr or io.StringIO())
+    result.deleted = sorted(set(result.deleted))
+    return result
+
+
+def _find_remaked_migrations(
+    app_label: str | None = None,
+) -> dict[str, list[tuple[str, Path, Migration]]]:
+    """
+    Find the remaked migrations of the first party apps, or of the given app.
+
+    Returns:
+        The name, file path and migration class of each remaked migration,
+        by app label.
+
+    """
+    for app_config in django_apps.get_app_configs():
+        if is_first_party(app_config):
+            # Load the migrations as they are on disk, after an earlier remake
+            unload_app_migrations(app_config.label)
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    remaked_migrations: dict[str, list[tuple[str, Path, Migration]]] = {}
+    for node_app_label, migration_name in loader.graph.nodes:
+        if app_label and node_app_label != app_label:
+            continue
+        if not is_first_party(django_apps.get_app_config(node_app_label)):
+            continue
+        if "_remaked_" not in migration_name:
+            continue
+
+        migrations_module_name, _ = MigrationLoader.migrations_module(node_app_label)
+        migration_module = import_module(f"{migrations_module_name}.{migration_name}")
+        if not hasattr(migration_module, "Migration"):
+            raise BadMigrationError(
+                f"Migration {migration_module} has no Migration class"
+            )
+        remaked_migrations.setdefault(node_app_label, []).append(
+            (
+                migration_name,
+                Path(migration_module.__file__),  # type: ignore[arg-type]
+                migration_module.Migration,
+            )
+        )
+    return remaked_migrations
+
+
+def _delete_migration_files(keys: list[MigrationKey]) -> list[MigrationKey]:
+    """Delete the files of the given migrations, returning the deleted ones."""
+    deleted = []
+    for app_label, migration_name in keys:
+        migrations_module_name, _ = MigrationLoader.migrations_module(app_label)
+        try:
+            migration_module = import_module(
+                f"{migrations_module_name}.{migration_name}"
+            )
+        except ModuleNotFoundError:  # already is deleted
+            continue
+        migration_file = Path(migration_module.__file__)  # type: ignore[arg-type]
+        if migration_file.exists():
+            migration_file.unlink()
+            deleted.append((app_label, migration_name))
+    return deleted
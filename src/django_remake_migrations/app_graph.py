@@ -0,0 +1,148 @@
+"""
+Graph of references between apps, built from the models.
+
+Used to find an order in which migrations for the apps can be generated,
+with the fewest possible circular dependencies.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from django.apps import AppConfig
+from django.db import models
+
+
+def _related_models(model: type[models.Model]) -> Iterable[type[models.Model]]:
+    """Models which need to exist before the given model can be created."""
+    opts = model._meta
+    for field in [*opts.local_fields, *opts.local_many_to_many]:
+        remote_field = field.remote_field
+        if remote_field is None:
+            continue
+        yield remote_field.model
+        through = getattr(remote_field, "through", None)
+        if through is not None:
+            yield through
+    yield from opts.parents
+    if opts.proxy_for_model is not None:
+        yield opts.proxy_for_model
+
+
+def build_app_graph(app_configs: Iterable[AppConfig]) -> dict[str, set[str]]:
+    """
+    Build the graph of references between the given apps.
+
+    Returns:
+        A mapping of each app label to the labels of the apps
+        that its models reference. References to apps outside of
+        the given ones are ignored.
+
+    """
+    app_configs = list(app_configs)
+    graph: dict[str, set[str]] = {app_config.label: set() for app_config in app_configs}
+    for app_config in app_configs:
+        for model in app_config.get_models(include_auto_created=True):
+            for related_model in _related_models(model):
+                if isinstance(related_model, str):
+                    # Unresolved lazy reference
+                    continue  # type: ignore[unreachable]
+                related_label = related_model._meta.app_label
+                if related_label != app_config.label and related_label in graph:
+                    graph[app_config.label].add(related_label)
+    return graph
+
+
+def strongly_connected_components(graph: dict[str, set[str]]) -> list[list[str]]:
+    """
+    Find the strongly connected components of the graph, using Tarjan's algorithm.
+
+    Returns:
+        The components, each one sorted alphabetically. A component
+        comes after all the components it references.
+
+    """
+    index_of: dict[str, int] = {}
+    low_link: dict[str, int] = {}
+    stack: list[str] = []
+    on_stack: set[str] = set()
+    components: list[list[str]] = []
+
+    def visit(node: str) -> None:
+        index_of[node] = low_link[node] = len(index_of)
+        stack.append(node)
+        on_stack.add(node)
+        for successor in sorted(graph[node]):
+            if successor not in index_of:
+                visit(successor)
+                low_link[node] = min(low_link[node], low_link[successor])
+            elif successor in on_stack:
+                low_link[node] = min(low_link[node], index_of[successor])
+
+        if low_link[node] == index_of[node]:
+            component = []
+            while True:
+                member = stack.pop()
+                on_stack.remove(member)
+                component.append(member)
+                if member == node:
+                    break
+            components.append(sorted(component))
+
+    for node in sorted(graph):
+        if node not in index_of:
+            visit(node)
+    return components
+
+
+def connected_components(graph: dict[str, set[str]]) -> list[list[str]]:
+    """
+    Group the apps which reference each other, directly or not.
+
+    References are followed in both directions, so that apps from different
+    groups never reference each other.
+
+    Returns:
+        The groups, each one sorted alphabetically, in order of their first app.
+
+    """
+    neighbours: dict[str, set[str]] = {node: set() for node in graph}
+    for node, successors in graph.items():
+        for successor in successors:
+            neighbours[node].add(successor)
+            neighbours[successor].add(node)
+
+    seen: set[str] = set()
+    components: list[list[str]] = []
+    for node in sorted(graph):
+        if node in seen:
+            continue
+        seen.add(node)
+        component = []
+        to_visit = [node]
+        while to_visit:
+            member = to_visit.pop()
+            component.append(member)
+            for neighbour in neighbours[member] - seen:
+                seen.add(neighbour)
+                to_visit.append(neighbour)
+        components.append(sorted(component))
+    return components
+
+
+def app_order(graph: dict[str, set[str]], pinned: Iterable[str] = ()) -> list[str]:
+    """
+    Order the apps so that referenced apps come before the apps referencing them.
+
+    Apps in a circular reference are collapsed into a single component and
+    sorted alphabetically. The pinned apps, if any, are put first in the given
+    order, the other apps follow in the computed order.
+    """
+    pinned = [app_label for app_label in pinned if app_label in graph]
+    computed = [
+        app_label
+        for component in strongly_connected_components(graph)
+        for app_label in component
+        if app_label not in pinned
+    ]
+    return [*pinned, *computed]
@@ -0,0 +1,168 @@
+"""
+Generate the new migrations in a single pass of the autodetector.
+
+This is what ``makemigrations`` does, without the parts which are
+irrelevant when all the first party migrations are recreated from scratch,
+and with control over the order in which apps are processed. The
+autodetector of the project's ``makemigrations`` command is used, but its
+other customizations, for example of how the files are written, are not.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from functools import partial
+from typing import Any
+
+from django.apps import apps
+from django.core.management import BaseCommand, get_commands, load_command_class
+from django.db.migrations import Migration
+from django.db.migrations import autodetector as autodetector_module
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.graph import MigrationGraph
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.operations.base import Operation
+from django.db.migrations.questioner import NonInteractiveMigrationQuestioner
+from django.db.migrations.state import ProjectState
+
+from django_remake_migrations.patching import module_global
+
+
+class OrderedMigrationAutodetector(MigrationAutodetector):
+    """
+    Autodetector which processes apps in the given order.
+
+    Django processes apps in alphabetical order when chopping operations
+    into migrations, which decides which apps are split when there are
+    circular references. The apps missing from the given order are processed
+    last, in alphabetical order.
+    """
+
+    generated_operations: dict[str, list[Operation]]
+    migrations: dict[str, list[Migration]]
+
+    def __init__(
+        self, *args: Any, app_order: Sequence[str] = (), **kwargs: Any
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.app_order = list(app_order)
+        self.app_ranks = {app_label: rank for rank, app_label in enumerate(app_order)}
+
+    def app_sort_key(self, app_label: str) -> tuple[int, str]:
+        """Sort key of an app: its position in the order, then its label."""
+        return (self.app_ranks.get(app_label, len(self.app_ranks)), app_label)
+
+    def _build_migration_list(self, graph: MigrationGraph | None = None) -> None:
+        # Django picks the next app from sorted(self.generated_operations),
+        # which is given the sort key for the duration of the call
+        with module_global(
+            autodetector_module, "sorted", partial(sorted, key=self.app_sort_key)
+        ):
+            super()._build_migration_list(graph)  # type: ignore[misc]
+
+
+def ordered_autodetector_class() -> type[OrderedMigrationAutodetector]:
+    """
+    The ordered autodetector, based on the one of ``makemigrations``.
+
+    Projects can customize the autodetector with the ``autodetector``
+    attribute of their ``makemigrations`` command, the ordering is added on
+    top of it.
+    """
+    app_name = get_commands()["makemigrations"]
+    command = (
+        app_name
+        if isinstance(app_name, BaseCommand)
+        else load_command_class(app_name, "makemigrations")
+    )
+    base = getattr(command, "autodetector", MigrationAutodetector)
+    if issubclass(OrderedMigrationAutodetector, base):
+        return OrderedMigrationAutodetector
+    return type(
+        "OrderedMigrationAutodetector", (OrderedMigrationAutodetector, base), {}
+    )
+
+
+def generate_migrations(
+    migration_name: str,
+    app_order: Sequence[str] = (),
+    app_labels: Sequence[str] = (),
+) -> dict[str, list[Migration]]:
+    """
+    Detect the changes between the migrations on disk and the models.
+
+    If app labels are given, only the migrations for these apps, and the
+    apps they depend on, are generated. Like ``makemigrations``, the given
+    apps get migrations even if they have no migrations package yet.
+
+    Returns:
+        The new migrations, grouped by app label.
+
+    """
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    autodetector = ordered_autodetector_class()(
+        loader.project_state(),
+        ProjectState.from_apps(apps),
+        NonInteractiveMigrationQuestioner(
+            specified_apps=set(app_labels), dry_run=False
+        ),
+        app_order=app_order,
+    )
+    return autodetector.changes(
+        graph=loader.graph,
+        trim_to_apps=set(app_labels) or None,
+        convert_apps=set(app_labels) or None,
+        migration_name=migration_name,
+    )
+
+
+def generate_squashed_base(
+    loader: MigrationLoader,
+    replaced: Iterable[tuple[str, str]],
+    migration_name: str,
+    app_order: Sequence[str] = (),
+) -> dict[str, list[Migration]]:
+    """
+    Generate migrations reaching the state after the replaced migrations.
+
+    The replaced migrations should include all their first party ancestors.
+    Their other ancestors, from third party apps, are kept as they are and
+    the new migrations depend on them.
+
+    Returns:
+        The new migrations, grouped by app label.
+
+    """
+    replaced = set(replaced)
+    ancestors = {
+        ancestor for key in replaced for ancestor in loader.graph.forwards_plan(key)
+    }
+    # The part of the graph which stays, for names and dependencies
+    base_graph = MigrationGraph()
+    kept = ancestors - replaced
+    for key in kept:
+        base_graph.add_node(key, loader.graph.nodes[key])
+    for key in kept:
+        for parent in loader.graph.node_map[key].parents:
+            base_graph.add_dependency(None, key, parent.key)
+
+    autodetector = ordered_autodetector_class()(
+        loader.project_state(base_graph.leaf_nodes()),
+        loader.project_state(_leaf_nodes(loader.graph, ancestors)),
+        NonInteractiveMigrationQuestioner(
+            specified_apps={app_label for app_label, _ in replaced}, dry_run=False
+        ),
+        app_order=app_order,
+    )
+    return autodetector.changes(graph=base_graph, migration_name=migration_name)
+
+
+def _leaf_nodes(
+    graph: MigrationGraph, keys: set[tuple[str, str]]
+) -> list[tuple[str, str]]:
+    """Nodes of the set which have no children in the set."""
+    return sorted(
+        key
+        for key in keys
+        if not any(child.key in keys for child in graph.node_map[key].children)
+    )
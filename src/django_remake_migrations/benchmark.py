@@ -0,0 +1,343 @@
+"""
+Measure the cost of a migration set on a fresh database.
+
+Used to compare the migrations before and after a remake, in order to
+quantify the gains in terms of loading time and ``migrate`` time, and to
+report the cost of the migrations of each app.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from collections.abc import Generator, Iterable
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.migrations import Migration
+from django.db.migrations.executor import MigrationExecutor
+from django.db.migrations.graph import MigrationGraph
+from django.db.utils import ConnectionHandler
+
+from django_remake_migrations.disk import load_app_migrations, unload_app_migrations
+from django_remake_migrations.management.migration_writer import REPLACES_MODULE_NAME
+
+BENCHMARK_DB_ALIAS = "remake_migrations_benchmark"
+
+
+@dataclass
+class MigrationSetStats:
+    """Measurements for a set of migrations, as seen by the migration loader."""
+
+    nodes: int = 0
+    """Number of nodes in the migration graph."""
+
+    operations: int = 0
+    """Total number of operations across all migrations of the graph."""
+
+    max_operations: int = 0
+    """Number of operations of the largest migration of the graph."""
+
+    size: int = 0
+    """Total size of the migration files, in bytes."""
+
+    load_time: float = 0.0
+    """Time to import the migrations and build the graph, in seconds."""
+
+    migrate_time: float | None = 0.0
+    """
+    Time to apply all the migrations to an empty database, in seconds.
+
+    ``None`` if the migrations can't be applied to SQLite, for example when
+    they run SQL written for another backend.
+    """
+
+    migrate_error: str = ""
+    """Error raised while applying the migrations, if they couldn't be."""
+
+
+METRIC_LABELS = {
+    "nodes": "Graph nodes",
+    "operations": "Operations",
+    "max_operations": "Largest migration (operations)",
+    "size": "Migration files size (bytes)",
+    "load_time": "Loader import time (s)",
+    "migrate_time": "Fresh migrate time (s)",
+}
+
+
+@contextmanager
+def fresh_sqlite_connection(
+    alias: str = BENCHMARK_DB_ALIAS,
+) -> Generator[BaseDatabaseWrapper, None, None]:
+    """Register a temporary in-memory SQLite database under the given alias."""
+    with database_connection(
+        alias, {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}
+    ) as connection:
+        yield connection
+
+
+@contextmanager
+def database_connection(
+    alias: str, settings_dict: dict[str, Any]
+) -> Generator[BaseDatabaseWrapper, None, None]:
+    """
+    Register a connection to the configured database under the given alias.
+
+    The alias is registered in ``django.db.connections`` for the duration
+    of the context, so that code looking up the connection by its alias
+    (e.g. ``RunPython`` operations) works as expected. Connections are local
+    to the current thread, like the ones from ``django.db.connections``.
+    """
+    handler = ConnectionHandler({DEFAULT_DB_ALIAS: {}, alias: settings_dict})
+    connection = handler[alias]
+    # Connect before exposing the alias, in-memory databases only live
+    # as long as this connection is open.
+    connection.ensure_connection()
+    connections.settings[alias] = connection.settings_dict
+    connections[alias] = connection
+    try:
+        yield connection
+    finally:
+        connection.close()
+        del connections[alias]
+        del connections.settings[alias]
+
+
+def migration_file_size(migration: object) -> int:
+    """Return the size in bytes of the file where the migration is defined."""
+    module = sys.modules.get(type(migration).__module__)
+    module_file = getattr(module, "__file__", None)
+    if not module_file:
+        return 0
+    return Path(module_file).stat().st_size
+
+
+def replaces_modules_size(migrations: Iterable[object]) -> int:
+    """Return the size in bytes of the replaces modules next to the migrations."""
+    size = 0
+    packages = {
+        type(migration).__module__.rpartition(".")[0] for migration in migrations
+    }
+    for package_name in packages:
+        package = sys.modules.get(package_name)
+        for directory in getattr(package, "__path__", ()):
+            path = Path(directory) / f"{REPLACES_MODULE_NAME}.py"
+            if path.exists():
+                size += path.stat().st_size
+    return size
+
+
+def measure_migration_set(app_labels: Iterable[str] = ()) -> MigrationSetStats:
+    """
+    Measure the migrations currently on disk against a fresh SQLite database.
+
+    Migration modules of the given apps are evicted from the import cache
+    beforehand, so that the import time is accounted for. If the migrations
+    fail to apply, the other measurements are still returned, without the
+    migrate time.
+    """
+    for app_label in app_labels:
+        unload_app_migrations(app_label)
+    stats = MigrationSetStats()
+    with fresh_sqlite_connection() as connection:
+        start = time.perf_counter()
+        executor = MigrationExecutor(connection)
+        stats.load_time = time.perf_counter() - start
+
+        graph = executor.loader.graph
+        stats.nodes = len(graph.nodes)
+        for migration in graph.nodes.values():
+            stats.operations += len(migration.operations)
+            stats.max_operations = max(stats.max_operations, len(migration.operations))
+            stats.size += migration_file_size(migration)
+        stats.size += replaces_modules_size(graph.nodes.values())
+
+        targets = graph.leaf_nodes()
+        start = time.perf_counter()
+        try:
+            executor.migrate(targets, plan=executor.migration_plan(targets))
+        except Exception as exc:
+            # Operations for another backend, like RunSQL or database
+            # specific fields, can raise anything
+            stats.migrate_time = None
+            stats.migrate_error = f"{type(exc).__name__}: {exc}"
+        else:
+            stats.migrate_time = time.perf_counter() - start
+    return stats
+
+
+@dataclass
+class AppDebt:
+    """Measurements for the migrations of a single app."""
+
+    app_label: str
+
+    migrations: int = 0
+    """Number of migrations of the app in the graph."""
+
+    size: int = 0
+    """Total size of the migration files, in bytes."""
+
+    import_time: float = 0.0
+    """Time to import the migration modules of the app, in seconds."""
+
+    operations: int = 0
+    """Total number of operations of the migrations of the app."""
+
+    depth: int = 0
+    """Largest number of migrations of the app along a chain of dependencies."""
+
+    migrate_time: float = 0.0
+    """Time to apply the migrations of the app to an empty database, in seconds."""
+
+
+DEBT_LABELS = {
+    "migrations": "Migrations",
+    "size": "Size (bytes)",
+    "import_time": "Import time (s)",
+    "operations": "Operations",
+    "depth": "Graph depth",
+    "migrate_time": "Migrate time (s)",
+}
+
+
+def measure_app_debt(app_labels: Iterable[str]) -> list[AppDebt]:
+    """
+    Measure the migrations of each of the given apps.
+
+    The migrations of all apps are applied to a fresh in-memory SQLite
+    database, timing each migration to attribute it to its app.
+    """
+    debts = {app_label: AppDebt(app_label) for app_label in app_labels}
+    for app_label, debt in debts.items():
+        unload_app_migrations(app_label)
+        start = time.perf_counter()
+        load_app_migrations(app_label)
+        debt.import_time = time.perf_counter() - start
+
+    with fresh_sqlite_connection() as connection:
+        executor = MigrationExecutor(connection)
+        graph = executor.loader.graph
+        for (app_label, _), migration in graph.nodes.items():
+            if app_label in debts:
+                debts[app_label].migrations += 1
+                debts[app_label].operations += len(migration.operations)
+                debts[app_label].size += migration_file_size(migration)
+        for app_label, debt in debts.items():
+            debt.depth = _app_depth(graph, app_label)
+
+        started: dict[tuple[str, str], float] = {}
+
+        def progress_callback(
+            action: str, migration: Migration | None = None, fake: bool | None = None
+        ) -> None:
+            if migration is None or migration.app_label not in debts:
+                return
+            key = (migration.app_label, migration.name)
+            if action == "apply_start":
+                started[key] = time.perf_counter()
+            elif action == "apply_success":
+                debts[migration.app_label].migrate_time += (
+                    time.perf_counter() - started.pop(key)
+                )
+
+        executor.progress_callback = progress_callback
+        targets = graph.leaf_nodes()
+        executor.migrate(targets, plan=executor.migration_plan(targets))
+    return list(debts.values())
+
+
+def _app_depth(graph: MigrationGraph, app_label: str) -> int:
+    """Largest number of migrations of the app along a chain of dependencies."""
+    depths: dict[tuple[str, str], int] = {}
+    for leaf in graph.leaf_nodes():
+        for key in graph.forwards_plan(leaf):
+            if key in depths:
+                continue
+            parents_depth = max(
+                (depths[parent.key] for parent in graph.node_map[key].parents),
+                default=0,
+            )
+            depths[key] = parents_depth + (key[0] == app_label)
+    return max(depths.values(), default=0)
+
+
+def total_debt(debts: Iterable[AppDebt]) -> AppDebt:
+    """Add up the measurements of all apps, except the depth."""
+    total = AppDebt("Total")
+    for debt in debts:
+        for debt_field in fields(AppDebt):
+            if debt_field.name in DEBT_LABELS and debt_field.name != "depth":
+                setattr(
+                    total,
+                    debt_field.name,
+                    getattr(total, debt_field.name) + getattr(debt, debt_field.name),
+                )
+        total.depth = max(total.depth, debt.depth)
+    return total
+
+
+def _format_value(value: float | None) -> str:
+    if value is None:
+        return "n/a"
+    if isinstance(value, int):
+        return str(value)
+    return f"{value:.3f}"
+
+
+def _format_change(before: float | None, after: float | None) -> str:
+    if not before or after is None:
+        return "n/a"
+    return f"{(after - before) / before:+.1%}"
+
+
+def render_markdown(before: MigrationSetStats, after: MigrationSetStats) -> str:
+    """Render a comparison of two migration sets as a Markdown table."""
+    lines = [
+        "| Metric | Before | After | Change |",
+        "| --- | ---: | ---: | ---: |",
+    ]
+    for name, label in METRIC_LABELS.items():
+        before_value = getattr(before, name)
+        after_value = getattr(after, name)
+        lines.append(
+            f"| {label} "
+            f"| {_format_value(before_value)} "
+            f"| {_format_value(after_value)} "
+            f"| {_format_change(before_value, after_value)} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def render_json(before: MigrationSetStats, after: MigrationSetStats) -> str:
+    """Render a comparison of two migration sets as JSON."""
+    return json.dumps({"before": asdict(before), "after": asdict(after)}, indent=2)
+
+
+def render_debt_markdown(debts: list[AppDebt]) -> str:
+    """Render the measurements of each app as a Markdown table."""
+    lines = [
+        f"| App | {' | '.join(DEBT_LABELS.values())} |",
+        f"| --- |{' ---: |' * len(DEBT_LABELS)}",
+    ]
+    for debt in [*debts, total_debt(debts)]:
+        values = " | ".join(_format_value(getattr(debt, name)) for name in DEBT_LABELS)
+        lines.append(f"| {debt.app_label} | {values} |")
+    return "\n".join(lines) + "\n"
+
+
+def render_debt_json(debts: list[AppDebt]) -> str:
+    """Render the measurements of each app as JSON."""
+    return json.dumps(
+        {
+            "apps": [asdict(debt) for debt in debts],
+            "total": asdict(total_debt(debts)),
+        },
+        indent=2,
+    )
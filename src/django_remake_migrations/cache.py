@@ -0,0 +1,115 @@
+"""
+Cache of the migrations generated by a remake.
+
+The output of a remake only depends on the models, the old migrations and
+the settings of the package. The new migration files are stored in a cache
+directory, under a hash of these inputs, so that a run on unchanged inputs
+restores them instead of generating them again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+import django
+from django.apps import apps
+from django.db.migrations.operations import CreateModel
+from django.db.migrations.state import ProjectState
+from django.db.migrations.writer import MigrationWriter
+
+from django_remake_migrations import __version__
+from django_remake_migrations.conf import SETTINGS_PREFIX, app_settings
+from django_remake_migrations.disk import migrations_package
+
+
+def models_fingerprint(
+    state: ProjectState, app_labels: Iterable[str] | None = None
+) -> list[str]:
+    """Canonical representation of the models of the project, or of some apps."""
+    selected_apps = None if app_labels is None else set(app_labels)
+    return [
+        MigrationWriter.serialize(
+            CreateModel(
+                name=f"{app_label}.{model_state.name}",
+                # The order of fields and options doesn't matter to migrations
+                fields=sorted(model_state.fields.items()),
+                options=dict(sorted(model_state.options.items())),
+                bases=model_state.bases,
+                managers=model_state.managers,
+            )
+        )[0]
+        for (app_label, _), model_state in sorted(state.models.items())
+        if selected_apps is None or app_label in selected_apps
+    ]
+
+
+def migrations_fingerprint(app_labels: Iterable[str]) -> list[tuple[str, str, str]]:
+    """Name and hash of the migration files of each app."""
+    fingerprint = []
+    for app_label in sorted(app_labels):
+        module = migrations_package(app_label)
+        if module is None:
+            continue
+        for directory in module.__path__:
+            for path in sorted(Path(directory).glob("*.py")):
+                digest = hashlib.sha256(path.read_bytes()).hexdigest()
+                fingerprint.append((app_label, path.name, digest))
+    return fingerprint
+
+
+def _settings_fingerprint() -> dict[str, str]:
+    """Values of the settings of the package."""
+    return {
+        name: repr(getattr(app_settings, name))
+        for name in sorted(dir(app_settings))
+        if name.startswith(SETTINGS_PREFIX)
+    }
+
+
+def cache_key(app_labels: Iterable[str], **options: Any) -> str:
+    """
+    Hash of the inputs of a remake.
+
+    The inputs are the models of the project, the migration files of the
+    given apps, the settings of the package, the versions of Django and of
+    the package, and the given options of the run.
+    """
+    app_labels = list(app_labels)
+    inputs = {
+        "versions": [django.get_version(), __version__],
+        "models": models_fingerprint(ProjectState.from_apps(apps)),
+        "migrations": migrations_fingerprint(app_labels),
+        "settings": _settings_fingerprint(),
+        "options": {name: repr(value) for name, value in sorted(options.items())},
+    }
+    return hashlib.sha256(
+        json.dumps(inputs, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def load_output(cache_dir: Path, key: str) -> dict[str, dict[str, str]] | None:
+    """
+    Read the cached output of a remake, if any.
+
+    Returns:
+        The content of each new migration file, by file name and app label.
+
+    """
+    path = cache_dir / f"{key}.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def store_output(cache_dir: Path, key: str, output: dict[str, dict[str, str]]) -> None:
+    """Write the output of a remake to the cache."""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / f"{key}.json"
+    # Write atomically, concurrent runs may read the cache
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(output, sort_keys=True), encoding="utf-8")
+    tmp_path.replace(path)
@@ -32,11 +32,32 @@ class AppSettings:
     values documented here.
     """
 
+    REMAKE_MIGRATIONS_APP_ORDER: Sequence[str] = ()
+    """
+    The order in which to generate migrations for apps.
+
+    By default, the order is computed from the references between models:
+    referenced apps come first, and apps referencing each other are grouped
+    together. The order is printed when running the command, and can be
+    pinned using this setting. Apps not listed come after the listed ones,
+    in the computed order.
+    """
+
     REMAKE_MIGRATIONS_FIRST_APPS: Sequence[str] = ()
-    """The apps for which to make migrations first."""
+    """
+    The apps for which to make migrations first.
+
+    Setting this, or ``REMAKE_MIGRATIONS_LAST_APPS``, makes the command call
+    ``makemigrations`` several times instead of computing the app order.
+    Prefer ``REMAKE_MIGRATIONS_APP_ORDER``.
+    """
 
     REMAKE_MIGRATIONS_LAST_APPS: Sequence[str] = ()
-    """The apps for which to make migrations last."""
+    """
+    The apps for which to make migrations last.
+
+    See ``REMAKE_MIGRATIONS_FIRST_APPS``.
+    """
 
     REMAKE_MIGRATIONS_POST_COMMANDS: Sequence[Sequence[str]] = ()
     """
@@ -96,6 +117,65 @@ class AppSettings:
         }
     """
 
+    REMAKE_MIGRATIONS_REPLACES_MODULE: bool = False
+    """
+    Write the ``replaces`` list of each app once, in a ``_replaced`` module.
+
+    With ``REMAKE_MIGRATIONS_REPLACES_ALL``, all the new migrations of an app
+    get the same list, which can be long, especially with
+    ``REMAKE_MIGRATIONS_REPLACE_OTHER_APP``. With this option, the list is
+    written to ``<app>/migrations/_replaced.py`` and each new migration
+    imports it, instead of repeating it. The migration loader ignores modules
+    starting with an underscore. The module is removed by
+    ``delete_remaked_migrations``.
+
+    Requires ``REMAKE_MIGRATIONS_REPLACES_ALL`` to set to ``True``.
+    """
+
+    REMAKE_MIGRATIONS_MINIMIZE_MIGRATIONS: bool = False
+    """
+    Merge new migrations of an app which don't need to be split.
+
+    When apps reference each other, Django splits some of them into several
+    migrations, and it often splits more than strictly necessary. With this
+    option, consecutive migrations of an app are merged back together when no
+    migration from another app needs to be applied between them.
+    """
+
+    REMAKE_MIGRATIONS_MAX_OPERATIONS: int | None = None
+    """
+    Maximum number of operations in a new migration.
+
+    Remade initial migrations of large apps can be huge, slow to import and
+    hard to review. The new migrations with more operations are split into a
+    chain of migrations, each depending on the previous one. Each part
+    replaces its own old migrations, so an app can't get more new migrations
+    than it had old ones: parts get more operations when needed. Applied
+    after ``REMAKE_MIGRATIONS_MINIMIZE_MIGRATIONS``, can't be used with
+    ``REMAKE_MIGRATIONS_REPLACES_ALL``.
+    """
+
+    REMAKE_MIGRATIONS_MEMOIZE_FIELDS: bool = False
+    """
+    Cache the deconstruction and serialization of each field during a remake.
+
+    The autodetector deconstructs the same fields many times, which is slow
+    for fields with expensive ``deconstruct()`` methods. The results are
+    cached by field identity for the duration of the run, by patching Django
+    internals for the whole process. Only enable it if all the custom fields
+    deconstruct to the same value each time, otherwise the written migrations
+    may be wrong.
+    """
+
+    REMAKE_MIGRATIONS_FORMAT_MIGRATIONS: bool = True
+    """
+    Format the migration files written by the commands with black.
+
+    Black is run only if it's installed, in-process when possible, using the
+    configuration from your ``pyproject.toml``. Disable it to keep the files
+    as written by Django's ``MigrationWriter``.
+    """
+
     REMAKE_MIGRATIONS_RUN_BEFORE: dict[str, list[tuple[str, str]]] = field(
         default_factory=lambda: defaultdict(list)
     )
@@ -110,6 +190,51 @@ class AppSettings:
         }
     """
 
+    REMAKE_MIGRATIONS_JOURNAL_PATH: str = ".remakemigrations.json"
+    """
+    Path of the file where the progress of the command is recorded.
+
+    It's used to resume a run which failed with ``--resume``, or to run
+    a single phase again with ``--phase``. Relative paths are resolved from
+    the current working directory. You probably want to add this file to
+    your ``.gitignore``.
+    """
+
+    REMAKE_MIGRATIONS_STATE_SNAPSHOT_PATH: str | None = None
+    """
+    Path of the file where to write the project state built by the migrations.
+
+    When set, ``remakemigrations`` writes the state at the end of the run,
+    with a hash of the migration files. The ``check_migration_state`` command
+    compares the models with it, instead of loading all the migrations like
+    ``makemigrations --check``. Relative paths are resolved from the current
+    working directory. Commit this file along with the migrations.
+    """
+
+    REMAKE_MIGRATIONS_VERIFY_DATABASES: dict[str, dict[str, Any]] = field(
+        default_factory=lambda: {
+            "old": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+            "new": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+        }
+    )
+    """
+    Databases migrated by ``verify_remaked_migrations``, to compare their schemas.
+
+    The ``old`` database is migrated with the old migrations, the ``new`` one
+    with the remade migrations. Each value is a database configuration, like
+    the ones from the ``DATABASES`` setting. They default to in-memory SQLite
+    databases. Other backends can be used to check the SQL they generate, the
+    databases must exist and be empty. The tables, views and extensions
+    created by the migrations are dropped afterwards, even if migrating fails.
+
+    .. code-block:: python
+
+        REMAKE_MIGRATIONS_VERIFY_DATABASES = {
+            "old": {"ENGINE": "django.db.backends.postgresql", "NAME": "verify_old"},
+            "new": {"ENGINE": "django.db.backends.postgresql", "NAME": "verify_new"},
+        }
+    """
+
     def __getattribute__(self, __name: str) -> Any:
         """
         Check if a Django project settings should override the app default.
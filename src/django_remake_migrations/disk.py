@@ -0,0 +1,152 @@
+"""
+Access the migration files of a single app.
+
+Django's ``MigrationLoader`` always loads the migrations of all apps at
+once. These helpers follow the same rules, but for one app at a time,
+which allows to process projects app by app, with bounded memory usage.
+
+Files are only written when their content changes, to keep their
+modification time, their bytecode cache, and the file watchers quiet.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import pkgutil
+import shutil
+import sys
+import tempfile
+from collections.abc import Callable, Iterable
+from importlib import import_module
+from importlib.util import find_spec
+from pathlib import Path
+from types import ModuleType
+from typing import BinaryIO, TextIO
+
+from django.db.migrations import Migration
+from django.db.migrations.exceptions import BadMigrationError
+from django.db.migrations.loader import MigrationLoader
+
+
+def migrations_package(app_label: str) -> ModuleType | None:
+    """
+    Import the migrations package of the app, if it has one.
+
+    The package is imported once: its modules are listed from the disk, so
+    there is no need to reload it to find new migration files.
+    """
+    module_name, _ = MigrationLoader.migrations_module(app_label)
+    if module_name is None:
+        return None
+    try:
+        module = import_module(module_name)
+    except ModuleNotFoundError:
+        return None
+    # Not a package (e.g. migrations.py) or a namespace package
+    if not hasattr(module, "__path__"):
+        return None
+    if getattr(module, "__file__", None) is None and not isinstance(
+        module.__path__, list
+    ):
+        return None
+    return module
+
+
+def list_migration_names(app_label: str) -> list[str]:
+    """Names of the migrations of the app, without importing them."""
+    module = migrations_package(app_label)
+    if module is None:
+        return []
+    return sorted(
+        name
+        for _, name, is_pkg in pkgutil.iter_modules(module.__path__)
+        if not is_pkg and name[0] not in "_~"
+    )
+
+
+def migration_file_path(app_label: str, migration_name: str) -> Path:
+    """Path of the file defining the migration, without importing it."""
+    module_name, _ = MigrationLoader.migrations_module(app_label)
+    spec = find_spec(f"{module_name}.{migration_name}")
+    if spec is None or spec.origin is None:
+        raise BadMigrationError(
+            f"Migration {migration_name} in app {app_label} has no file"
+        )
+    return Path(spec.origin)
+
+
+def load_app_migrations(
+    app_label: str, migration_names: Iterable[str] | None = None
+) -> list[Migration]:
+    """
+    Load the migrations of a single app, sorted by name.
+
+    All the migrations of the app are loaded, unless specific names are given.
+    """
+    module_name, _ = MigrationLoader.migrations_module(app_label)
+    if migration_names is None:
+        migration_names = list_migration_names(app_label)
+    migrations = []
+    for migration_name in sorted(migration_names):
+        migration_module = import_module(f"{module_name}.{migration_name}")
+        if not hasattr(migration_module, "Migration"):
+            raise BadMigrationError(
+                f"Migration {migration_name} in app {app_label} has no Migration class"
+            )
+        migrations.append(migration_module.Migration(migration_name, app_label))
+    return migrations
+
+
+def unload_app_migrations(app_label: str) -> None:
+    """Remove the migration modules of the app from the import cache."""
+    module_name, _ = MigrationLoader.migrations_module(app_label)
+    if module_name is None:
+        return
+    for loaded_name in list(sys.modules):
+        if loaded_name.startswith(f"{module_name}."):
+            del sys.modules[loaded_name]
+
+
+def _digest(fh: BinaryIO) -> bytes:
+    """Hash of the content of a binary file object, read from the start."""
+    fh.seek(0)
+    digest = hashlib.sha256()
+    while chunk := fh.read(64 * 1024):
+        digest.update(chunk)
+    return digest.digest()
+
+
+def write_if_changed(
+    path: Path,
+    content: str | Callable[[TextIO], None],
+    formatter: Callable[[Path], None] | None = None,
+) -> bool:
+    """
+    Write the file, unless it already has the same content.
+
+    The content may be given as a callable writing it to a file object. It
+    is written to a temporary file first, formatted in place with the given
+    formatter, if any, and compared with the existing file by size, then by
+    hash.
+
+    Returns:
+        Whether the file was written.
+
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        # Same name, for formatters looking at the file extension
+        new_path = Path(directory) / path.name
+        with new_path.open("w", encoding="utf-8") as fh:
+            if callable(content):
+                content(fh)
+            else:
+                fh.write(content)
+        if formatter is not None:
+            formatter(new_path)
+        if path.exists() and path.stat().st_size == new_path.stat().st_size:
+            with path.open("rb") as existing, new_path.open("rb") as new:
+                if _digest(existing) == _digest(new):
+                    return False
+        with new_path.open("rb") as new, path.open("wb") as fh:
+            shutil.copyfileobj(new, fh)
+    return True
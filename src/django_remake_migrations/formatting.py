@@ -0,0 +1,210 @@
+"""
+Format the migration files, in memory or in a single batch.
+
+Django runs black once per ``makemigrations`` call, on the files it wrote.
+The commands of this package rewrite files several times: when black can be
+run in-process, each file is written to a temporary file and formatted
+there, so that it can be compared with the formatted file on the disk.
+Otherwise, they collect the written files and format all of them once, at
+the end.
+"""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Callable, Iterable
+from importlib import import_module
+from pathlib import Path
+from types import ModuleType
+from typing import Any, TextIO
+
+from django.core.management.base import OutputWrapper
+from django.core.management.utils import run_formatters
+
+from django_remake_migrations.conf import app_settings
+
+# Options of the black configuration which don't change how a given file is
+# formatted, and can be ignored when formatting in-process.
+_IGNORED_BLACK_OPTIONS = frozenset(
+    {
+        "cache_dir",
+        "check",
+        "color",
+        "diff",
+        "exclude",
+        "extend_exclude",
+        "fast",
+        "include",
+        "no_cache",
+        "quiet",
+        "verbose",
+        "workers",
+    }
+)
+
+# Options of the black configuration mapped to the mode, like black's CLI.
+_MODE_BLACK_OPTIONS = frozenset(
+    {
+        "enable_unstable_feature",
+        "ipynb",
+        "line_length",
+        "preview",
+        "pyi",
+        "python_cell_magics",
+        "skip_magic_trailing_comma",
+        "skip_source_first_line",
+        "skip_string_normalization",
+        "target_version",
+        "unstable",
+    }
+)
+
+
+def _import_black() -> ModuleType | None:
+    try:
+        return import_module("black")
+    except ImportError:
+        return None
+
+
+def _black_mode(black: ModuleType, paths: list[Path]) -> Any | None:
+    """
+    Build the black mode for the given files, like black's CLI does.
+
+    The configuration is found and parsed by black itself, which also infers
+    the target versions from ``requires-python``. Returns None when the mode
+    can't be built the same way, for example when the configuration is
+    invalid, or uses ``force-exclude`` or ``required-version``: the files
+    should then be formatted by the black executable.
+    """
+    try:
+        pyproject = black.find_pyproject_toml(tuple(str(path) for path in paths))
+        config = black.parse_pyproject_toml(pyproject) if pyproject else {}
+    except (OSError, ValueError):
+        return None
+    if not set(config) <= _MODE_BLACK_OPTIONS | _IGNORED_BLACK_OPTIONS:
+        return None
+
+    flags = {
+        name: config.get(name, False)
+        for name in (
+            "ipynb",
+            "preview",
+            "pyi",
+            "skip_magic_trailing_comma",
+            "skip_source_first_line",
+            "skip_string_normalization",
+            "unstable",
+        )
+    }
+    line_length = config.get("line_length", black.DEFAULT_LINE_LENGTH)
+    target_version = config.get("target_version", [])
+    python_cell_magics = config.get("python_cell_magics", [])
+    enable_unstable_feature = config.get("enable_unstable_feature", [])
+    if (
+        not all(isinstance(value, bool) for value in flags.values())
+        or not isinstance(line_length, int)
+        or not isinstance(target_version, list)
+        or not isinstance(python_cell_magics, list)
+        or not isinstance(enable_unstable_feature, list)
+        # Rejected by the CLI
+        or (enable_unstable_feature and not (flags["preview"] or flags["unstable"]))
+        or (flags["ipynb"] and flags["pyi"])
+    ):
+        return None
+
+    try:
+        return black.Mode(
+            target_versions={
+                black.TargetVersion[version.upper()] for version in target_version
+            },
+            line_length=line_length,
+            is_pyi=flags["pyi"],
+            is_ipynb=flags["ipynb"],
+            skip_source_first_line=flags["skip_source_first_line"],
+            string_normalization=not flags["skip_string_normalization"],
+            magic_trailing_comma=not flags["skip_magic_trailing_comma"],
+            preview=flags["preview"],
+            unstable=flags["unstable"],
+            python_cell_magics=set(python_cell_magics),
+            enabled_features={
+                black.Preview[feature] for feature in enable_unstable_feature
+            },
+        )
+    except (AttributeError, KeyError, TypeError):
+        # Unknown version or feature, or an older black
+        return None
+
+
+def _in_process_formatter(path: Path) -> Callable[[Path], None] | None:
+    """Function formatting files like the given one in place, if possible."""
+    black = _import_black()
+    mode = _black_mode(black, [path]) if black is not None else None
+    if black is None or mode is None:
+        return None
+
+    def format_file(file_path: Path) -> None:
+        black.format_file_in_place(
+            file_path, fast=True, mode=mode, write_back=black.WriteBack.YES
+        )
+
+    return format_file
+
+
+class BlackFormatter:
+    """
+    Format files in place with black, in-process.
+
+    The mode is built once, from the configuration found for the first
+    formatted file, like black's CLI reads a single configuration for all
+    the files it's given.
+    """
+
+    def __init__(self) -> None:
+        self.loaded = False
+        self.formatter: Callable[[Path], None] | None = None
+
+    def file_formatter(self, path: Path) -> Callable[[Path], None] | None:
+        """
+        Function formatting a file like the given one in place.
+
+        Returns None when black can't be run in-process, or when
+        ``REMAKE_MIGRATIONS_FORMAT_MIGRATIONS`` is disabled: the file should
+        then be written as is, and passed to ``format_files()``.
+        """
+        if not app_settings.REMAKE_MIGRATIONS_FORMAT_MIGRATIONS:
+            return None
+        if not self.loaded:
+            self.loaded = True
+            self.formatter = _in_process_formatter(path)
+        return self.formatter
+
+
+def format_files(
+    paths: Iterable[Path], stderr: TextIO | OutputWrapper = sys.stderr
+) -> None:
+    """
+    Format the given files with black, each one once.
+
+    Black is run in-process when it can be imported and the mode can be
+    built from the project configuration, otherwise a single black
+    subprocess formats all the files, like ``makemigrations`` does. Files
+    which were removed since being written are skipped. Nothing is done when
+    ``REMAKE_MIGRATIONS_FORMAT_MIGRATIONS`` is disabled.
+    """
+    if not app_settings.REMAKE_MIGRATIONS_FORMAT_MIGRATIONS:
+        return
+    paths = [path for path in dict.fromkeys(paths) if path.exists()]
+    if not paths:
+        return
+
+    black = _import_black()
+    mode = _black_mode(black, paths) if black is not None else None
+    if black is None or mode is None:
+        run_formatters([str(path) for path in paths], stderr=stderr)
+        return
+
+    for path in paths:
+        black.format_file_in_place(
+            path, fast=True, mode=mode, write_back=black.WriteBack.YES
+        )
@@ -0,0 +1,97 @@
+"""
+Journal of a remake run, to resume it after a failure.
+
+The journal records what is needed to run any phase of the command
+without running the previous ones again: the list of old migrations,
+the backed up files and which phases were completed.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+PHASES = ("old", "make", "update", "restore", "post")
+"""Phases of the remake, in the order they run."""
+
+
+@dataclass
+class RemakeJournal:
+    """State of a remake run, persisted after each phase."""
+
+    migration_name: str
+    """Name given to the new migrations, after their number."""
+
+    keep_old_migrations: bool = False
+    streaming: bool = False
+
+    side_by_side: bool = False
+    """Whether the new migrations are written to new packages, next to the old."""
+
+    date: str = ""
+    """Date given with ``--date``, in ISO format, written in the new migrations."""
+
+    app_labels: list[str] = field(default_factory=list)
+    """Apps to remake, all the first party apps if empty."""
+
+    old_migrations: dict[str, list[tuple[str, str]]] = field(default_factory=dict)
+    """The old migrations, grouped by app."""
+
+    renamed_files: dict[Path, Path] = field(default_factory=dict)
+    """Old migration files which were backed up, with their backup path."""
+
+    completed_phases: list[str] = field(default_factory=list)
+
+    @property
+    def pending_phases(self) -> list[str]:
+        """Phases which still need to run, in order."""
+        return [phase for phase in PHASES if phase not in self.completed_phases]
+
+    def mark_completed(self, phase: str) -> None:
+        """Record the phase as completed."""
+        if phase not in self.completed_phases:
+            self.completed_phases.append(phase)
+
+    def save(self, path: Path) -> None:
+        """Write the journal to the given file."""
+        data = {
+            "migration_name": self.migration_name,
+            "keep_old_migrations": self.keep_old_migrations,
+            "streaming": self.streaming,
+            "side_by_side": self.side_by_side,
+            "date": self.date,
+            "app_labels": self.app_labels,
+            "old_migrations": self.old_migrations,
+            "renamed_files": {
+                str(old_path): str(new_path)
+                for old_path, new_path in self.renamed_files.items()
+            },
+            "completed_phases": self.completed_phases,
+        }
+        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> RemakeJournal:
+        """Read the journal from the given file."""
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return cls(
+            migration_name=data["migration_name"],
+            keep_old_migrations=data["keep_old_migrations"],
+            streaming=data["streaming"],
+            side_by_side=data.get("side_by_side", False),
+            date=data.get("date", ""),
+            app_labels=data.get("app_labels", []),
+            old_migrations={
+                app_label: [
+                    (old_app_label, migration_name)
+                    for old_app_label, migration_name in migrations
+                ]
+                for app_label, migrations in data["old_migrations"].items()
+            },
+            renamed_files={
+                Path(old_path): Path(new_path)
+                for old_path, new_path in data["renamed_files"].items()
+            },
+            completed_phases=data["completed_phases"],
+        )
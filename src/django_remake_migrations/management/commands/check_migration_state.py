@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Any
+
+from django.core.management import BaseCommand, CommandError, call_command
+
+from django_remake_migrations.conf import app_settings
+from django_remake_migrations.snapshot import StateSnapshot
+
+
+class Command(BaseCommand):
+    """
+    Command to check that the models don't need new migrations.
+
+    A faster ``makemigrations --check``, for CI. The models are compared with
+    the snapshot written by ``remakemigrations``, configured with
+    ``REMAKE_MIGRATIONS_STATE_SNAPSHOT_PATH``. The migrations are only loaded
+    when the migration files changed since the snapshot, or when the models
+    differ from it, by running ``makemigrations --check``.
+    """
+
+    help = (
+        "Check that the models match the migrations, using the state snapshot "
+        "when the migration files didn't change."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        """Add command arguments."""
+        parser.add_argument(
+            "--snapshot",
+            dest="snapshot",
+            help=(
+                "Path of the state snapshot. Defaults to "
+                "REMAKE_MIGRATIONS_STATE_SNAPSHOT_PATH."
+            ),
+        )
+
+    def handle(self, *args: str, snapshot: str | None = None, **options: Any) -> None:
+        """Command entry point."""
+        snapshot = snapshot or app_settings.REMAKE_MIGRATIONS_STATE_SNAPSHOT_PATH
+        if not snapshot:
+            raise CommandError(
+                "Give the path of the snapshot with --snapshot, or set "
+                "REMAKE_MIGRATIONS_STATE_SNAPSHOT_PATH."
+            )
+        snapshot_path = Path(snapshot)
+
+        if not snapshot_path.exists():
+            self.stdout.write("No state snapshot found.")
+        else:
+            state_snapshot = StateSnapshot.load(snapshot_path)
+            if not state_snapshot.is_current():
+                self.stdout.write("The migration files changed since the snapshot.")
+            elif not state_snapshot.matches_models():
+                self.stdout.write("The models changed since the snapshot.")
+            else:
+                self.log_info("No changes detected")
+                return
+
+        self.stdout.write("Running makemigrations --check...")
+        # Exits with an error if the models need new migrations
+        call_command(
+            "makemigrations",
+            check_changes=True,
+            dry_run=True,
+            stdout=self.stdout,
+            stderr=self.stderr,
+        )
+
+    def log_info(self, message: str) -> None:
+        """Wrapper to help logging successes."""
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from argparse import ArgumentParser, ArgumentTypeError
+from pathlib import Path
+from typing import Any
+
+from django.apps import apps
+from django.core.management import BaseCommand, CommandError
+
+from django_remake_migrations.benchmark import (
+    DEBT_LABELS,
+    AppDebt,
+    measure_app_debt,
+    render_debt_json,
+    render_debt_markdown,
+)
+from django_remake_migrations.disk import migrations_package
+from django_remake_migrations.steps import is_first_party, validate_app_labels
+
+
+def threshold(value: str) -> tuple[str, float]:
+    """Parse a ``METRIC=VALUE`` threshold."""
+    metric, sep, limit = value.partition("=")
+    if not sep or metric not in DEBT_LABELS:
+        raise ArgumentTypeError(
+            f"expected METRIC=VALUE, with METRIC one of: {', '.join(DEBT_LABELS)}"
+        )
+    try:
+        return metric, float(limit)
+    except ValueError:
+        raise ArgumentTypeError(f"invalid value for {metric}: {limit!r}") from None
+
+
+class Command(BaseCommand):
+    """
+    Command to report the cost of the migrations of each first party app.
+
+    For each app, measures the number of migrations, the size of their files,
+    the time to import them, their number of operations, the number of
+    migrations of the app along the longest chain of dependencies, and the
+    time to apply them to an empty in-memory SQLite database.
+
+    Nothing is written to the disk nor to the configured databases.
+    """
+
+    help = (
+        "Report the number, size, import time, operations, graph depth and "
+        "migrate time of the migrations of each first party app."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        """Add command arguments."""
+        parser.add_argument(
+            "args",
+            metavar="app_label",
+            nargs="*",
+            help="Only report the given apps. Defaults to all first party apps.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["markdown", "json"],
+            default="markdown",
+            dest="output_format",
+            help="Format of the report.",
+        )
+        parser.add_argument(
+            "--output",
+            dest="output",
+            help="File where to write the report, instead of the standard output.",
+        )
+        parser.add_argument(
+            "--fail-over",
+            type=threshold,
+            action="append",
+            default=[],
+            dest="fail_over",
+            metavar="METRIC=VALUE",
+            help=(
+                "Exit with an error if an app goes over the given value for "
+                f"the metric. Metrics: {', '.join(DEBT_LABELS)}. "
+                "May be given several times."
+            ),
+        )
+
+    def handle(
+        self,
+        *app_labels: str,
+        output_format: str = "markdown",
+        output: str | None = None,
+        fail_over: list[tuple[str, float]],
+        **options: Any,
+    ) -> None:
+        """Command entry point."""
+        app_labels = tuple(
+            validate_app_labels(app_labels) or self.first_party_app_labels()
+        )
+        debts = measure_app_debt(app_labels)
+        if output_format == "json":
+            report = render_debt_json(debts)
+        else:
+            report = render_debt_markdown(debts)
+        if output is None:
+            self.stdout.write(report)
+        else:
+            Path(output).write_text(report, encoding="utf-8")
+
+        failures = self.check_thresholds(debts, fail_over)
+        if failures:
+            raise CommandError("\n".join(failures))
+
+    @staticmethod
+    def first_party_app_labels() -> list[str]:
+        """Labels of the first party apps with migrations."""
+        return [
+            app_config.label
+            for app_config in apps.get_app_configs()
+            if is_first_party(app_config)
+            and migrations_package(app_config.label) is not None
+        ]
+
+    @staticmethod
+    def check_thresholds(
+        debts: list[AppDebt], fail_over: list[tuple[str, float]]
+    ) -> list[str]:
+        """Messages for the apps going over the thresholds."""
+        return [
+            f"App {debt.app_label} is over the {metric} threshold: "
+            f"{getattr(debt, metric):g} > {limit:g}"
+            for metric, limit in fail_over
+            for debt in debts
+            if getattr(debt, metric) > limit
+        ]
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from typing import Any
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+from django.db.migrations.loader import MigrationLoader
+
+from django_remake_migrations.records import (
+    delete_migration_records,
+    stale_migration_records,
+)
+from django_remake_migrations.steps import validate_app_labels
+
+
+class Command(BaseCommand):
+    """
+    Command to delete the rows of deleted migrations from ``django_migrations``.
+
+    After the replaced migrations are deleted, for example with
+    ``delete_remaked_migrations --remove-replaced``, their rows stay in the
+    ``django_migrations`` table of each database. This command deletes the
+    rows of the migrations which aren't on the disk anymore, on all databases
+    by default. The rows of migrations still listed in a ``replaces`` are
+    kept.
+    """
+
+    help = (
+        "Delete the rows of the django_migrations table for migrations which "
+        "don't exist anymore."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        """Add command arguments."""
+        parser.add_argument(
+            "args",
+            metavar="app_label",
+            nargs="*",
+            help="Only prune the rows of the given apps. Defaults to all apps.",
+        )
+        parser.add_argument(
+            "--database",
+            action="append",
+            dest="databases",
+            help=(
+                "Database alias where to prune the rows. May be given several "
+                "times. Defaults to all databases."
+            ),
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            dest="dry_run",
+            help="Show how many rows would be deleted without deleting them.",
+        )
+
+    def handle(
+        self,
+        *app_labels: str,
+        databases: list[str] | None = None,
+        dry_run: bool = False,
+        **options: Any,
+    ) -> None:
+        """Command entry point."""
+        app_labels = tuple(validate_app_labels(app_labels))
+        for alias in databases or []:
+            if alias not in connections:
+                raise CommandError(f"Unknown database: {alias}")
+
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        for alias in databases or connections:
+            connection = connections[alias]
+            stale = stale_migration_records(connection, loader, app_labels)
+            count = sum(len(migration_names) for migration_names in stale.values())
+            if not count:
+                self.log_info(f"No stale migration rows in {alias}.")
+                continue
+            if dry_run:
+                self.stdout.write(f"Would delete {count} row(s) from {alias}:")
+            else:
+                count = delete_migration_records(connection, stale)
+                self.log_info(f"Deleted {count} row(s) from {alias}:")
+            for app_label, migration_names in sorted(stale.items()):
+                self.stdout.write(f"  - {app_label}: {len(migration_names)}")
+
+    def log_info(self, message: str) -> None:
+        """Wrapper to help logging successes."""
+        self.stdout.write(self.style.SUCCESS(message))
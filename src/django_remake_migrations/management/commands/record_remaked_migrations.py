@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+from django.db.migrations.exceptions import InconsistentMigrationHistory
+from django.db.migrations.loader import MigrationLoader
+
+from django_remake_migrations.records import (
+    MigrationKey,
+    record_migrations,
+    unrecorded_replacements,
+)
+from django_remake_migrations.steps import validate_app_labels
+
+
+class Command(BaseCommand):
+    """
+    Command to record the remade migrations as applied, in bulk.
+
+    On databases where all the migrations replaced by a remade migration are
+    applied, for example a copy of the production database, ``migrate``
+    records the remade migrations one at a time. This command records them
+    with a single insert per database, on all databases by default.
+    """
+
+    help = (
+        "Record the remade migrations as applied on the databases where the "
+        "migrations they replace are applied."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        """Add command arguments."""
+        parser.add_argument(
+            "args",
+            metavar="app_label",
+            nargs="*",
+            help="Only record the migrations of the given apps. Defaults to all apps.",
+        )
+        parser.add_argument(
+            "--database",
+            action="append",
+            dest="databases",
+            help=(
+                "Database alias where to record the migrations. May be given "
+                "several times. Defaults to all databases."
+            ),
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=1,
+            dest="jobs",
+            help="Number of databases to process concurrently. Defaults to 1.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            dest="dry_run",
+            help="Show how many migrations would be recorded without recording them.",
+        )
+
+    def handle(
+        self,
+        *app_labels: str,
+        databases: list[str] | None = None,
+        jobs: int = 1,
+        dry_run: bool = False,
+        **options: Any,
+    ) -> None:
+        """Command entry point."""
+        app_labels = tuple(validate_app_labels(app_labels))
+        for alias in databases or []:
+            if alias not in connections:
+                raise CommandError(f"Unknown database: {alias}")
+        aliases = list(databases or connections)
+
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+
+        def process(alias: str) -> list[MigrationKey] | str:
+            connection = connections[alias]
+            try:
+                keys = unrecorded_replacements(connection, loader, app_labels)
+                if keys and not dry_run:
+                    record_migrations(connection, keys)
+            except InconsistentMigrationHistory as exc:
+                return str(exc)
+            finally:
+                if jobs > 1:
+                    # Connections are local to the worker thread
+                    connection.close()
+            return keys
+
+        if jobs > 1:
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                results = list(executor.map(process, aliases))
+        else:
+            results = [process(alias) for alias in aliases]
+
+        errors = []
+        for alias, result in zip(aliases, results, strict=True):
+            if isinstance(result, str):
+                errors.append(result)
+            elif not result:
+                self.log_info(f"No migrations to record in {alias}.")
+            elif dry_run:
+                self.stdout.write(f"Would record {len(result)} migration(s) in {alias}")
+            else:
+                self.log_info(f"Recorded {len(result)} migration(s) in {alias}")
+        if errors:
+            raise CommandError("\n".join(errors))
+
+    def log_info(self, message: str) -> None:
+        """Wrapper to help logging successes."""
+        self.stdout.write(self.style.SUCCESS(message))
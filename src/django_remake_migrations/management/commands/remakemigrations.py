@@ -1,21 +1,27 @@
 from __future__ import annotations
 
 import datetime as dt
-import sys
 from argparse import ArgumentParser
-from collections import defaultdict
-from importlib import import_module
 from pathlib import Path
+from typing import Any
 
-from django.apps import AppConfig, apps
-from django.core.exceptions import ImproperlyConfigured
-from django.core.management import BaseCommand, call_command
-from django.db.migrations import Migration
-from django.db.migrations.loader import MigrationLoader
-from django.utils.module_loading import import_string
+from django.core.management import BaseCommand
 
+from django_remake_migrations.api import RemakeResult, remake
+from django_remake_migrations.benchmark import (
+    MigrationSetStats,
+    render_json,
+    render_markdown,
+)
 from django_remake_migrations.conf import app_settings
-from django_remake_migrations.management.migration_writer import CustomMigrationWriter
+from django_remake_migrations.journal import PHASES
+from django_remake_migrations.memoization import CacheCounters
+from django_remake_migrations.profiling import (
+    MigrationProfiler,
+    render_profile_json,
+    render_profile_markdown,
+)
+from django_remake_migrations.steps import SIDE_BY_SIDE_SUFFIX
 
 
 class Command(BaseCommand):
@@ -31,254 +37,284 @@ class Command(BaseCommand):
     - showmigrations: should show the migration graph as expected
     - migrate: should not execute any migration
     - makemigrations: should not detect any differences
-    """
 
-    old_migrations: dict[str, list[tuple[str, str]]]
-    renamed_files: dict[Path, Path]
+    The remake itself is run by ``django_remake_migrations.api.remake()``,
+    the command reports its outcome.
+    """
 
     def add_arguments(self, parser: ArgumentParser) -> None:
         """Add command arguments."""
+        parser.add_argument(
+            "args",
+            metavar="app_label",
+            nargs="*",
+            help=(
+                "Only remake the migrations of the given apps. The other apps "
+                "should be remade already. Defaults to all first party apps."
+            ),
+        )
         parser.add_argument(
             "--keep-old-migrations",
             action="store_true",
             dest="keep_old_migrations",
             help="Don't delete old migrations files and keep them around.",
         )
+        parser.add_argument(
+            "--side-by-side",
+            action="store_true",
+            dest="side_by_side",
+            help=(
+                "Leave the old migrations untouched and write the new ones to a "
+                f"new package per app, named after the old one with a "
+                f"{SIDE_BY_SIDE_SUFFIX!r} suffix, to switch to with the "
+                "MIGRATION_MODULES setting."
+            ),
+        )
+        parser.add_argument(
+            "--clear-side-by-side",
+            action="store_true",
+            dest="clear_side_by_side",
+            help=(
+                "With --side-by-side, remove the migrations already in the new "
+                "packages, written by a previous run."
+            ),
+        )
+        parser.add_argument(
+            "--streaming",
+            action="store_true",
+            dest="streaming",
+            help=(
+                "Process migrations one app at a time, to keep memory usage "
+                "bounded on projects with very large histories."
+            ),
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=1,
+            dest="jobs",
+            help=(
+                "Number of worker processes detecting the changes, for apps "
+                "which don't reference each other. Defaults to 1."
+            ),
+        )
+        parser.add_argument(
+            "--date",
+            type=dt.date.fromisoformat,
+            dest="date",
+            help=(
+                "Date (YYYY-MM-DD) to use in the name and the header of the new "
+                "migrations, instead of today, for a reproducible output."
+            ),
+        )
+        parser.add_argument(
+            "--cache-dir",
+            dest="cache_dir",
+            help=(
+                "Directory where to cache the new migrations. A run with the same "
+                "models, old migrations, settings and options restores them from "
+                "the cache instead of generating them."
+            ),
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            dest="resume",
+            help="Resume the previous run, from the phase which didn't complete.",
+        )
+        parser.add_argument(
+            "--phase",
+            choices=PHASES,
+            dest="phase",
+            help=(
+                "Only run the given phase, using the journal of the previous run. "
+                "For example, use '--phase update' to set replaces again after "
+                "editing the new migrations."
+            ),
+        )
+        parser.add_argument(
+            "--reset-phase",
+            action="store_true",
+            dest="reset_phase",
+            help=(
+                "Run the phase given with --phase even if the journal marks it "
+                "as completed."
+            ),
+        )
+        parser.add_argument(
+            "--measure",
+            action="store_true",
+            dest="measure",
+            help=(
+                "Measure the migrations before and after the remake "
+                "on a fresh in-memory SQLite database."
+            ),
+        )
+        parser.add_argument(
+            "--measure-output",
+            dest="measure_output",
+            help=(
+                "File where to write the measurements report. Written as JSON "
+                "if the file has a .json extension, as Markdown otherwise. "
+                "Printed to the standard output if not specified."
+            ),
+        )
+        parser.add_argument(
+            "--profile",
+            action="store_true",
+            dest="profile",
+            help=(
+                "Report the time spent in the autodetector and serializing "
+                "migrations for each app, model and field class."
+            ),
+        )
+        parser.add_argument(
+            "--profile-output",
+            dest="profile_output",
+            help=(
+                "File where to write the profiling report. Written as JSON "
+                "if the file has a .json extension, as Markdown otherwise. "
+                "Printed to the standard output if not specified."
+            ),
+        )
+        window = parser.add_mutually_exclusive_group()
+        window.add_argument(
+            "--keep-last",
+            type=int,
+            dest="keep_last",
+            help=(
+                "Only replace the old migrations, keeping the given number of "
+                "recent migrations in each app untouched."
+            ),
+        )
+        window.add_argument(
+            "--older-than",
+            type=dt.date.fromisoformat,
+            dest="older_than",
+            help=(
+                "Only replace the migrations generated before the given date "
+                "(YYYY-MM-DD), according to their header."
+            ),
+        )
+        window.add_argument(
+            "--until-ref",
+            dest="until_ref",
+            help="Only replace the migrations which exist at the given git ref.",
+        )
 
-    def handle(self, *args: str, keep_old_migrations: bool, **options: str) -> None:
-        """Execute one step after another to avoid side effects between steps."""
-        # Remove or rename old migration files
-        self.handle_old_migrations(keep_old_migrations)
-        # Recreate migrations
-        self.make_migrations()
-        # Update new files to be squashed of the old ones
-        self.update_new_migrations()
-        # Recreate old migrations
-        if keep_old_migrations:
-            self.restore_old_migrations()
-        # Run other commands
-        self.run_post_commands()
+    def handle(
+        self,
+        *app_labels: str,
+        keep_old_migrations: bool = False,
+        side_by_side: bool = False,
+        clear_side_by_side: bool = False,
+        streaming: bool = False,
+        jobs: int = 1,
+        date: dt.date | None = None,
+        cache_dir: str | None = None,
+        resume: bool = False,
+        phase: str | None = None,
+        reset_phase: bool = False,
+        measure: bool = False,
+        measure_output: str | None = None,
+        profile: bool = False,
+        profile_output: str | None = None,
+        keep_last: int | None = None,
+        older_than: dt.date | None = None,
+        until_ref: str | None = None,
+        **options: Any,
+    ) -> None:
+        """Run the remake and report its outcome."""
+        result = remake(
+            app_labels,
+            keep_old_migrations=keep_old_migrations,
+            side_by_side=side_by_side,
+            clear_side_by_side=clear_side_by_side,
+            streaming=streaming,
+            jobs=jobs,
+            date=date,
+            cache_dir=cache_dir,
+            keep_last=keep_last,
+            older_than=older_than,
+            until_ref=until_ref,
+            resume=resume,
+            phase=phase,
+            reset_phase=reset_phase,
+            journal_path=app_settings.REMAKE_MIGRATIONS_JOURNAL_PATH,
+            measure=measure,
+            profile=profile,
+            stdout=self.stdout,
+            stderr=self.stderr,
+            style=self.style,
+        )
+        if result.measurements is not None:
+            self.write_measure_report(*result.measurements, measure_output)
+        self.log_written_files(result)
+        if result.new_modules:
+            self.log_info(
+                "Switch to the new migrations with the MIGRATION_MODULES setting:"
+            )
+            self.stdout.write(self.render_migration_modules(result.new_modules))
         self.log_info("All done!")
+        if result.profiler is not None:
+            self.write_profile_report(
+                result.profiler, result.cache_counters, profile_output
+            )
 
-    def restore_old_migrations(self) -> None:
-        """Restore old migrations after the command."""
-        for old_name, new_name in self.renamed_files.items():
-            Path(new_name).rename(old_name)
+    @staticmethod
+    def render_migration_modules(new_modules: dict[str, str]) -> str:
+        """Settings snippet to switch to the new migrations."""
+        lines = "".join(
+            f"    {app_label!r}: {module_name!r},\n"
+            for app_label, module_name in new_modules.items()
+        )
+        return f"MIGRATION_MODULES = {{\n{lines}}}"
 
     def log_info(self, message: str) -> None:
         """Wrapper to help logging successes."""
         self.stdout.write(self.style.SUCCESS(message))
 
-    def log_error(self, message: str) -> None:
-        """Wrapper to help logging errors."""
-        self.stderr.write(self.style.ERROR(message))
-
-    def handle_old_migrations(self, keep_old_migrations: bool) -> None:
-        """Remove all pre-existing migration files in first party apps."""
-        action = "Backing up" if keep_old_migrations else "Removing"
-        self.log_info(f"{action} old migration files...")
-        loader = MigrationLoader(None, ignore_no_migrations=True)
-        old_migrations = defaultdict(list)
-        self.renamed_files = {}
-        for (app_label, migration_name), _migration_obj in loader.graph.nodes.items():
-            app_config = apps.get_app_config(app_label)
-            if self._is_first_party(app_config):
-                old_migrations[app_label].append((app_label, migration_name))
-                rename = self.handle_old_migration_file(
-                    app_label=app_label,
-                    migration_name=migration_name,
-                    keep_old_migrations=keep_old_migrations,
-                )
-                self.renamed_files.update(rename)
-        self.old_migrations = dict(old_migrations)
-
-    def make_migrations(self) -> None:
-        """Recreate migrations from scratch with a unique name."""
-        self.log_info("Creating new migrations...")
-        name = f"remaked_{dt.date.today():%Y%m%d}"
-        if first_apps := app_settings.REMAKE_MIGRATIONS_FIRST_APPS:
-            self.log_info(f"First apps: {', '.join(first_apps)}...")
-            call_command("makemigrations", "--name", name, *first_apps)
-
-        if last_apps := app_settings.REMAKE_MIGRATIONS_LAST_APPS:
-            apps_to_make = [
-                app_config.label
-                for app_config in apps.get_app_configs()
-                if app_config.label not in last_apps
-            ]
-            self.log_info(f"Middle apps {', '.join(apps_to_make)}...")
-            call_command("makemigrations", "--name", name, *apps_to_make)
-
-            self.log_info(f"Last apps {', '.join(last_apps)}...")
-            call_command("makemigrations", "--name", name, *last_apps)
-
-        # Always run a final round, just in case
-        call_command("makemigrations", "--name", name)
-
-    @staticmethod
-    def _is_first_party(app_config: AppConfig) -> bool:
-        app_path = Path(app_config.path)
-        return (
-            "site-packages" not in app_path.parts
-            and "dist-packages" not in app_path.parts
+    def log_written_files(self, result: RemakeResult) -> None:
+        """Report how many files were written, and how many were unchanged."""
+        self.stdout.write(
+            f"Wrote {len(result.written_files)} file(s), skipped "
+            f"{len(result.skipped_files)} unchanged file(s)."
         )
 
-    @staticmethod
-    def handle_old_migration_file(
-        app_label: str, migration_name: str, keep_old_migrations: bool
-    ) -> dict[Path, Path]:
-        """
-        Removes or rename old migration file.
-
-        Remove file from the disk for the specified migration
-        or rename if we need to keep around old migrations.
-        """
-        app_migrations_module_name, _ = MigrationLoader.migrations_module(app_label)
-        migration_module = import_module(
-            f"{app_migrations_module_name}.{migration_name}"
-        )
-        migration_file = Path(migration_module.__file__)  # type: ignore[arg-type]
-        if keep_old_migrations:
-            new_name = migration_file.with_suffix(".py-backup")
-            migration_file.rename(new_name)
-            rename = {migration_file: new_name}
-        else:
-            migration_file.unlink()
-            rename = {}
-        # Invalidate the import cache to avoid loading the old migration
-        sys.modules.pop(migration_module.__name__, None)
-        return rename
-
-    def update_new_migrations(self) -> None:
-        """
-        Update auto-generated migrations after Django re-created them.
-
-        Does a lot of things:
-
-        - Rename migration files to have a unique name. If they have the same name as
-          an old one, Django may be confused with replaces or dependencies.
-        - Update dependencies to use the new unique names.
-        - Add the old migrations to the `replaces` attributes of the new migrations.
-          This is to mark the new migrations as squashed, so they are not actually
-          executed by Django, they are simply marked as already applied.
-        """
-        self.log_info("Updating new migrations...")
-        # Sort old migrations
-        sorted_old_migrations = self.sort_migrations_map(self.old_migrations)
-        loader = MigrationLoader(None, ignore_no_migrations=True, load=False)
-        # Load migrations from the disk
-        loader.load_disk()
-        # Build a map of new migrations key per app
-        new_migrations = defaultdict(list)
-        for (
-            app_label,
-            migration_name,
-        ), _migration_obj in loader.disk_migrations.items():
-            if app_label in sorted_old_migrations:
-                new_migrations[app_label].append((app_label, migration_name))
-
-        # Sort new migrations
-        sorted_new_migrations = self.sort_migrations_map(dict(new_migrations))
-        # Do the main work
-        for app_label, new_migrations_list in sorted_new_migrations.items():
-            new_migrations_count = len(new_migrations_list)
-            old_migrations_list = sorted_old_migrations[app_label]
-            old_migrations_count = len(old_migrations_list)
-
-            # We should have more migrations before
-            if (
-                old_migrations_count < new_migrations_count
-                and not app_settings.REMAKE_MIGRATIONS_REPLACES_ALL
-            ):
-                self.log_error(
-                    f"App {app_label} has more migrations than before... "
-                    "Replaces might be wrong!"
-                )
-
-            # Calculate how many migrations will be replaced by the first one
-            first_replaces_count = old_migrations_count - new_migrations_count + 1
-            # Rewrite migrations with: new name, updated dependencies & replaces
-            for index, migration_key in enumerate(new_migrations_list):
-                migration_obj = loader.disk_migrations[migration_key]
-
-                if app_settings.REMAKE_MIGRATIONS_REPLACES_ALL:
-                    replaces_list = set(old_migrations_list)
-                    for (
-                        other_app
-                    ) in app_settings.REMAKE_MIGRATIONS_REPLACE_OTHER_APP.get(
-                        app_label, []
-                    ):
-                        replaces_list.update(sorted_old_migrations[other_app])
-                    migration_obj.replaces = sorted(replaces_list)  # type: ignore[misc]
-                    if index == 0:
-                        self.add_needed_database_extensions(migration_obj)
-                else:
-                    if index == 0:
-                        # The first migration will replace the N first ones
-                        migration_obj.replaces = old_migrations_list[  # type: ignore[misc]
-                            :first_replaces_count
-                        ]
-                        self.add_needed_database_extensions(migration_obj)
-                    else:
-                        # Otherwise, we replace a single migration
-                        replaced_migration = old_migrations_list[
-                            first_replaces_count + index - 1
-                        ]
-                        migration_obj.replaces = [replaced_migration]  # type: ignore[misc]
-
-                if (
-                    app_settings.REMAKE_MIGRATIONS_RUN_BEFORE
-                    and index == 0
-                    and app_label in app_settings.REMAKE_MIGRATIONS_RUN_BEFORE
-                ):
-                    migration_obj.run_before = (  # type: ignore[misc]
-                        app_settings.REMAKE_MIGRATIONS_RUN_BEFORE[app_label]
-                    )
-
-                migration_obj.initial = True  # type: ignore[misc]
-                # Rewrite back to the disk
-                self.write_to_disk(migration_obj)
-
-    @staticmethod
-    def sort_migrations_map(
-        migrations_map: dict[str, list[tuple[str, str]]],
-    ) -> dict[str, list[tuple[str, str]]]:
-        """Sort migrations and group them by app."""
-        return {
-            app_label: sorted(migrations_list)
-            for app_label, migrations_list in migrations_map.items()
-        }
-
-    @staticmethod
-    def add_needed_database_extensions(migration_obj: Migration) -> None:
-        """Add DB extensions for the app to the migration file."""
-        app_label = migration_obj.app_label
-        extensions = app_settings.REMAKE_MIGRATIONS_EXTENSIONS.get(app_label)
-        if not extensions:
+    def write_measure_report(
+        self,
+        before_stats: MigrationSetStats,
+        after_stats: MigrationSetStats,
+        measure_output: str | None,
+    ) -> None:
+        """Write the report comparing old and new migrations."""
+        if measure_output is None:
+            self.stdout.write(render_markdown(before_stats, after_stats))
             return
 
-        if isinstance(extensions, str):  # type: ignore[unreachable]
-            raise ImproperlyConfigured(
-                "REMAKE_MIGRATIONS_EXTENSIONS values should be a list, not a string."
-            )
-
-        extension_objects = [import_string(ext)() for ext in extensions]
-        migration_obj.operations = [*extension_objects, *migration_obj.operations]  # type: ignore[misc]
-
-    @staticmethod
-    def write_to_disk(migration_obj: Migration) -> None:
-        """Write the migration object to the disk."""
-        writer = CustomMigrationWriter(migration_obj)
-        with open(writer.path, "w", encoding="utf-8") as fh:
-            fh.write(writer.as_string())
-
-    def run_post_commands(self) -> None:
-        """Run other management commands at the very end."""
-        post_commands = app_settings.REMAKE_MIGRATIONS_POST_COMMANDS
-        if not post_commands:
+        output_path = Path(measure_output)
+        if output_path.suffix == ".json":
+            report = render_json(before_stats, after_stats)
+        else:
+            report = render_markdown(before_stats, after_stats)
+        output_path.write_text(report, encoding="utf-8")
+        self.log_info(f"Measurements written to {output_path}")
+
+    def write_profile_report(
+        self,
+        profiler: MigrationProfiler,
+        cache_counters: dict[str, CacheCounters],
+        profile_output: str | None,
+    ) -> None:
+        """Write the profiling report, the slowest first."""
+        if profile_output is None:
+            self.stdout.write(render_profile_markdown(profiler, cache_counters))
             return
 
-        self.log_info("Running post-commands...")
-        for command_with_args in post_commands:
-            self.log_info(f"Running: {' '.join(command_with_args)}")
-            call_command(*command_with_args)
+        output_path = Path(profile_output)
+        if output_path.suffix == ".json":
+            report = render_profile_json(profiler, cache_counters)
+        else:
+            report = render_profile_markdown(profiler, cache_counters)
+        output_path.write_text(report, encoding="utf-8")
+        self.log_info(f"Profile written to {output_path}")
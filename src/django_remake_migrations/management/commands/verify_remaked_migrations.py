@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import subprocess
+from argparse import ArgumentParser
+from typing import Any
+
+from django.apps import apps
+from django.core.management import BaseCommand, CommandError
+from django.db.migrations.loader import MigrationLoader
+
+from django_remake_migrations.conf import app_settings
+from django_remake_migrations.steps import is_first_party, validate_app_labels
+from django_remake_migrations.verify import (
+    compare_schemas,
+    old_migration_sources,
+    old_migrations_loader,
+    schema_differences,
+)
+
+
+class Command(BaseCommand):
+    """
+    Command to check that the remade migrations create the same schema as the old.
+
+    Two fresh databases are migrated in parallel, one with the old migrations
+    and one with the remade migrations, and their tables, columns, indexes
+    and constraints are compared. The databases are configured with
+    ``REMAKE_MIGRATIONS_VERIFY_DATABASES``, in-memory SQLite by default.
+    """
+
+    help = (
+        "Compare the database schemas created by the old and the remade "
+        "migrations of first party apps."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        """Add command arguments."""
+        parser.add_argument(
+            "args",
+            metavar="app_label",
+            nargs="*",
+            help="Only use the old migrations of the given apps.",
+        )
+        parser.add_argument(
+            "--old-ref",
+            dest="old_ref",
+            help=(
+                "Git reference where to read the old migrations. Defaults to "
+                "the old migrations kept with --keep-old-migrations."
+            ),
+        )
+
+    def handle(
+        self,
+        *app_labels: str,
+        old_ref: str | None = None,
+        **options: Any,
+    ) -> None:
+        """Command entry point."""
+        app_labels = tuple(
+            validate_app_labels(app_labels)
+            or (
+                app_config.label
+                for app_config in apps.get_app_configs()
+                if is_first_party(app_config)
+            )
+        )
+        try:
+            sources = old_migration_sources(app_labels, ref=old_ref)
+        except subprocess.CalledProcessError as exc:
+            raise CommandError(
+                f"Can't read the migrations at {old_ref}: {exc.stderr.strip()}"
+            ) from exc
+        if not sources:
+            raise CommandError(
+                "No old migrations found. Give a git reference with --old-ref, "
+                "or keep the old migrations with --keep-old-migrations."
+            )
+
+        self.log_info("Migrating the old and remade migrations...")
+        new_loader = MigrationLoader(None, ignore_no_migrations=True)
+        with old_migrations_loader(sources) as old_loader:
+            old_schema, new_schema = compare_schemas(
+                app_settings.REMAKE_MIGRATIONS_VERIFY_DATABASES,
+                old_loader,
+                new_loader,
+            )
+
+        differences = schema_differences(old_schema, new_schema)
+        if not differences:
+            self.log_info("No schema differences found.")
+            return
+        for difference in differences:
+            self.stdout.write(difference)
+        raise CommandError(f"Found {len(differences)} schema difference(s).")
+
+    def log_info(self, message: str) -> None:
+        """Wrapper to help logging successes."""
+        self.stdout.write(self.style.SUCCESS(message))
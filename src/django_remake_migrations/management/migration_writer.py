@@ -1,12 +1,48 @@
 from __future__ import annotations
 
-from django.db.migrations.writer import MigrationWriter
+import datetime as dt
+import io
+import re
+import shutil
+import tempfile
+from collections.abc import Sequence
+from typing import Any, TextIO
+
+from django import get_version
+from django.db.migrations import Migration
+from django.db.migrations.writer import MigrationWriter, OperationWriter
+from django.utils.timezone import now
+
+HEADER_PREFIX = "# Generated by Django "
+
+REPLACES_MODULE_NAME = "_replaced"
+"""
+Module holding the list of replaced migrations, shared by the migrations of an app.
+
+Django ignores modules starting with an underscore when loading migrations.
+"""
+
+
+def render_replaces_module(replaces: Sequence[tuple[str, str]]) -> str:
+    """Render the module holding the list of replaced migrations of an app."""
+    items = "".join(f"    {replaced!r},\n" for replaced in replaces)
+    return (
+        '"""Migrations replaced by the remade migrations of this app."""\n\n'
+        f"REPLACED = [\n{items}]\n"
+    )
 
 
 class CustomMigrationWriter(MigrationWriter):
     """
     Custom MigrationWriter which adds support for ``run_before``.
 
+    It can also import ``replaces`` from the module generated next to the
+    migrations, rather than repeating the list in each migration.
+
+    The migration can be streamed to a file, operation by operation, to avoid
+    holding several copies of very large migrations in memory. The output is
+    the same as Django's ``MigrationWriter``, with the extra attributes.
+
     There's a ticket and a PR in Django itself to add support for this.
     If that's merged in and released, we can remove this subclass when
     new versions of Django are installed.
@@ -14,13 +50,129 @@ class CustomMigrationWriter(MigrationWriter):
     - https://github.com/django/django/pull/19303.
     """
 
+    include_header: bool
+
+    def __init__(
+        self,
+        migration: Migration,
+        *args: Any,
+        replaces_module: str | None = None,
+        generated_on: dt.date | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(migration, *args, **kwargs)
+        self.replaces_module = replaces_module
+        self.generated_on = generated_on
+
     def as_string(self) -> str:
-        """Add run_before if available."""
-        text = super().as_string()
-        if self.migration.run_before:
-            run_before_string = f"run_before = {self.migration.run_before}"
-            text = text.replace(
-                "class Migration(migrations.Migration):",
-                f"class Migration(migrations.Migration):\n    {run_before_string}",
+        """Return a string of the file contents."""
+        output = io.StringIO()
+        self.write(output)
+        return output.getvalue()
+
+    def write(self, fh: TextIO) -> None:
+        """
+        Write the file contents to the file handle.
+
+        Operations are serialized one by one to a temporary file, as the
+        imports they need are written before them.
+        """
+        imports: set[str] = set()
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as operations:
+            for operation in self.migration.operations:
+                operation_string, operation_imports = OperationWriter(
+                    operation
+                ).serialize()
+                imports.update(operation_imports)
+                operations.write(f"{operation_string}\n")
+            dependencies = self.dependency_lines(imports)
+
+            fh.write(self.header())
+            fh.write(self.imports(imports))
+            fh.write("\n\nclass Migration(migrations.Migration):\n")
+            fh.write(self.class_attributes())
+            fh.write("\n    dependencies = [\n")
+            fh.writelines(f"{line}\n" for line in dependencies)
+            fh.write("    ]\n\n    operations = [\n")
+            operations.seek(0)
+            shutil.copyfileobj(operations, fh)
+            fh.write("    ]\n")
+
+    def header(self) -> str:
+        """
+        Comment at the top of the file.
+
+        The date is the given one, if any, for the output to only depend
+        on the inputs.
+        """
+        if not self.include_header:
+            return ""
+        if self.generated_on is not None:
+            timestamp = f"{self.generated_on:%Y-%m-%d} 00:00"
+        else:
+            timestamp = now().strftime("%Y-%m-%d %H:%M")
+        return f"{HEADER_PREFIX}{get_version()} on {timestamp}\n\n"
+
+    def dependency_lines(self, imports: set[str]) -> list[str]:
+        """Lines of the dependencies, adding the imports they need."""
+        dependencies = []
+        for dependency in self.migration.dependencies:
+            if dependency[0] == "__setting__":
+                dependencies.append(
+                    "        migrations.swappable_dependency("
+                    f"settings.{dependency[1]}),"
+                )
+                imports.add("from django.conf import settings")
+            else:
+                dependencies.append(f"        {self.serialize(dependency)[0]},")
+        return sorted(dependencies)
+
+    def imports(self, imports: set[str]) -> str:
+        """
+        Import statements, sorted like Django does.
+
+        Imports of functions from other migrations are swapped for comments.
+        """
+        imports = set(imports)
+        migration_imports = set()
+        for line in list(imports):
+            if re.match(r"^import (.*)\.\d+[^\s]*$", line):
+                migration_imports.add(line.split("import")[1].strip())
+                imports.remove(line)
+                self.needs_manual_porting = True
+
+        # django.db.migrations is always used, but models import may not be.
+        if "from django.db import models" in imports:
+            imports.discard("from django.db import models")
+            imports.add("from django.db import migrations, models")
+        else:
+            imports.add("from django.db import migrations")
+        sorted_imports = sorted(
+            imports, key=lambda i: (i.split()[0] == "from", i.split()[1])
+        )
+        if self.replaces_module and self.migration.replaces:
+            sorted_imports.append(f"from . import {self.replaces_module}")
+        text = "\n".join(sorted_imports) + "\n"
+        if migration_imports:
+            text += (
+                "\n\n# Functions from the following migrations need manual "
+                "copying.\n# Move them and any dependencies into this file, "
+                "then update the\n# RunPython operations to refer to the local "
+                "versions:\n# {}".format("\n# ".join(sorted(migration_imports)))
             )
         return text
+
+    def class_attributes(self) -> str:
+        """Attributes of the migration class, before its dependencies."""
+        text = ""
+        if self.migration.run_before:
+            text += f"    run_before = {self.migration.run_before}\n"
+        if self.migration.replaces:
+            if self.replaces_module:
+                replaces_string = f"{self.replaces_module}.REPLACED"
+            else:
+                replaces_string = self.serialize(self.migration.replaces)[0]
+            text += f"\n    replaces = {replaces_string}\n"
+        if self.migration.initial:
+            text += "\n    initial = True\n"
+        return text
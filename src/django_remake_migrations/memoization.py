@@ -0,0 +1,139 @@
+"""
+Memoize the deconstruction and serialization of fields during a remake.
+
+Each ``makemigrations`` run builds the state of every model, cloning each
+field with ``Field.clone()``, which calls ``deconstruct()``. The
+autodetector then deconstructs the fields of the states to compare them,
+and the writer deconstructs them again to serialize them. Fields with
+expensive ``deconstruct()`` methods, or huge ``choices``, are deconstructed
+many times for the same result.
+
+While memoizing, these Django internals are wrapped to cache their results
+for the fields of the installed models:
+
+- ``Field.clone``, which reuses the result of ``deconstruct()``;
+- ``MigrationAutodetector.deep_deconstruct``;
+- ``ModelFieldSerializer.serialize``.
+
+The results are keyed by the identity of the model field. Clones are keyed
+by the model field they were cloned from, since a field deconstructs to the
+arguments it was built with. Other fields, like those of the migrations
+operations, aren't cached: they can be altered while applying operations.
+
+The cached fields are kept alive by the cache, so that their identity isn't
+reused by another field during the run, and the cache is dropped at the end
+of the block.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from django.apps import apps
+from django.db import models
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.serializer import ModelFieldSerializer
+
+from django_remake_migrations.patching import wrapped_method
+
+Result = TypeVar("Result")
+
+
+@dataclass
+class CacheCounters:
+    """Hits and misses of a memoized function."""
+
+    hits: int = 0
+    misses: int = 0
+
+
+class FieldMemo:
+    """Cache of the deconstructed and serialized fields, by field identity."""
+
+    def __init__(self) -> None:
+        self.counters: dict[str, CacheCounters] = {
+            "deconstruct": CacheCounters(),
+            "deep_deconstruct": CacheCounters(),
+            "serialize": CacheCounters(),
+        }
+        """Counters by memoized function."""
+
+    @contextmanager
+    def memoize(self) -> Generator[FieldMemo, None, None]:
+        """Memoize the deconstruction and serialization of fields in the block."""
+        # Model field of each known field, with the field to keep it alive
+        origins: dict[int, tuple[models.Field[Any, Any], models.Field[Any, Any]]] = {}
+        caches: dict[str, dict[int, Any]] = {name: {} for name in self.counters}
+        counters = self.counters
+
+        def origin_of(field: models.Field[Any, Any]) -> models.Field[Any, Any] | None:
+            known = origins.get(id(field))
+            if known is not None:
+                return known[1]
+            model = getattr(field, "model", None)
+            if not (
+                isinstance(model, type)
+                and issubclass(model, models.Model)
+                and model._meta.apps is apps
+            ):
+                return None
+            origins[id(field)] = (field, field)
+            return field
+
+        def cached(
+            name: str, origin: models.Field[Any, Any], compute: Callable[[], Result]
+        ) -> Result:
+            cache = caches[name]
+            if id(origin) in cache:
+                counters[name].hits += 1
+                return cache[id(origin)]
+            counters[name].misses += 1
+            result = cache[id(origin)] = compute()
+            return result
+
+        def wrap_clone(original: Any) -> Any:
+            def clone(self: models.Field[Any, Any]) -> models.Field[Any, Any]:
+                origin = origin_of(self)
+                if origin is None:
+                    return original(self)
+                _, _, args, kwargs = cached("deconstruct", origin, origin.deconstruct)
+                field = self.__class__(*args, **kwargs)
+                origins[id(field)] = (field, origin)
+                return field
+
+            return clone
+
+        def wrap_deep_deconstruct(original: Any) -> Any:
+            def deep_deconstruct(self: MigrationAutodetector, obj: Any) -> Any:
+                origin = origin_of(obj) if isinstance(obj, models.Field) else None
+                if origin is None:
+                    return original(self, obj)
+                path, args, kwargs = cached(
+                    "deep_deconstruct", origin, lambda: original(self, obj)
+                )
+                # The autodetector pops and replaces top-level kwargs
+                return (path, list(args), dict(kwargs))
+
+            return deep_deconstruct
+
+        def wrap_field_serialize(original: Any) -> Any:
+            def serialize(self: ModelFieldSerializer) -> Any:
+                origin = origin_of(self.value)
+                if origin is None:
+                    return original(self)
+                string, imports = cached("serialize", origin, lambda: original(self))
+                return string, set(imports)
+
+            return serialize
+
+        with (
+            wrapped_method(models.Field, "clone", wrap_clone),
+            wrapped_method(
+                MigrationAutodetector, "deep_deconstruct", wrap_deep_deconstruct
+            ),
+            wrapped_method(ModelFieldSerializer, "serialize", wrap_field_serialize),
+        ):
+            yield self
@@ -0,0 +1,274 @@
+"""
+Remake the migrations of several Django projects sharing apps.
+
+In a monorepo, the same apps may be installed in several projects, each
+one with its own settings module. Django can only be set up once per
+process, so each project is handled in its own worker process::
+
+    python -m django_remake_migrations.multi project_a.settings project_b.settings
+
+A first pass finds the migrations packages of the first party apps of each
+project. Each package is then remade by a single project: the projects run
+in waves, and the projects of a wave remake disjoint sets of packages, in
+parallel. A package shared between projects is remade once, the other
+projects remake their remaining apps in a later wave, once the shared
+migrations have their ``replaces`` set.
+
+Any other argument is passed to ``remakemigrations``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from io import StringIO
+from pathlib import Path
+
+
+@dataclass
+class ProjectRun:
+    """Result of running ``remakemigrations`` for a settings module."""
+
+    settings_module: str
+    app_labels: list[str]
+    output: str = ""
+    errors: str = ""
+    duration: float = 0.0
+    success: bool = True
+
+
+@dataclass
+class RemakePlan:
+    """Apps to remake for each settings module, grouped in waves."""
+
+    waves: list[dict[str, list[str]]] = field(default_factory=list)
+    """For each wave, the apps to remake for each settings module."""
+
+    shared_packages: list[str] = field(default_factory=list)
+    """Migrations packages installed in more than one project."""
+
+
+def _setup_django(settings_module: str) -> None:
+    os.environ["DJANGO_SETTINGS_MODULE"] = settings_module
+    import django
+
+    django.setup()
+
+
+def discover_packages(settings_module: str) -> dict[str, str]:
+    """
+    Find the migrations packages of the first party apps of a project.
+
+    Runs in a worker process, with Django set up for the given settings.
+    Apps without models nor migrations are skipped.
+
+    Returns:
+        A mapping of each migrations package path to the label of its app.
+
+    """
+    _setup_django(settings_module)
+    from django.apps import apps
+    from django.db.migrations.loader import MigrationLoader
+
+    from django_remake_migrations.disk import migrations_package
+    from django_remake_migrations.steps import is_first_party
+
+    packages = {}
+    for app_config in apps.get_app_configs():
+        if not is_first_party(app_config):
+            continue
+        module = migrations_package(app_config.label)
+        if module is not None:
+            package = str(Path(next(iter(module.__path__))).resolve())
+        elif any(app_config.get_models()):
+            # Not created yet, identified by its module name
+            module_name, _ = MigrationLoader.migrations_module(app_config.label)
+            package = str(module_name)
+        else:
+            continue
+        packages[package] = app_config.label
+    return packages
+
+
+def plan_remake(packages: dict[str, dict[str, str]]) -> RemakePlan:
+    """
+    Assign each migrations package to a single project and group runs in waves.
+
+    Projects are considered in the given order: a project joins a wave if
+    none of the packages it still has to remake are remade by another
+    project of the wave.
+
+    Args:
+        packages: the migrations packages of each settings module, as
+            returned by ``discover_packages``, in order of priority.
+
+    """
+    counts = Counter(
+        package
+        for project_packages in packages.values()
+        for package in project_packages
+    )
+    plan = RemakePlan(
+        shared_packages=sorted(
+            package for package, count in counts.items() if count > 1
+        )
+    )
+
+    done: set[str] = set()
+    pending = dict(packages)
+    while pending:
+        wave: dict[str, list[str]] = {}
+        claimed: set[str] = set()
+        for settings_module, project_packages in list(pending.items()):
+            remaining = set(project_packages) - done
+            if not remaining:
+                # Everything was remade by other projects
+                del pending[settings_module]
+                continue
+            if remaining & claimed:
+                continue
+            claimed |= remaining
+            wave[settings_module] = sorted(
+                project_packages[package] for package in remaining
+            )
+            del pending[settings_module]
+        if wave:
+            plan.waves.append(wave)
+        done |= claimed
+    return plan
+
+
+def remake_project(
+    settings_module: str, app_labels: list[str], remake_args: list[str]
+) -> ProjectRun:
+    """
+    Run ``remakemigrations`` for the given apps of a project.
+
+    Runs in a worker process, with Django set up for the given settings.
+    Each project gets its own journal, next to the configured one.
+    """
+    _setup_django(settings_module)
+    from django.conf import settings
+    from django.core.management import call_command
+
+    from django_remake_migrations.conf import app_settings
+
+    journal_path = Path(app_settings.REMAKE_MIGRATIONS_JOURNAL_PATH)
+    settings.REMAKE_MIGRATIONS_JOURNAL_PATH = str(
+        journal_path.with_name(
+            f"{journal_path.stem}-{settings_module}{journal_path.suffix}"
+        )
+    )
+    run = ProjectRun(settings_module=settings_module, app_labels=app_labels)
+    stdout, stderr = StringIO(), StringIO()
+    start = time.perf_counter()
+    try:
+        call_command(
+            "remakemigrations",
+            *remake_args,
+            *app_labels,
+            stdout=stdout,
+            stderr=stderr,
+            no_color=True,
+        )
+    except Exception as exc:
+        stderr.write(f"{type(exc).__name__}: {exc}\n")
+        run.success = False
+    run.duration = time.perf_counter() - start
+    run.output = stdout.getvalue()
+    run.errors = stderr.getvalue()
+    return run
+
+
+def remake_projects(
+    settings_modules: Sequence[str],
+    remake_args: Sequence[str] = (),
+    jobs: int | None = None,
+) -> tuple[RemakePlan, list[ProjectRun]]:
+    """
+    Remake the migrations of several projects, in parallel worker processes.
+
+    Each task runs in a fresh process, since Django can only be set up once.
+    A wave only starts if all the runs of the previous one succeeded.
+    """
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes=jobs, maxtasksperchild=1) as pool:
+        packages = dict(
+            zip(
+                settings_modules,
+                pool.map(discover_packages, settings_modules, chunksize=1),
+                strict=True,
+            )
+        )
+        plan = plan_remake(packages)
+        runs: list[ProjectRun] = []
+        for wave in plan.waves:
+            wave_runs = pool.starmap(
+                remake_project,
+                [
+                    (settings_module, app_labels, list(remake_args))
+                    for settings_module, app_labels in wave.items()
+                ],
+                chunksize=1,
+            )
+            runs.extend(wave_runs)
+            if not all(run.success for run in wave_runs):
+                break
+    return plan, runs
+
+
+def render_report(plan: RemakePlan, runs: list[ProjectRun]) -> str:
+    """Combine the output of all the runs in a single report."""
+    lines = []
+    for run in runs:
+        status = "done" if run.success else "FAILED"
+        lines.append(
+            f"== {run.settings_module} ({', '.join(run.app_labels)}): "
+            f"{status} in {run.duration:.2f}s =="
+        )
+        lines.append(run.output.rstrip("\n"))
+        if run.errors:
+            lines.append(run.errors.rstrip("\n"))
+    app_count = sum(len(run.app_labels) for run in runs)
+    lines.append(
+        f"Remade {app_count} app(s) for {len(runs)} settings module(s) "
+        f"in {len(plan.waves)} wave(s), "
+        f"{len(plan.shared_packages)} shared app(s) remade once."
+    )
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m django_remake_migrations.multi",
+        description=(
+            "Remake the migrations of several projects sharing apps, "
+            "in parallel. Unknown arguments are passed to remakemigrations."
+        ),
+    )
+    parser.add_argument(
+        "settings_modules",
+        nargs="+",
+        help="Settings modules of the projects, shared apps go to the first one.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes. Defaults to the number of CPUs.",
+    )
+    args, remake_args = parser.parse_known_args(argv)
+    plan, runs = remake_projects(args.settings_modules, remake_args, args.jobs)
+    sys.stdout.write(render_report(plan, runs))
+    return 0 if all(run.success for run in runs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
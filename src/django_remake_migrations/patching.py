@@ -0,0 +1,55 @@
+"""
+Temporarily replace methods of Django internals.
+
+The profiling and the field memoization wrap methods of the autodetector,
+the serializers and the fields for the duration of a remake, and restore
+them afterwards. The ordered autodetector gives Django's autodetector the
+key to sort apps with.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Any
+
+
+@contextmanager
+def wrapped_method(
+    cls: type, name: str, wrapper: Callable[[Any], Any]
+) -> Generator[None, None, None]:
+    """
+    Replace a method of the class by a wrapper, within the block.
+
+    The wrapper is called with the original attribute, as found in the
+    class dictionary, and returns the replacement.
+    """
+    original = cls.__dict__[name]
+    setattr(cls, name, wrapper(original))
+    try:
+        yield
+    finally:
+        setattr(cls, name, original)
+
+
+@contextmanager
+def module_global(
+    module: ModuleType, name: str, value: Any
+) -> Generator[None, None, None]:
+    """
+    Define a global of the module within the block.
+
+    A global shadows the builtin of the same name for the functions of the
+    module. The previous global, if any, is restored afterwards.
+    """
+    missing = object()
+    original = module.__dict__.get(name, missing)
+    setattr(module, name, value)
+    try:
+        yield
+    finally:
+        if original is missing:
+            delattr(module, name)
+        else:
+            setattr(module, name, original)
@@ -0,0 +1,301 @@
+"""
+Plan the layout of the remade migrations.
+
+When there are circular references between apps, Django's autodetector
+splits some apps into several migrations. Because it has to pick an app to
+split without knowing about the other apps, it often splits more than
+necessary. The functions in this module rework the generated migrations
+to reduce the total number of migrations.
+"""
+
+from __future__ import annotations
+
+import itertools
+import math
+from collections import defaultdict
+from collections.abc import Iterable
+from graphlib import TopologicalSorter
+
+from django.db.migrations import Migration
+from django.db.migrations.optimizer import MigrationOptimizer
+
+MigrationKey = tuple[str, str]
+
+
+def _parents(migration: Migration, nodes: Iterable[MigrationKey]) -> set[MigrationKey]:
+    """Dependencies of the migration which are part of the given nodes."""
+    return set(migration.dependencies) & set(nodes)
+
+
+def _is_ancestor(
+    target: MigrationKey,
+    start: Iterable[MigrationKey],
+    migrations: dict[MigrationKey, Migration],
+) -> bool:
+    """Whether target can be reached by following dependencies from start."""
+    to_visit = list(start)
+    seen = set()
+    while to_visit:
+        key = to_visit.pop()
+        if key == target:
+            return True
+        if key in seen:
+            continue
+        seen.add(key)
+        to_visit.extend(_parents(migrations[key], migrations))
+    return False
+
+
+def _replace_dependency(
+    migrations: dict[MigrationKey, Migration],
+    old_key: MigrationKey,
+    new_key: MigrationKey,
+) -> None:
+    """Point dependencies on one migration to another one."""
+    for key, migration in migrations.items():
+        dependencies = [
+            new_key if dependency == old_key else dependency
+            for dependency in migration.dependencies
+        ]
+        # Drop self-references and duplicates, keeping the order
+        migration.dependencies = [  # type: ignore[misc]
+            dependency
+            for index, dependency in enumerate(dependencies)
+            if dependency != key and dependency not in dependencies[:index]
+        ]
+
+
+def merge_migrations(migrations: dict[MigrationKey, Migration]) -> list[MigrationKey]:
+    """
+    Merge consecutive migrations of the same app whenever possible.
+
+    Two consecutive migrations of an app can be merged if no other
+    migration needs to be applied between them, that is: if the second one
+    doesn't depend on the first one through a migration from another app.
+    The operations of the merged migration are optimized, which turns the
+    deferred ``AddField`` operations back into ``CreateModel`` fields.
+
+    The given mapping is updated in place, merged migrations are removed
+    from it and the dependencies on them are updated.
+
+    Returns:
+        The keys of the migrations which were merged into another one.
+
+    """
+    by_app: dict[str, list[MigrationKey]] = defaultdict(list)
+    for key in sorted(migrations):
+        by_app[key[0]].append(key)
+
+    merged = []
+    for app_label, keys in by_app.items():
+        current = keys[0]
+        for next_key in keys[1:]:
+            next_migration = migrations[next_key]
+            other_parents = _parents(next_migration, migrations) - {current}
+            if _is_ancestor(current, other_parents, migrations):
+                # Something from another app needs to go in between
+                current = next_key
+                continue
+
+            current_migration = migrations[current]
+            current_migration.operations = MigrationOptimizer().optimize(  # type: ignore[misc]
+                [*current_migration.operations, *next_migration.operations],
+                app_label,
+            )
+            current_migration.dependencies = [  # type: ignore[misc]
+                *current_migration.dependencies,
+                *next_migration.dependencies,
+            ]
+            del migrations[next_key]
+            _replace_dependency(migrations, next_key, current)
+            merged.append(next_key)
+    return merged
+
+
+def renumber_migrations(
+    migrations: dict[MigrationKey, Migration],
+) -> dict[MigrationKey, MigrationKey]:
+    """
+    Renumber the migrations of each app to have consecutive numbers.
+
+    The given mapping is updated in place, as well as the dependencies.
+
+    Returns:
+        A mapping of the old keys to the new keys, for renamed migrations.
+
+    """
+    by_app: dict[str, list[MigrationKey]] = defaultdict(list)
+    for key in sorted(migrations):
+        by_app[key[0]].append(key)
+
+    renamed = {}
+    for app_label, keys in by_app.items():
+        for number, key in enumerate(keys, start=1):
+            _, suffix = key[1].split("_", 1)
+            new_name = f"{number:04d}_{suffix}"
+            if new_name != key[1]:
+                renamed[key] = (app_label, new_name)
+
+    renamed_migrations = {
+        new_key: migrations.pop(old_key) for old_key, new_key in renamed.items()
+    }
+    for new_key, migration in renamed_migrations.items():
+        migration.name = new_key[1]
+    migrations.update(renamed_migrations)
+    for migration in migrations.values():
+        migration.dependencies = [  # type: ignore[misc]
+            renamed.get(dependency, dependency) for dependency in migration.dependencies
+        ]
+    return renamed
+
+
+def _part_counts(
+    operation_counts: dict[MigrationKey, int],
+    max_operations: int,
+    max_migrations: int | None,
+) -> dict[MigrationKey, int]:
+    """
+    Number of parts of each migration of an app.
+
+    Each migration is split into parts of at most ``max_operations``
+    operations. When that makes more than ``max_migrations`` migrations in
+    the app, the extra parts go to the migrations with the most operations
+    per part, and some parts get more operations.
+    """
+    wanted = {
+        key: max(1, math.ceil(count / max_operations))
+        for key, count in operation_counts.items()
+    }
+    if max_migrations is None or sum(wanted.values()) <= max_migrations:
+        return wanted
+
+    counts = dict.fromkeys(operation_counts, 1)
+    for _ in range(max_migrations - len(counts)):
+        key = max(
+            (key for key in counts if counts[key] < wanted[key]),
+            key=lambda key: operation_counts[key] / counts[key],
+        )
+        counts[key] += 1
+    return counts
+
+
+def split_migrations(
+    migrations: dict[MigrationKey, Migration],
+    max_operations: int,
+    max_migrations: dict[str, int] | None = None,
+) -> dict[MigrationKey, list[MigrationKey]]:
+    """
+    Split the migrations with too many operations into a chain of migrations.
+
+    Operations keep their order, each part of the chain depends on the
+    previous one, so any boundary between operations is safe. The first part
+    keeps the dependencies of the migration, and the migrations depending on
+    it now depend on the last part. The migrations of the apps with a split
+    migration are renumbered, to keep consecutive numbers.
+
+    The number of migrations of an app can be limited with
+    ``max_migrations``, by app label: the migrations are then split into
+    fewer parts, with more operations.
+
+    The given mapping is updated in place, as well as the dependencies.
+
+    Returns:
+        A mapping of the old key of each migration of the affected apps to
+        the keys of its parts, in order.
+
+    """
+    by_app: dict[str, list[MigrationKey]] = defaultdict(list)
+    for key in sorted(migrations):
+        by_app[key[0]].append(key)
+
+    # Name the parts of each migration of the affected apps
+    parts: dict[MigrationKey, list[MigrationKey]] = {}
+    for app_label, keys in by_app.items():
+        counts = _part_counts(
+            {key: len(migrations[key].operations) for key in keys},
+            max_operations,
+            (max_migrations or {}).get(app_label),
+        )
+        if all(count == 1 for count in counts.values()):
+            continue
+        numbers = itertools.count(1)
+        for key in keys:
+            _, suffix = key[1].split("_", 1)
+            parts[key] = [
+                (app_label, f"{next(numbers):04d}_{suffix}") for _ in range(counts[key])
+            ]
+
+    last_parts = {key: key_parts[-1] for key, key_parts in parts.items()}
+    for migration in migrations.values():
+        migration.dependencies = [  # type: ignore[misc]
+            last_parts.get(dependency, dependency)
+            for dependency in migration.dependencies
+        ]
+
+    split = {key: migrations.pop(key) for key in parts}
+    for key, migration in split.items():
+        operations = migration.operations
+        size = max(max_operations, math.ceil(len(operations) / len(parts[key])))
+        for index, part_key in enumerate(parts[key]):
+            if index == 0:
+                part = migration
+                part.name = part_key[1]
+            else:
+                part = Migration(part_key[1], part_key[0])
+                part.dependencies = [parts[key][index - 1]]  # type: ignore[misc]
+            part.operations = operations[index * size : (index + 1) * size]  # type: ignore[misc]
+            migrations[part_key] = part
+    return parts
+
+
+def reduce_dependencies(
+    migrations: dict[MigrationKey, Migration],
+) -> list[tuple[MigrationKey, MigrationKey]]:
+    """
+    Drop the dependencies on other apps implied by other dependencies.
+
+    The autodetector makes each migration depend on the latest migration of
+    every app it references, even when another dependency already depends on
+    it. Only the dependencies between the given migrations are considered:
+    swappable and third party dependencies are kept, and so are the
+    dependencies within an app, which Django needs to find the first and
+    last migrations of each app.
+
+    The dependencies are updated in place.
+
+    Returns:
+        The removed dependencies, as pairs of the migration and its former
+        dependency.
+
+    """
+    # Ancestors of each migration, parents first
+    ancestors: dict[MigrationKey, set[MigrationKey]] = {}
+    graph = {
+        key: _parents(migration, migrations) for key, migration in migrations.items()
+    }
+    for key in TopologicalSorter(graph).static_order():
+        ancestors[key] = set(graph[key])
+        for parent in graph[key]:
+            ancestors[key] |= ancestors[parent]
+
+    removed = []
+    for key, migration in migrations.items():
+        redundant = {
+            dependency
+            for dependency in graph[key]
+            if dependency[0] != key[0]
+            and any(
+                dependency in ancestors[parent]
+                for parent in graph[key]
+                if parent != dependency
+            )
+        }
+        if not redundant:
+            continue
+        migration.dependencies = [  # type: ignore[misc]
+            dependency
+            for dependency in migration.dependencies
+            if dependency not in redundant
+        ]
+        removed += [(key, dependency) for dependency in sorted(redundant)]
+    return removed
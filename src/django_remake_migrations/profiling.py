@@ -0,0 +1,238 @@
+"""
+Attribute the time spent generating migrations to apps, models and fields.
+
+Phase timings don't tell which models make a remake slow. Most of the time
+is usually spent deconstructing fields: to build the state of each model
+from the models for the autodetector, to compare fields, and to serialize
+them in migration files. A few models with huge ``choices``, many
+constraints or expensive ``deconstruct()`` methods can dominate.
+
+While profiling, these Django internals are wrapped to record their time:
+
+- ``ModelState.from_model``, for each model, in the autodetector time;
+- ``MigrationAutodetector.deep_deconstruct``, for each field class, in the
+  autodetector time;
+- ``OperationWriter.serialize``, for the model of each operation, in the
+  serialization time;
+- ``ModelFieldSerializer.serialize``, for each field class, in the
+  serialization time.
+
+Nested calls are only counted once, in the outermost call. The report also
+shows the hits and misses of the field memoization, if enabled.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import defaultdict
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any
+
+from django.db import models
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.serializer import ModelFieldSerializer
+from django.db.migrations.state import ModelState
+from django.db.migrations.writer import MigrationWriter, OperationWriter
+
+from django_remake_migrations.patching import wrapped_method
+
+if TYPE_CHECKING:
+    from django_remake_migrations.memoization import CacheCounters
+
+
+@dataclass
+class ProfileEntry:
+    """Time attributed to an app, a model or a field class, in seconds."""
+
+    calls: int = 0
+    autodetector_time: float = 0.0
+    serialization_time: float = 0.0
+
+    @property
+    def total_time(self) -> float:
+        """Time spent in the autodetector and serializing."""
+        return self.autodetector_time + self.serialization_time
+
+
+def _field_class(field: models.Field[Any, Any]) -> str:
+    field_class = type(field)
+    return f"{field_class.__module__}.{field_class.__qualname__}"
+
+
+class MigrationProfiler:
+    """Record the time spent on each model and field class."""
+
+    def __init__(self) -> None:
+        self.models: dict[str, ProfileEntry] = defaultdict(ProfileEntry)
+        """Entries by model label, in lower case."""
+
+        self.field_classes: dict[str, ProfileEntry] = defaultdict(ProfileEntry)
+        """Entries by dotted path of the field class."""
+
+        self.app_label = ""
+        """App of the migration being serialized."""
+
+        self._depth: dict[str, int] = defaultdict(int)
+
+    @property
+    def apps(self) -> dict[str, ProfileEntry]:
+        """Entries by app label, adding up the entries of their models."""
+        apps: dict[str, ProfileEntry] = defaultdict(ProfileEntry)
+        for model_label, entry in self.models.items():
+            app_entry = apps[model_label.split(".", 1)[0]]
+            app_entry.calls += entry.calls
+            app_entry.autodetector_time += entry.autodetector_time
+            app_entry.serialization_time += entry.serialization_time
+        return dict(apps)
+
+    @contextmanager
+    def timed(
+        self, kind: str, entry: ProfileEntry | None, attribute: str
+    ) -> Generator[None, None, None]:
+        """Add the time of the block to the entry, unless nested in the same kind."""
+        self._depth[kind] += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth[kind] -= 1
+            if entry is not None and not self._depth[kind]:
+                entry.calls += 1
+                setattr(
+                    entry,
+                    attribute,
+                    getattr(entry, attribute) + time.perf_counter() - start,
+                )
+
+    @contextmanager
+    def profile(self) -> Generator[MigrationProfiler, None, None]:
+        """Record the time spent generating migrations within the block."""
+        profiler = self
+
+        def wrap_from_model(original: Any) -> Any:
+            def from_model(
+                cls: type[ModelState],
+                model: type[models.Model],
+                *args: Any,
+                **kwargs: Any,
+            ) -> ModelState:
+                entry = profiler.models[model._meta.label_lower]
+                with profiler.timed("model", entry, "autodetector_time"):
+                    return original.__func__(cls, model, *args, **kwargs)
+
+            return classmethod(from_model)
+
+        def wrap_deep_deconstruct(original: Any) -> Any:
+            def deep_deconstruct(self: MigrationAutodetector, obj: Any) -> Any:
+                entry = (
+                    profiler.field_classes[_field_class(obj)]
+                    if isinstance(obj, models.Field)
+                    else None
+                )
+                with profiler.timed("deconstruct", entry, "autodetector_time"):
+                    return original(self, obj)
+
+            return deep_deconstruct
+
+        def wrap_operation_serialize(original: Any) -> Any:
+            def serialize(self: OperationWriter) -> Any:
+                operation = self.operation
+                model_name = getattr(operation, "model_name", None) or getattr(
+                    operation, "name", None
+                )
+                entry = (
+                    profiler.models[f"{profiler.app_label}.{model_name.lower()}"]
+                    if isinstance(model_name, str) and profiler.app_label
+                    else None
+                )
+                with profiler.timed("operation", entry, "serialization_time"):
+                    return original(self)
+
+            return serialize
+
+        def wrap_field_serialize(original: Any) -> Any:
+            def serialize(self: ModelFieldSerializer) -> Any:
+                entry = profiler.field_classes[_field_class(self.value)]
+                with profiler.timed("field", entry, "serialization_time"):
+                    return original(self)
+
+            return serialize
+
+        def wrap_writer_init(original: Any) -> Any:
+            def __init__(
+                self: MigrationWriter, migration: Any, *args: Any, **kwargs: Any
+            ) -> None:
+                original(self, migration, *args, **kwargs)
+                profiler.app_label = migration.app_label
+
+            return __init__
+
+        with (
+            wrapped_method(ModelState, "from_model", wrap_from_model),
+            wrapped_method(
+                MigrationAutodetector, "deep_deconstruct", wrap_deep_deconstruct
+            ),
+            wrapped_method(OperationWriter, "serialize", wrap_operation_serialize),
+            wrapped_method(ModelFieldSerializer, "serialize", wrap_field_serialize),
+            wrapped_method(MigrationWriter, "__init__", wrap_writer_init),
+        ):
+            yield self
+
+
+def _sorted_entries(entries: dict[str, ProfileEntry]) -> list[tuple[str, ProfileEntry]]:
+    return sorted(entries.items(), key=lambda item: (-item[1].total_time, item[0]))
+
+
+def render_profile_markdown(
+    profiler: MigrationProfiler, cache_counters: dict[str, CacheCounters] | None = None
+) -> str:
+    """Render the profile as Markdown tables, the slowest first."""
+    lines: list[str] = []
+    for title, entries in [
+        ("App", profiler.apps),
+        ("Model", profiler.models),
+        ("Field class", profiler.field_classes),
+    ]:
+        if lines:
+            lines.append("")
+        lines += [
+            f"| {title} | Calls | Autodetector (s) | Serialization (s) | Total (s) |",
+            "| --- | ---: | ---: | ---: | ---: |",
+        ]
+        lines += [
+            f"| {name} | {entry.calls} | {entry.autodetector_time:.3f} "
+            f"| {entry.serialization_time:.3f} | {entry.total_time:.3f} |"
+            for name, entry in _sorted_entries(entries)
+        ]
+    if cache_counters:
+        lines += ["", "| Cache | Hits | Misses |", "| --- | ---: | ---: |"]
+        lines += [
+            f"| {name} | {counters.hits} | {counters.misses} |"
+            for name, counters in cache_counters.items()
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def render_profile_json(
+    profiler: MigrationProfiler, cache_counters: dict[str, CacheCounters] | None = None
+) -> str:
+    """Render the profile as JSON, the slowest first."""
+    report: dict[str, Any] = {
+        key: [
+            {"name": name, **asdict(entry), "total_time": entry.total_time}
+            for name, entry in _sorted_entries(entries)
+        ]
+        for key, entries in [
+            ("apps", profiler.apps),
+            ("models", profiler.models),
+            ("field_classes", profiler.field_classes),
+        ]
+    }
+    if cache_counters:
+        report["cache"] = {
+            name: asdict(counters) for name, counters in cache_counters.items()
+        }
+    return json.dumps(report, indent=2)
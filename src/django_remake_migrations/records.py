@@ -0,0 +1,151 @@
+"""
+Maintain the rows of the ``django_migrations`` table of each database.
+
+Once the replaced migrations are deleted and the ``replaces`` of the remade
+migrations cleared, their rows stay in the table of every database, and
+Django loads all of them each time it builds the migration plan. The rows of
+migrations which aren't on the disk anymore are deleted in batches, per app,
+in a transaction per database.
+
+The other way around, Django records the remade migrations one at a time
+during ``migrate``, on databases where the migrations they replace are
+applied. They can be recorded in bulk instead, with a single insert per
+database.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+
+from django.db import transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.migrations.exceptions import InconsistentMigrationHistory
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+
+PRUNE_BATCH_SIZE = 500
+
+MigrationKey = tuple[str, str]
+
+
+def stale_migration_records(
+    connection: BaseDatabaseWrapper,
+    loader: MigrationLoader,
+    app_labels: Iterable[str] | None = None,
+) -> dict[str, list[str]]:
+    """
+    Names of the migrations recorded as applied, but missing from the disk.
+
+    Only the apps with migrations are considered, the rows of apps which
+    aren't installed are kept. The rows of migrations replaced by a migration
+    on the disk are kept too, recorded or not: Django marks a replacing
+    migration as unapplied unless all the migrations it replaces are applied.
+    They become stale once its ``replaces`` is cleared.
+
+    Returns:
+        The names of the stale migrations, by app label.
+
+    """
+    recorder = MigrationRecorder(connection)
+    if not recorder.has_table():
+        return {}
+    applied = recorder.applied_migrations()
+    replaced_on_disk = {
+        tuple(replaced)
+        for migration in loader.disk_migrations.values()
+        for replaced in migration.replaces
+    }
+    selected_apps = set(app_labels or loader.migrated_apps) & loader.migrated_apps
+    stale: dict[str, list[str]] = defaultdict(list)
+    for key in sorted(applied):
+        app_label, migration_name = key
+        if (
+            app_label in selected_apps
+            and key not in loader.disk_migrations
+            and key not in replaced_on_disk
+        ):
+            stale[app_label].append(migration_name)
+    return dict(stale)
+
+
+def delete_migration_records(
+    connection: BaseDatabaseWrapper,
+    stale: dict[str, list[str]],
+    batch_size: int = PRUNE_BATCH_SIZE,
+) -> int:
+    """
+    Delete the given migration rows, in a single transaction.
+
+    Returns:
+        The number of deleted rows.
+
+    """
+    migration_qs = MigrationRecorder(connection).migration_qs
+    deleted = 0
+    with transaction.atomic(using=connection.alias):
+        for app_label, migration_names in stale.items():
+            for start in range(0, len(migration_names), batch_size):
+                count, _ = migration_qs.filter(
+                    app=app_label,
+                    name__in=migration_names[start : start + batch_size],
+                ).delete()
+                deleted += count
+    return deleted
+
+
+def unrecorded_replacements(
+    connection: BaseDatabaseWrapper,
+    loader: MigrationLoader,
+    app_labels: Iterable[str] | None = None,
+) -> list[MigrationKey]:
+    """
+    Replacing migrations not recorded yet, whose replaced migrations are applied.
+
+    Replacing migrations none of whose replaced migrations are applied are
+    left to ``migrate``.
+
+    Raises:
+        InconsistentMigrationHistory: if only some of the migrations replaced
+            by a migration are applied.
+
+    """
+    recorder = MigrationRecorder(connection)
+    if not recorder.has_table():
+        return []
+    applied = recorder.applied_migrations()
+    selected_apps = set(app_labels or ())
+    unrecorded = []
+    for key, migration in sorted(loader.disk_migrations.items()):
+        if (
+            not migration.replaces
+            or key in applied
+            or (selected_apps and key[0] not in selected_apps)
+        ):
+            continue
+        missing = [
+            tuple(replaced)
+            for replaced in migration.replaces
+            if tuple(replaced) not in applied
+        ]
+        if not missing:
+            unrecorded.append(key)
+        elif len(missing) < len(migration.replaces):
+            raise InconsistentMigrationHistory(
+                f"Migration {key[0]}.{key[1]} is partially applied on database "
+                f"{connection.alias!r}, these migrations aren't applied: "
+                + ", ".join(f"{app_label}.{name}" for app_label, name in missing)
+            )
+    return unrecorded
+
+
+def record_migrations(
+    connection: BaseDatabaseWrapper, keys: Iterable[MigrationKey]
+) -> None:
+    """Record the given migrations as applied, with a single insert."""
+    recorder = MigrationRecorder(connection)
+    with transaction.atomic(using=connection.alias):
+        recorder.migration_qs.bulk_create(
+            recorder.Migration(app=app_label, name=migration_name)
+            for app_label, migration_name in keys
+        )
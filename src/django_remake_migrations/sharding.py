@@ -0,0 +1,154 @@
+"""
+Generate the new migrations with the autodetector running in parallel.
+
+The apps are split into shards which don't reference each other, so the
+autodetector can run on each shard separately, in a worker process, with
+the same result as a single run on all the apps. The project states are
+computed once, before the worker processes are forked.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from django.apps import apps
+from django.db.migrations.graph import MigrationGraph
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.questioner import NonInteractiveMigrationQuestioner
+from django.db.migrations.state import ProjectState
+
+from django_remake_migrations.autodetector import (
+    OrderedMigrationAutodetector,
+    ordered_autodetector_class,
+)
+from django_remake_migrations.management.migration_writer import CustomMigrationWriter
+
+
+@dataclass(frozen=True)
+class _Detection:
+    """Everything the workers need, shared with them when forking."""
+
+    from_state: ProjectState
+    to_state: ProjectState
+    graph: MigrationGraph
+    sharded_apps: frozenset[str]
+    migration_name: str
+    app_order: Sequence[str]
+    convert_apps: frozenset[str]
+    autodetector_class: type[OrderedMigrationAutodetector]
+
+
+_detection: _Detection | None = None
+
+
+def _shard_state(
+    state: ProjectState, shard: set[str], excluded: frozenset[str]
+) -> ProjectState:
+    """Copy of the state with the models of the shard and the unsharded apps."""
+    return ProjectState(
+        models={
+            key: model_state
+            for key, model_state in state.models.items()
+            if key[0] in shard or key[0] not in excluded
+        },
+        real_apps=state.real_apps,
+    )
+
+
+def detect_shard(shard: Sequence[str], trim_to_apps: set[str]) -> list[tuple[str, str]]:
+    """
+    Run the autodetector on the models of a shard.
+
+    Returns:
+        The path and content of each new migration file.
+
+    """
+    if _detection is None:
+        raise RuntimeError("Shards are detected from generate_migrations_sharded()")
+    shard_apps = set(shard)
+    excluded = _detection.sharded_apps - shard_apps
+    autodetector = _detection.autodetector_class(
+        _shard_state(_detection.from_state, shard_apps, excluded),
+        _shard_state(_detection.to_state, shard_apps, excluded),
+        NonInteractiveMigrationQuestioner(
+            specified_apps=set(_detection.convert_apps), dry_run=False
+        ),
+        app_order=_detection.app_order,
+    )
+    changes = autodetector.changes(
+        graph=_detection.graph,
+        trim_to_apps=trim_to_apps,
+        convert_apps=set(_detection.convert_apps) or None,
+        migration_name=_detection.migration_name,
+    )
+    files = []
+    for app_migrations in changes.values():
+        for migration_obj in app_migrations:
+            writer = CustomMigrationWriter(migration_obj)
+            files.append((writer.path, writer.as_string()))
+    return files
+
+
+def generate_migrations_sharded(
+    migration_name: str,
+    shards: Sequence[Sequence[str]],
+    app_order: Sequence[str] = (),
+    app_labels: Sequence[str] = (),
+    jobs: int = 1,
+) -> list[tuple[str, str]]:
+    """
+    Detect the changes between the migrations on disk and the models, by shard.
+
+    Apps which aren't in any shard, like third party apps, are handled with
+    the first shard. Shards run in a pool of forked worker processes, or one
+    after the other if forking isn't available on the platform.
+
+    Returns:
+        The path and content of each new migration file.
+
+    """
+    global _detection
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    sharded_apps = frozenset(app_label for shard in shards for app_label in shard)
+    _detection = _Detection(
+        from_state=loader.project_state(),
+        to_state=ProjectState.from_apps(apps),
+        graph=loader.graph,
+        sharded_apps=sharded_apps,
+        migration_name=migration_name,
+        app_order=app_order,
+        convert_apps=frozenset(app_labels),
+        autodetector_class=ordered_autodetector_class(),
+    )
+    unsharded_apps = {
+        app_label
+        for app_label, _ in _detection.to_state.models
+        if app_label not in sharded_apps
+    }
+    tasks: list[tuple[Sequence[str], set[str]]] = []
+    for shard in shards:
+        trim_to_apps = set(shard) & set(app_labels) if app_labels else set(shard)
+        if trim_to_apps:
+            tasks.append((shard, trim_to_apps))
+    if not app_labels and unsharded_apps:
+        if tasks:
+            tasks[0][1].update(unsharded_apps)
+        else:
+            tasks.append(((), unsharded_apps))
+
+    try:
+        if jobs > 1 and len(tasks) > 1 and _can_fork():
+            context = multiprocessing.get_context("fork")
+            with context.Pool(processes=min(jobs, len(tasks))) as pool:
+                results = pool.starmap(detect_shard, tasks, chunksize=1)
+        else:
+            results = [detect_shard(*task) for task in tasks]
+    finally:
+        _detection = None
+    return [migration_file for files in results for migration_file in files]
+
+
+def _can_fork() -> bool:
+    return "fork" in multiprocessing.get_all_start_methods()
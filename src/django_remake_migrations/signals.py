@@ -0,0 +1,70 @@
+"""
+Signals sent while remaking migrations.
+
+They allow to instrument a remake or to extend it in-process, for example to
+profile each phase, to export metrics, or to transform the new migrations
+before they are written. All signals are sent with the
+``django_remake_migrations.steps.Remake`` class as ``sender``, and the
+running remake as ``remake``. Durations are in seconds.
+"""
+
+from __future__ import annotations
+
+from django.dispatch import Signal
+
+phase_started = Signal()
+"""
+Sent before running a phase of the remake.
+
+Arguments: ``remake``, ``phase`` (one of ``old``, ``make``, ``update``,
+``restore`` and ``post``).
+"""
+
+phase_finished = Signal()
+"""
+Sent after a phase of the remake completed.
+
+Arguments: ``remake``, ``phase``, ``duration``.
+"""
+
+old_migrations_collected = Signal()
+"""
+Sent once the old migrations are found, and removed or backed up.
+
+Arguments: ``remake``, ``old_migrations`` (mapping of app labels to the
+keys of their old migrations), ``duration``.
+"""
+
+migrations_generated = Signal()
+"""
+Sent once the autodetector generated the new migrations.
+
+Arguments: ``remake``, ``paths`` (paths of the written migration files),
+``duration``.
+"""
+
+pre_migration_write = Signal()
+"""
+Sent before writing a migration to the disk.
+
+Receivers may change the migration, the written file reflects their changes.
+
+Arguments: ``remake``, ``migration`` (``None`` for migrations rendered in a
+worker process, with ``--jobs``), ``path``.
+"""
+
+post_migration_write = Signal()
+"""
+Sent after writing a migration to the disk.
+
+Arguments: ``remake``, ``migration`` (``None`` for migrations rendered in a
+worker process, with ``--jobs``), ``path``, ``duration``.
+"""
+
+post_command_finished = Signal()
+"""
+Sent after running each command of ``REMAKE_MIGRATIONS_POST_COMMANDS``.
+
+Arguments: ``remake``, ``args`` (the command name and its arguments),
+``duration``.
+"""
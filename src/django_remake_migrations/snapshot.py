@@ -0,0 +1,96 @@
+"""
+Snapshot of the project state built by the migrations.
+
+``makemigrations --check`` imports all the migrations and replays their
+operations to build the project state, before comparing it with the models.
+After a remake, this state is saved to a file, along with a hash of the
+migration files. As long as the migration files don't change, the models
+can be compared with the snapshot directly, without loading the migrations.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.apps import apps
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.state import ProjectState
+
+from django_remake_migrations.cache import migrations_fingerprint, models_fingerprint
+from django_remake_migrations.disk import migrations_package
+
+
+def migrated_app_labels() -> list[str]:
+    """Labels of the installed apps with a migrations package."""
+    return sorted(
+        app_config.label
+        for app_config in apps.get_app_configs()
+        if migrations_package(app_config.label) is not None
+    )
+
+
+def migration_files_hash(app_labels: list[str]) -> str:
+    """Hash of the names and contents of the migration files of the apps."""
+    return hashlib.sha256(
+        json.dumps(migrations_fingerprint(app_labels)).encode("utf-8")
+    ).hexdigest()
+
+
+@dataclass
+class StateSnapshot:
+    """Project state built by the migrations, with the files it was built from."""
+
+    migrations_hash: str
+    """Hash of the migration files of the apps."""
+
+    app_labels: list[str] = field(default_factory=list)
+    """Apps with migrations."""
+
+    models: list[str] = field(default_factory=list)
+    """Canonical representation of the models of the apps."""
+
+    @classmethod
+    def from_migrations(cls) -> StateSnapshot:
+        """Build the project state from the migrations on the disk."""
+        app_labels = migrated_app_labels()
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        return cls(
+            migrations_hash=migration_files_hash(app_labels),
+            app_labels=app_labels,
+            models=models_fingerprint(loader.project_state(), app_labels),
+        )
+
+    def is_current(self) -> bool:
+        """Whether the migration files are the ones of the snapshot."""
+        app_labels = migrated_app_labels()
+        return (
+            app_labels == self.app_labels
+            and migration_files_hash(app_labels) == self.migrations_hash
+        )
+
+    def matches_models(self) -> bool:
+        """Whether the models are the same as in the snapshot."""
+        state = ProjectState.from_apps(apps)
+        return models_fingerprint(state, self.app_labels) == self.models
+
+    def save(self, path: Path) -> None:
+        """Write the snapshot to the given file."""
+        data = {
+            "migrations_hash": self.migrations_hash,
+            "app_labels": self.app_labels,
+            "models": self.models,
+        }
+        path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> StateSnapshot:
+        """Read the snapshot from the given file."""
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return cls(
+            migrations_hash=data["migrations_hash"],
+            app_labels=data["app_labels"],
+            models=data["models"],
+        )
@@ -0,0 +1,981 @@
+"""
+Remake the migrations of first party apps.
+
+A ``Remake`` runs the steps of a remake and keeps the state they share: the
+old migrations, the backed up files, the written files and the new
+migrations. The ``remake()`` function of the Python API chains the steps,
+and the ``remakemigrations`` command reports its result.
+"""
+
+from __future__ import annotations
+
+import gc
+import importlib
+import io
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Sequence
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import TextIO
+
+from django.apps import AppConfig, apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.core.management.base import OutputWrapper
+from django.core.management.color import Style, no_style
+from django.db.migrations import Migration
+from django.db.migrations.loader import MigrationLoader
+from django.test import override_settings
+from django.utils.module_loading import import_string
+
+from django_remake_migrations import signals
+from django_remake_migrations.app_graph import (
+    app_order,
+    build_app_graph,
+    connected_components,
+)
+from django_remake_migrations.autodetector import (
+    generate_migrations,
+    generate_squashed_base,
+)
+from django_remake_migrations.conf import app_settings
+from django_remake_migrations.disk import (
+    list_migration_names,
+    load_app_migrations,
+    migration_file_path,
+    migrations_package,
+    unload_app_migrations,
+    write_if_changed,
+)
+from django_remake_migrations.formatting import BlackFormatter, format_files
+from django_remake_migrations.journal import RemakeJournal
+from django_remake_migrations.management.migration_writer import (
+    REPLACES_MODULE_NAME,
+    CustomMigrationWriter,
+    render_replaces_module,
+)
+from django_remake_migrations.planner import (
+    merge_migrations,
+    reduce_dependencies,
+    renumber_migrations,
+    split_migrations,
+)
+from django_remake_migrations.sharding import generate_migrations_sharded
+from django_remake_migrations.snapshot import StateSnapshot
+from django_remake_migrations.window import rewrite_dependencies, select_window
+
+SIDE_BY_SIDE_SUFFIX = "_remade"
+"""Suffix of the packages where ``--side-by-side`` writes the new migrations."""
+
+MigrationKey = tuple[str, str]
+
+
+@dataclass
+class NewMigration:
+    """A migration created by a remake."""
+
+    app_label: str
+    name: str
+    path: Path
+
+    replaces: list[MigrationKey] = field(default_factory=list)
+    """Old migrations replaced by the migration."""
+
+
+def is_first_party(app_config: AppConfig) -> bool:
+    """Whether the app is part of the project, as opposed to an installed package."""
+    app_path = Path(app_config.path)
+    return (
+        "site-packages" not in app_path.parts and "dist-packages" not in app_path.parts
+    )
+
+
+def validate_app_labels(app_labels: Iterable[str]) -> list[str]:
+    """Check that the given app labels are installed."""
+    app_labels = list(app_labels)
+    for app_label in app_labels:
+        try:
+            apps.get_app_config(app_label)
+        except LookupError as exc:
+            raise CommandError(str(exc)) from exc
+    return app_labels
+
+
+def _output_wrapper(out: TextIO | OutputWrapper | None) -> OutputWrapper:
+    if isinstance(out, OutputWrapper):
+        return out
+    return OutputWrapper(out or io.StringIO())
+
+
+class Remake:
+    """
+    Steps of a remake, and the state they share.
+
+    Progress is written to ``stdout`` and ``stderr``, which discard it by
+    default.
+    """
+
+    old_migrations: dict[str, list[MigrationKey]]
+    """Keys of the old migrations, by app label."""
+
+    renamed_files: dict[Path, Path]
+    """Old migration files which were backed up, with their backup path."""
+
+    new_modules: dict[str, str]
+    """Packages where the new migrations are written side by side, by app label."""
+
+    new_migrations: list[NewMigration]
+    """Migrations written with their replaces by this run."""
+
+    written_files: list[Path]
+    """Files written since they were last formatted."""
+
+    formatted_files: list[Path]
+    """Files written and formatted."""
+
+    skipped_files: list[Path]
+    """Files left untouched, their content didn't change."""
+
+    formatter: BlackFormatter
+    """Formatter of the written files, with the black mode of the run."""
+
+    phase_durations: dict[str, float]
+    """Time spent in each phase, in seconds."""
+
+    journal_path: Path | None
+    """File where the progress of the run is saved, if any."""
+
+    def __init__(
+        self,
+        migration_name: str,
+        app_labels: Sequence[str] = (),
+        generated_on: date | None = None,
+        jobs: int = 1,
+        stdout: TextIO | OutputWrapper | None = None,
+        stderr: TextIO | OutputWrapper | None = None,
+        style: Style | None = None,
+    ) -> None:
+        self.migration_name = migration_name
+        self.app_labels = list(app_labels)
+        self.generated_on = generated_on
+        self.jobs = jobs
+        self.stdout = _output_wrapper(stdout)
+        self.stderr = _output_wrapper(stderr)
+        self.style = style or no_style()
+        self.old_migrations = {}
+        self.renamed_files = {}
+        self.new_modules = {}
+        self.new_migrations = []
+        self.written_files = []
+        self.formatted_files = []
+        self.skipped_files = []
+        self.formatter = BlackFormatter()
+        self.phase_durations = {}
+        self.journal_path = None
+
+    def side_by_side_modules(
+        self, check_empty: bool = False, clear: bool = False
+    ) -> dict[str, str]:
+        """
+        Package where to write the new migrations of each app, next to the old.
+
+        The packages are created if they don't exist yet. With
+        ``check_empty``, existing packages must not contain migrations, unless
+        they are cleared first with ``clear``.
+        """
+        new_dirs = {}
+        for app_label in self.first_party_app_labels():
+            module_name, _ = MigrationLoader.migrations_module(app_label)
+            old_package = migrations_package(app_label)
+            if module_name is None or old_package is None:
+                continue
+            old_dir = Path(next(iter(old_package.__path__)))
+            new_dirs[app_label] = (
+                f"{module_name}{SIDE_BY_SIDE_SUFFIX}",
+                old_dir.with_name(f"{old_dir.name}{SIDE_BY_SIDE_SUFFIX}"),
+            )
+
+        if check_empty:
+            for new_module_name, new_dir in new_dirs.values():
+                existing = [
+                    path
+                    for path in sorted(new_dir.glob("*.py"))
+                    if path.name != "__init__.py"
+                ]
+                if existing and not clear:
+                    raise CommandError(
+                        f"The {new_module_name!r} package already contains "
+                        "migrations, written by a previous run. Remove them, "
+                        "or use --clear-side-by-side."
+                    )
+                for path in existing:
+                    path.unlink()
+
+        new_modules = {}
+        for app_label, (new_module_name, new_dir) in new_dirs.items():
+            new_dir.mkdir(exist_ok=True)
+            (new_dir / "__init__.py").touch()
+            new_modules[app_label] = new_module_name
+        importlib.invalidate_caches()
+        return new_modules
+
+    @staticmethod
+    def use_migration_modules(
+        new_modules: dict[str, str], phase: str
+    ) -> AbstractContextManager[object]:
+        """Use the new migrations packages, except to find the old migrations."""
+        if not new_modules or phase == "old":
+            return nullcontext()
+        return override_settings(
+            MIGRATION_MODULES={**settings.MIGRATION_MODULES, **new_modules}
+        )
+
+    def compact_old_migrations(
+        self,
+        keep_old_migrations: bool,
+        keep_last: int | None,
+        older_than: date | None,
+        until_ref: str | None,
+    ) -> None:
+        """
+        Replace the migrations older than the cutoff by a compact base.
+
+        The recent migrations depending on the replaced ones are changed to
+        depend on the last migration of the base, in the same app.
+        """
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        try:
+            window = select_window(
+                loader.graph,
+                self.first_party_app_labels(),
+                keep_last=keep_last,
+                older_than=older_than,
+                until_ref=until_ref,
+            )
+        except subprocess.CalledProcessError as exc:
+            raise CommandError(
+                f"Can't list the migrations at {until_ref}: {exc.stderr.strip()}"
+            ) from exc
+        if not window:
+            self.log_info("No migrations older than the cutoff.")
+            return
+
+        self.old_migrations = window
+        replaced_count = sum(len(keys) for keys in window.values())
+        self.log_info(
+            f"Creating new migrations replacing {replaced_count} migration(s) "
+            f"from {len(window)} app(s)..."
+        )
+        changes = generate_squashed_base(
+            loader,
+            [key for keys in window.values() for key in keys],
+            self.migration_name,
+            app_order=self.get_app_order(),
+        )
+        for app_label in window:
+            if not changes.get(app_label):
+                # The old migrations cancel out, they still need replacing
+                changes[app_label] = [
+                    Migration(f"0001_{self.migration_name}", app_label)
+                ]
+        self.reduce_dependencies(
+            {
+                (migration_obj.app_label, migration_obj.name): migration_obj
+                for app_label in window
+                for migration_obj in changes[app_label]
+            }
+        )
+        for app_label in window:
+            self.update_app_migrations(app_label, changes[app_label], window)
+
+        self.log_info("Updating recent migrations...")
+        mapping = {
+            key: (key[0], changes[key[0]][-1].name)
+            for keys in window.values()
+            for key in keys
+        }
+        for key, migration_obj in loader.disk_migrations.items():
+            if key not in mapping and any(
+                tuple(dependency) in mapping
+                for dependency in migration_obj.dependencies
+            ):
+                rewrite_dependencies(migration_file_path(*key), mapping)
+                # Invalidate the import cache to load the new dependencies
+                module_name, _ = MigrationLoader.migrations_module(key[0])
+                sys.modules.pop(f"{module_name}.{key[1]}", None)
+
+        if not keep_old_migrations:
+            self.log_info("Removing old migration files...")
+            for app_label, migration_name in mapping:
+                self.handle_old_migration_file(
+                    app_label=app_label,
+                    migration_name=migration_name,
+                    keep_old_migrations=False,
+                )
+
+    def run_phase(self, phase: str, journal: RemakeJournal) -> None:
+        """Run a single phase of the remake, sending signals around it."""
+        signals.phase_started.send(sender=type(self), remake=self, phase=phase)
+        start = time.perf_counter()
+        self.run_phase_steps(phase, journal)
+        duration = self.phase_durations[phase] = time.perf_counter() - start
+        if phase == "old":
+            signals.old_migrations_collected.send(
+                sender=type(self),
+                remake=self,
+                old_migrations=self.old_migrations,
+                duration=duration,
+            )
+        elif phase == "make":
+            signals.migrations_generated.send(
+                sender=type(self),
+                remake=self,
+                paths=self.new_migration_paths(),
+                duration=duration,
+            )
+        signals.phase_finished.send(
+            sender=type(self), remake=self, phase=phase, duration=duration
+        )
+
+    def run_phase_steps(self, phase: str, journal: RemakeJournal) -> None:
+        """Run the steps of a single phase of the remake."""
+        if phase == "old":
+            # Remove or rename old migration files
+            self.handle_old_migrations(
+                journal.keep_old_migrations,
+                streaming=journal.streaming,
+                side_by_side=journal.side_by_side,
+                on_progress=lambda: self.save_journal(journal),
+            )
+        elif phase == "make":
+            # Recreate migrations
+            self.make_migrations()
+        elif phase == "update":
+            # Update new files to be squashed of the old ones
+            self.update_new_migrations(streaming=journal.streaming)
+        elif phase == "restore":
+            # Recreate old migrations
+            if journal.keep_old_migrations:
+                self.restore_old_migrations()
+        else:
+            # Run other commands
+            self.run_post_commands()
+
+    def save_journal(self, journal: RemakeJournal) -> None:
+        """Record the old migrations and the backups in the journal, and save it."""
+        journal.old_migrations = self.old_migrations
+        journal.renamed_files = self.renamed_files
+        if self.journal_path is not None:
+            journal.save(self.journal_path)
+
+    def restore_old_migrations(self) -> None:
+        """Restore old migrations after the command."""
+        for old_name, new_name in self.renamed_files.items():
+            Path(new_name).rename(old_name)
+
+    def log_info(self, message: str) -> None:
+        """Wrapper to help logging successes."""
+        self.stdout.write(self.style.SUCCESS(message))
+
+    def log_error(self, message: str) -> None:
+        """Wrapper to help logging errors."""
+        self.stderr.write(self.style.ERROR(message))
+
+    def handle_old_migrations(
+        self,
+        keep_old_migrations: bool,
+        streaming: bool = False,
+        side_by_side: bool = False,
+        on_progress: Callable[[], None] | None = None,
+    ) -> None:
+        """
+        Remove all pre-existing migration files in first party apps.
+
+        When the new migrations are written side by side, the old migration
+        files are only listed. The old migrations already listed by an
+        interrupted run are used as they are, the graph can't be loaded once
+        some of their files are gone, and the files left are handled.
+
+        ``on_progress`` is called once all the old migrations are listed,
+        before any file is touched, then after each backup, so that an
+        interrupted run can be resumed.
+        """
+        if side_by_side:
+            action = "Listing"
+        else:
+            action = "Backing up" if keep_old_migrations else "Removing"
+        self.log_info(f"{action} old migration files...")
+        if self.old_migrations:
+            on_disk = {
+                app_label: set(list_migration_names(app_label))
+                for app_label in self.old_migrations
+            }
+            old_keys = [
+                (app_label, migration_name)
+                for app_label, keys in self.old_migrations.items()
+                for _, migration_name in keys
+                if migration_name in on_disk[app_label]
+            ]
+        else:
+            old_migrations = defaultdict(list)
+            old_keys = self.find_old_migrations(streaming)
+            for app_label, migration_name in old_keys:
+                old_migrations[app_label].append((app_label, migration_name))
+            self.old_migrations = dict(old_migrations)
+        if side_by_side:
+            return
+        if on_progress is not None:
+            on_progress()
+        for app_label, migration_name in old_keys:
+            rename = self.handle_old_migration_file(
+                app_label=app_label,
+                migration_name=migration_name,
+                keep_old_migrations=keep_old_migrations,
+            )
+            if rename:
+                self.renamed_files.update(rename)
+                if on_progress is not None:
+                    on_progress()
+
+    def find_old_migrations(self, streaming: bool = False) -> list[tuple[str, str]]:
+        """
+        Find the migrations of first party apps.
+
+        By default, the full migration graph is loaded, which excludes
+        migrations replaced by a squashed migration. In streaming mode, the
+        migrations are loaded one app at a time, and the migrations replaced
+        by another one are excluded the same way.
+        """
+        if streaming:
+            listed = []
+            replaced: set[tuple[str, str]] = set()
+            for app_label in self.first_party_app_labels():
+                for migration_obj in load_app_migrations(app_label):
+                    listed.append((app_label, migration_obj.name))
+                    replaced.update(
+                        (replaced_app, replaced_name)
+                        for replaced_app, replaced_name in migration_obj.replaces
+                    )
+                # Release the migrations before moving on to the next app
+                unload_app_migrations(app_label)
+            return [key for key in listed if key not in replaced]
+
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        return [
+            (app_label, migration_name)
+            for app_label, migration_name in loader.graph.nodes
+            if self._is_selected(apps.get_app_config(app_label))
+        ]
+
+    def make_migrations(self) -> None:
+        """Recreate migrations from scratch with a unique name."""
+        self.log_info("Creating new migrations...")
+        name = self.migration_name
+        if (
+            app_settings.REMAKE_MIGRATIONS_FIRST_APPS
+            or app_settings.REMAKE_MIGRATIONS_LAST_APPS
+        ):
+            self.make_migrations_in_passes(name)
+            return
+
+        order = self.get_app_order()
+        self.log_info(f"App order: {', '.join(order)}")
+        if self.jobs > 1:
+            shards = connected_components(self.get_app_graph())
+            self.log_info(f"Detecting changes in {len(shards)} shard(s)...")
+            for path, content in generate_migrations_sharded(
+                name,
+                shards,
+                app_order=order,
+                app_labels=self.app_labels,
+                jobs=self.jobs,
+            ):
+                self.write_migration_file(path, content)
+            return
+
+        changes = generate_migrations(name, app_order=order, app_labels=self.app_labels)
+        for app_migrations in changes.values():
+            for migration_obj in app_migrations:
+                self.write_to_disk(migration_obj)
+
+    def make_migrations_in_passes(self, name: str) -> None:
+        """Recreate migrations with several passes, following the settings."""
+        if first_apps := app_settings.REMAKE_MIGRATIONS_FIRST_APPS:
+            self.log_info(f"First apps: {', '.join(first_apps)}...")
+            call_command("makemigrations", "--name", name, *first_apps)
+
+        if last_apps := app_settings.REMAKE_MIGRATIONS_LAST_APPS:
+            apps_to_make = [
+                app_config.label
+                for app_config in apps.get_app_configs()
+                if app_config.label not in last_apps
+            ]
+            self.log_info(f"Middle apps {', '.join(apps_to_make)}...")
+            call_command("makemigrations", "--name", name, *apps_to_make)
+
+            self.log_info(f"Last apps {', '.join(last_apps)}...")
+            call_command("makemigrations", "--name", name, *last_apps)
+
+        # Always run a final round, just in case
+        call_command("makemigrations", "--name", name, *self.app_labels)
+
+    def get_app_order(self) -> list[str]:
+        """
+        Order first party apps following references between their models.
+
+        Referenced apps come first, apps with circular references are
+        grouped together. Apps from ``REMAKE_MIGRATIONS_APP_ORDER`` are
+        put first, in the given order.
+        """
+        return app_order(
+            self.get_app_graph(),
+            pinned=app_settings.REMAKE_MIGRATIONS_APP_ORDER,
+        )
+
+    def get_app_graph(self) -> dict[str, set[str]]:
+        """Graph of references between the first party apps with models."""
+        return build_app_graph(
+            app_config
+            for app_config in apps.get_app_configs()
+            if self._is_selected(app_config) and any(app_config.get_models())
+        )
+
+    def _is_selected(self, app_config: AppConfig) -> bool:
+        """Whether the migrations of the app are remade by this run."""
+        if self.app_labels:
+            return app_config.label in self.app_labels
+        return is_first_party(app_config)
+
+    def first_party_app_labels(self) -> list[str]:
+        """Labels of the first party apps to remake, all of them by default."""
+        return [
+            app_config.label
+            for app_config in apps.get_app_configs()
+            if self._is_selected(app_config)
+        ]
+
+    @staticmethod
+    def handle_old_migration_file(
+        app_label: str, migration_name: str, keep_old_migrations: bool
+    ) -> dict[Path, Path]:
+        """
+        Removes or rename old migration file.
+
+        Remove file from the disk for the specified migration
+        or rename if we need to keep around old migrations.
+        """
+        migration_file = migration_file_path(app_label, migration_name)
+        if keep_old_migrations:
+            new_name = migration_file.with_suffix(".py-backup")
+            migration_file.rename(new_name)
+            rename = {migration_file: new_name}
+        else:
+            migration_file.unlink()
+            rename = {}
+        # Invalidate the import cache to avoid loading the old migration
+        module_name, _ = MigrationLoader.migrations_module(app_label)
+        sys.modules.pop(f"{module_name}.{migration_name}", None)
+        return rename
+
+    def update_new_migrations(self, streaming: bool = False) -> None:
+        """
+        Update auto-generated migrations after Django re-created them.
+
+        Does a lot of things:
+
+        - Rename migration files to have a unique name. If they have the same name as
+          an old one, Django may be confused with replaces or dependencies.
+        - Update dependencies to use the new unique names.
+        - Add the old migrations to the `replaces` attributes of the new migrations.
+          This is to mark the new migrations as squashed, so they are not actually
+          executed by Django, they are simply marked as already applied.
+
+        In streaming mode, migrations are loaded, updated and released one app at
+        a time, instead of loading the migrations of all apps at once.
+        """
+        self.log_info("Updating new migrations...")
+        # Sort old migrations
+        sorted_old_migrations = self.sort_migrations_map(self.old_migrations)
+        if streaming:
+            for app_label in sorted(sorted_old_migrations):
+                migration_names = [
+                    migration_name
+                    for migration_name in list_migration_names(app_label)
+                    if self.is_new_migration(migration_name)
+                ]
+                self.update_app_migrations(
+                    app_label,
+                    load_app_migrations(app_label, migration_names),
+                    sorted_old_migrations,
+                )
+                # Release the migrations before moving on to the next app
+                unload_app_migrations(app_label)
+                gc.collect()
+            self.log_info(
+                "Kept the redundant dependencies, the migrations of other apps "
+                "aren't loaded in streaming mode..."
+            )
+            return
+
+        loader = MigrationLoader(None, ignore_no_migrations=True, load=False)
+        # Load migrations from the disk
+        loader.load_disk()
+        remade_migrations = {
+            migration_key: migration_obj
+            for migration_key, migration_obj in loader.disk_migrations.items()
+            if migration_key[0] in sorted_old_migrations
+            and self.is_new_migration(migration_key[1])
+        }
+        if app_settings.REMAKE_MIGRATIONS_MINIMIZE_MIGRATIONS:
+            self.minimize_migrations(remade_migrations)
+        if app_settings.REMAKE_MIGRATIONS_MAX_OPERATIONS:
+            self.split_migrations(
+                remade_migrations, app_settings.REMAKE_MIGRATIONS_MAX_OPERATIONS
+            )
+        self.reduce_dependencies(remade_migrations)
+        # Build a map of new migrations key per app
+        new_migrations = defaultdict(list)
+        for app_label, migration_name in remade_migrations:
+            new_migrations[app_label].append((app_label, migration_name))
+
+        # Sort new migrations
+        sorted_new_migrations = self.sort_migrations_map(dict(new_migrations))
+        # Do the main work
+        for app_label, new_migrations_list in sorted_new_migrations.items():
+            self.update_app_migrations(
+                app_label,
+                [remade_migrations[key] for key in new_migrations_list],
+                sorted_old_migrations,
+            )
+
+    def is_new_migration(self, migration_name: str) -> bool:
+        """Whether the migration was created by this run, as opposed to an old one."""
+        return migration_name.endswith(f"_{self.migration_name}")
+
+    def new_migration_paths(self) -> list[Path]:
+        """Paths of the migration files created by this run."""
+        return [
+            migration_file_path(app_label, migration_name)
+            for app_label in self.first_party_app_labels()
+            for migration_name in list_migration_names(app_label)
+            if self.is_new_migration(migration_name)
+        ]
+
+    def update_app_migrations(
+        self,
+        app_label: str,
+        new_migrations_list: list[Migration],
+        sorted_old_migrations: dict[str, list[tuple[str, str]]],
+    ) -> None:
+        """Set replaces on the new migrations of an app and write them to disk."""
+        new_migrations_count = len(new_migrations_list)
+        old_migrations_list = sorted_old_migrations[app_label]
+        old_migrations_count = len(old_migrations_list)
+
+        # We should have more migrations before
+        if (
+            old_migrations_count < new_migrations_count
+            and not app_settings.REMAKE_MIGRATIONS_REPLACES_ALL
+        ):
+            self.log_error(
+                f"App {app_label} has more migrations than before... "
+                "Replaces might be wrong!"
+            )
+
+        # Calculate how many migrations will be replaced by the first one
+        first_replaces_count = old_migrations_count - new_migrations_count + 1
+        replaces_module = None
+        if app_settings.REMAKE_MIGRATIONS_REPLACES_ALL:
+            replaces_set = set(old_migrations_list)
+            for other_app in app_settings.REMAKE_MIGRATIONS_REPLACE_OTHER_APP.get(
+                app_label, []
+            ):
+                replaces_set.update(sorted_old_migrations[other_app])
+            all_replaces = sorted(replaces_set)
+            if app_settings.REMAKE_MIGRATIONS_REPLACES_MODULE and new_migrations_list:
+                replaces_module = REPLACES_MODULE_NAME
+                first_path = Path(CustomMigrationWriter(new_migrations_list[0]).path)
+                self.write_file(
+                    str(first_path.parent / f"{replaces_module}.py"),
+                    render_replaces_module(all_replaces),
+                )
+        # Rewrite migrations with: new name, updated dependencies & replaces
+        for index, migration_obj in enumerate(new_migrations_list):
+            if app_settings.REMAKE_MIGRATIONS_REPLACES_ALL:
+                replaces = list(all_replaces)
+            elif index == 0:
+                # The first migration will replace the N first ones
+                replaces = old_migrations_list[:first_replaces_count]
+            else:
+                # Otherwise, we replace a single migration
+                replaces = [old_migrations_list[first_replaces_count + index - 1]]
+            if index == 0:
+                self.add_needed_database_extensions(migration_obj)
+
+            if (
+                app_settings.REMAKE_MIGRATIONS_RUN_BEFORE
+                and index == 0
+                and app_label in app_settings.REMAKE_MIGRATIONS_RUN_BEFORE
+            ):
+                migration_obj.run_before = (  # type: ignore[misc]
+                    app_settings.REMAKE_MIGRATIONS_RUN_BEFORE[app_label]
+                )
+
+            migration_obj.replaces = list(replaces)  # type: ignore[misc]
+            migration_obj.initial = True  # type: ignore[misc]
+            # Rewrite back to the disk
+            path = self.write_to_disk(migration_obj, replaces_module=replaces_module)
+            self.new_migrations.append(
+                NewMigration(
+                    app_label=app_label,
+                    name=migration_obj.name,
+                    path=path,
+                    replaces=list(replaces),
+                )
+            )
+
+    def minimize_migrations(
+        self, remade_migrations: dict[tuple[str, str], Migration]
+    ) -> None:
+        """Merge the new migrations that don't need to be split and renumber them."""
+        merged = merge_migrations(remade_migrations)
+        if not merged:
+            return
+
+        self.log_info(f"Merged {len(merged)} migration(s)...")
+        renamed = renumber_migrations(remade_migrations)
+        for app_label, migration_name in {*merged, *renamed}:
+            if (app_label, migration_name) not in remade_migrations:
+                self.handle_old_migration_file(
+                    app_label=app_label,
+                    migration_name=migration_name,
+                    keep_old_migrations=False,
+                )
+
+    def split_migrations(
+        self, remade_migrations: dict[tuple[str, str], Migration], max_operations: int
+    ) -> None:
+        """
+        Split the new migrations with too many operations into a chain.
+
+        Django records the migrations replaced by a migration when applying
+        it, so each part must replace its own old migrations: otherwise the
+        parts after a failed one would look applied. An app gets at most as
+        many new migrations as it had old ones, its migrations are split into
+        parts with more operations if needed.
+        """
+        parts = split_migrations(
+            remade_migrations,
+            max_operations,
+            max_migrations={
+                app_label: len(old_migrations)
+                for app_label, old_migrations in self.old_migrations.items()
+            },
+        )
+        for app_label in sorted({key[0] for key in remade_migrations}):
+            if any(
+                len(migration_obj.operations) > max_operations
+                for key, migration_obj in remade_migrations.items()
+                if key[0] == app_label
+            ):
+                self.log_error(
+                    f"App {app_label} doesn't have enough old migrations to "
+                    f"split its new migrations into parts of {max_operations} "
+                    "operations."
+                )
+        split = [key for key, key_parts in parts.items() if len(key_parts) > 1]
+        if not split:
+            return
+
+        self.log_info(f"Split {len(split)} migration(s)...")
+        for app_label, migration_name in parts:
+            if (app_label, migration_name) not in remade_migrations:
+                self.handle_old_migration_file(
+                    app_label=app_label,
+                    migration_name=migration_name,
+                    keep_old_migrations=False,
+                )
+
+    def reduce_dependencies(
+        self, remade_migrations: dict[tuple[str, str], Migration]
+    ) -> None:
+        """Drop the dependencies of the new migrations implied by other ones."""
+        removed = reduce_dependencies(remade_migrations)
+        if removed:
+            self.log_info(f"Removed {len(removed)} redundant dependency(ies)...")
+
+    @staticmethod
+    def sort_migrations_map(
+        migrations_map: dict[str, list[tuple[str, str]]],
+    ) -> dict[str, list[tuple[str, str]]]:
+        """Sort migrations and group them by app."""
+        return {
+            app_label: sorted(migrations_list)
+            for app_label, migrations_list in migrations_map.items()
+        }
+
+    @staticmethod
+    def add_needed_database_extensions(migration_obj: Migration) -> None:
+        """Add DB extensions for the app to the migration file."""
+        app_label = migration_obj.app_label
+        extensions = app_settings.REMAKE_MIGRATIONS_EXTENSIONS.get(app_label)
+        if not extensions:
+            return
+
+        if isinstance(extensions, str):  # type: ignore[unreachable]
+            raise ImproperlyConfigured(
+                "REMAKE_MIGRATIONS_EXTENSIONS values should be a list, not a string."
+            )
+
+        extension_objects = [import_string(ext)() for ext in extensions]
+        migration_obj.operations = [*extension_objects, *migration_obj.operations]  # type: ignore[misc]
+
+    def write_to_disk(
+        self, migration_obj: Migration, replaces_module: str | None = None
+    ) -> Path:
+        """Write the migration object to the disk, formatted at the end."""
+        writer = CustomMigrationWriter(
+            migration_obj,
+            replaces_module=replaces_module,
+            generated_on=self.generated_on,
+        )
+        self.write_migration_file(writer.path, writer.write, migration_obj)
+        return Path(writer.path)
+
+    def write_migration_file(
+        self,
+        path: str,
+        content: str | Callable[[TextIO], None],
+        migration_obj: Migration | None = None,
+    ) -> None:
+        """
+        Write a migration file, sending signals around.
+
+        The content may be given as a callable writing it to the file, to
+        render the migration after the receivers of ``pre_migration_write``
+        changed it.
+        """
+        signals.pre_migration_write.send(
+            sender=type(self), remake=self, migration=migration_obj, path=path
+        )
+        start = time.perf_counter()
+        self.write_file(path, content)
+        signals.post_migration_write.send(
+            sender=type(self),
+            remake=self,
+            migration=migration_obj,
+            path=path,
+            duration=time.perf_counter() - start,
+        )
+
+    def write_file(self, path: str, content: str | Callable[[TextIO], None]) -> None:
+        """
+        Write a migration file if it changed.
+
+        The content is formatted before comparing it with the file on the
+        disk, or, when it can't be formatted in-process, the file is
+        formatted at the end if it was written.
+        """
+        file_path = Path(path)
+        formatter = self.formatter.file_formatter(file_path)
+        if not write_if_changed(file_path, content, formatter):
+            self.skipped_files.append(file_path)
+        elif formatter is None:
+            self.written_files.append(file_path)
+        else:
+            self.formatted_files.append(file_path)
+
+    def remake_output(self) -> dict[str, dict[str, str]]:
+        """Content of the files created by this run, by file name and app label."""
+        output: dict[str, dict[str, str]] = {}
+        for app_label in self.first_party_app_labels():
+            paths = [
+                migration_file_path(app_label, migration_name)
+                for migration_name in list_migration_names(app_label)
+                if self.is_new_migration(migration_name)
+            ]
+            if not paths:
+                continue
+            replaces_module = paths[0].parent / f"{REPLACES_MODULE_NAME}.py"
+            if replaces_module.exists():
+                paths.append(replaces_module)
+            output[app_label] = {
+                path.name: path.read_text(encoding="utf-8") for path in paths
+            }
+        return output
+
+    def restore_output(self, output: dict[str, dict[str, str]]) -> None:
+        """Write the files of a previous run with the same inputs."""
+        for app_label, files in output.items():
+            module = migrations_package(app_label)
+            if module is None:
+                raise CommandError(f"App {app_label} has no migrations package.")
+            directory = Path(next(iter(module.__path__)))
+            for file_name, content in files.items():
+                path = directory / file_name
+                # The cached files are formatted already
+                if write_if_changed(path, content):
+                    self.formatted_files.append(path)
+                else:
+                    self.skipped_files.append(path)
+            unload_app_migrations(app_label)
+            migration_names = [
+                Path(file_name).stem
+                for file_name in files
+                if self.is_new_migration(Path(file_name).stem)
+            ]
+            self.new_migrations.extend(
+                NewMigration(
+                    app_label=app_label,
+                    name=migration_obj.name,
+                    path=directory / f"{migration_obj.name}.py",
+                    replaces=[
+                        (replaced_app, replaced_name)
+                        for replaced_app, replaced_name in migration_obj.replaces
+                    ],
+                )
+                for migration_obj in load_app_migrations(app_label, migration_names)
+            )
+            unload_app_migrations(app_label)
+
+    def format_written_files(self) -> None:
+        """Format all the files written so far, in a single batch."""
+        format_files(self.written_files, stderr=self.stderr)
+        self.formatted_files.extend(self.written_files)
+        self.written_files = []
+
+    def write_state_snapshot(self) -> None:
+        """Write the project state built by the new migrations, if configured."""
+        if not app_settings.REMAKE_MIGRATIONS_STATE_SNAPSHOT_PATH:
+            return
+        self.log_info("Writing the state snapshot...")
+        for app_label in self.first_party_app_labels():
+            # Load the migrations as they are on the disk
+            unload_app_migrations(app_label)
+        StateSnapshot.from_migrations().save(
+            Path(app_settings.REMAKE_MIGRATIONS_STATE_SNAPSHOT_PATH)
+        )
+
+    def run_post_commands(self) -> None:
+        """Run other management commands at the very end."""
+        post_commands = app_settings.REMAKE_MIGRATIONS_POST_COMMANDS
+        if not post_commands:
+            return
+
+        self.log_info("Running post-commands...")
+        for command_with_args in post_commands:
+            self.log_info(f"Running: {' '.join(command_with_args)}")
+            start = time.perf_counter()
+            call_command(*command_with_args)
+            signals.post_command_finished.send(
+                sender=type(self),
+                remake=self,
+                args=command_with_args,
+                duration=time.perf_counter() - start,
+            )
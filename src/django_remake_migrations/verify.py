@@ -0,0 +1,397 @@
+"""
+Compare the database schemas created by the old and the remade migrations.
+
+Comparing model states doesn't catch the differences which only appear in
+the database, like the names of indexes and constraints, or what operations
+from ``REMAKE_MIGRATIONS_EXTENSIONS`` create. Two fresh databases are
+migrated at the same time, one with the old migrations and one with the
+remade ones, then their schemas are introspected and compared.
+"""
+
+from __future__ import annotations
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import uuid
+from collections.abc import Callable, Generator, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.migrations import Migration
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.state import ProjectState
+from django.test import override_settings
+
+from django_remake_migrations.benchmark import database_connection
+from django_remake_migrations.disk import migrations_package, unload_app_migrations
+
+VERIFY_DB_ALIAS = "remake_migrations_verify"
+
+
+@dataclass
+class TableSchema:
+    """Introspected schema of a table."""
+
+    columns: dict[str, tuple[Any, ...]] = field(default_factory=dict)
+    """Type code, nullability and default of each column."""
+
+    constraints: dict[str, Any] = field(default_factory=dict)
+    """Definition of each constraint and index, by name."""
+
+
+@dataclass
+class DatabaseSchema:
+    """Introspected schema of a database."""
+
+    tables: dict[str, TableSchema] = field(default_factory=dict)
+
+    extensions: set[str] = field(default_factory=set)
+    """Installed extensions, only introspected on PostgreSQL."""
+
+
+def backup_migration_files(app_label: str) -> dict[str, Path]:
+    """Old migrations of the app, backed up by ``--keep-old-migrations``."""
+    module = migrations_package(app_label)
+    if module is None:
+        return {}
+    return {
+        path.stem: path
+        for directory in module.__path__
+        for path in sorted(Path(directory).glob("*.py-backup"))
+    }
+
+
+def kept_migration_files(loader: MigrationLoader) -> dict[str, dict[str, Path]]:
+    """
+    Old migrations kept on disk, next to the migrations replacing them.
+
+    For each app with replacing migrations, these are all the other
+    migrations of the app.
+    """
+    replacing_apps = {app_label for app_label, _ in loader.replacements}
+    files: dict[str, dict[str, Path]] = {}
+    for key, migration in loader.disk_migrations.items():
+        app_label, migration_name = key
+        if app_label not in replacing_apps or key in loader.replacements:
+            continue
+        module_file = sys.modules[type(migration).__module__].__file__
+        if module_file:
+            files.setdefault(app_label, {})[migration_name] = Path(module_file)
+    return files
+
+
+def git_migration_sources(app_label: str, ref: str) -> dict[str, str]:
+    """
+    Source of the migrations of the app at the given git ref.
+
+    Raises:
+        subprocess.CalledProcessError: if the ref can't be read.
+
+    """
+    module = migrations_package(app_label)
+    if module is None:
+        return {}
+    directory = next(iter(module.__path__))
+
+    def git(*args: str) -> str:
+        return subprocess.run(  # noqa: S603
+            ["git", *args],  # noqa: S607
+            cwd=directory,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+    return {
+        Path(file_name).stem: git("show", f"{ref}:./{file_name}")
+        for file_name in git("ls-tree", "--name-only", ref, ".").splitlines()
+        if file_name.endswith(".py") and file_name[0] not in "_~"
+    }
+
+
+def old_migration_sources(
+    app_labels: Iterable[str], ref: str | None = None
+) -> dict[str, dict[str, str]]:
+    """
+    Source of the old migrations of each app.
+
+    The old migrations are taken from the given git ref. Without a ref, they
+    are the backups made by ``--keep-old-migrations`` during a run, or the
+    old migrations kept on disk after the run. Apps without old migrations
+    aren't included.
+
+    Raises:
+        subprocess.CalledProcessError: if the ref can't be read.
+
+    """
+    sources: dict[str, dict[str, str]] = {}
+    # Load the migrations as they are on disk
+    for app_label in app_labels:
+        unload_app_migrations(app_label)
+    if ref is not None:
+        for app_label in app_labels:
+            if app_sources := git_migration_sources(app_label, ref):
+                sources[app_label] = app_sources
+        return sources
+
+    kept = kept_migration_files(MigrationLoader(None, ignore_no_migrations=True))
+    for app_label in app_labels:
+        files = backup_migration_files(app_label) or kept.get(app_label, {})
+        if files:
+            sources[app_label] = {
+                name: path.read_text(encoding="utf-8") for name, path in files.items()
+            }
+    return sources
+
+
+@contextmanager
+def old_migrations_loader(
+    sources: dict[str, dict[str, str]],
+) -> Generator[MigrationLoader, None, None]:
+    """
+    Load the graph of the old migrations.
+
+    The old migrations are written to temporary packages, which replace the
+    migrations packages of their apps while the graph is loaded. These are
+    copies of the migrations packages without their migrations, so that the
+    old migrations can still import their helpers or read their data files.
+    """
+    directory = Path(tempfile.mkdtemp())
+    prefix = f"remake_verify_{uuid.uuid4().hex}"
+    migration_modules = {}
+    for app_label, app_sources in sources.items():
+        package_name = f"{prefix}_{app_label}"
+        package_dir = directory / package_name
+        module = migrations_package(app_label)
+        if module is not None and module.__file__ is not None:
+            shutil.copytree(
+                Path(module.__file__).parent,
+                package_dir,
+                ignore=_ignored_package_files(Path(module.__file__).parent),
+            )
+        else:
+            package_dir.mkdir()
+            (package_dir / "__init__.py").touch()
+        for migration_name, source in app_sources.items():
+            (package_dir / f"{migration_name}.py").write_text(source, encoding="utf-8")
+        migration_modules[app_label] = package_name
+
+    sys.path.insert(0, str(directory))
+    try:
+        with override_settings(
+            MIGRATION_MODULES={**settings.MIGRATION_MODULES, **migration_modules}
+        ):
+            yield MigrationLoader(None, ignore_no_migrations=True)
+    finally:
+        sys.path.remove(str(directory))
+        for module_name in list(sys.modules):
+            if module_name.startswith(prefix):
+                del sys.modules[module_name]
+        shutil.rmtree(directory)
+
+
+def _ignored_package_files(
+    package_dir: Path,
+) -> Callable[[str, list[str]], set[str]]:
+    """
+    Files not to copy from a migrations package: its migrations and backups.
+
+    Django loads every module at the top of the package as a migration,
+    except the private ones.
+    """
+
+    def ignored(directory: str, names: list[str]) -> set[str]:
+        ignored_names = {"__pycache__"}
+        if Path(directory) == package_dir:
+            ignored_names.update(
+                name
+                for name in names
+                if name.endswith(".py-backup")
+                or (name.endswith(".py") and name[0] not in "_~")
+            )
+        return ignored_names & set(names)
+
+    return ignored
+
+
+def migration_plan(loader: MigrationLoader) -> list[Migration]:
+    """All the migrations of the graph, in the order to apply them."""
+    graph = loader.graph
+    plan: list[Migration] = []
+    seen = set()
+    for target in graph.leaf_nodes():
+        for key in graph.forwards_plan(target):
+            if key not in seen:
+                seen.add(key)
+                plan.append(graph.nodes[key])
+    return plan
+
+
+def migrate(connection: BaseDatabaseWrapper, loader: MigrationLoader) -> None:
+    """Apply all the migrations of the graph to the database."""
+    state = ProjectState(real_apps=loader.unmigrated_apps)
+    for migration in migration_plan(loader):
+        with connection.schema_editor(atomic=migration.atomic) as schema_editor:
+            state = migration.apply(state, schema_editor)
+
+
+def introspect_schema(connection: BaseDatabaseWrapper) -> DatabaseSchema:
+    """Introspect the tables, columns, indexes and constraints of the database."""
+    schema = DatabaseSchema()
+    introspection = connection.introspection
+    with connection.cursor() as cursor:
+        for table_name in sorted(introspection.table_names(cursor)):
+            table = schema.tables[table_name] = TableSchema()
+            for column in introspection.get_table_description(cursor, table_name):
+                table.columns[column.name] = (
+                    column.type_code,
+                    column.null_ok,
+                    column.default,
+                )
+            table.constraints = introspection.get_constraints(cursor, table_name)
+    schema.extensions = _extension_names(connection)
+    return schema
+
+
+def _extension_names(connection: BaseDatabaseWrapper) -> set[str]:
+    if connection.vendor != "postgresql":
+        return set()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT extname FROM pg_extension")
+        return {row[0] for row in cursor.fetchall()}
+
+
+@contextmanager
+def dropping_created_objects(
+    connection: BaseDatabaseWrapper,
+) -> Generator[None, None, None]:
+    """
+    Drop the tables, views and extensions created in the block.
+
+    They are dropped even if the block fails, leaving the database as it
+    was found, so that the next verification starts from the same state.
+    """
+    introspection = connection.introspection
+    with connection.cursor() as cursor:
+        existing_tables = {info.name for info in introspection.get_table_list(cursor)}
+    existing_extensions = _extension_names(connection)
+    try:
+        yield
+    finally:
+        # A failed migration may leave a transaction open
+        if not connection.get_autocommit():
+            connection.rollback()
+            connection.set_autocommit(True)
+        quote_name = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            created = [
+                info
+                for info in introspection.get_table_list(cursor)
+                if info.name not in existing_tables
+            ]
+        with connection.constraint_checks_disabled():
+            with connection.schema_editor(atomic=False) as schema_editor:
+                for info in created:
+                    if info.type == "v":
+                        schema_editor.execute(f"DROP VIEW {quote_name(info.name)}")
+                for info in created:
+                    if info.type != "v":
+                        schema_editor.execute(
+                            schema_editor.sql_delete_table
+                            % {"table": quote_name(info.name)}
+                        )
+                for extension in _extension_names(connection) - existing_extensions:
+                    schema_editor.execute(
+                        f"DROP EXTENSION IF EXISTS {quote_name(extension)} CASCADE"
+                    )
+
+
+def migrate_and_introspect(
+    alias: str, settings_dict: dict[str, Any], loader: MigrationLoader
+) -> DatabaseSchema:
+    """
+    Migrate a fresh database and introspect its schema.
+
+    What the migrations created is dropped afterwards.
+    """
+    with (
+        database_connection(alias, settings_dict) as connection,
+        dropping_created_objects(connection),
+    ):
+        migrate(connection, loader)
+        return introspect_schema(connection)
+
+
+def compare_schemas(
+    databases: dict[str, dict[str, Any]],
+    old_loader: MigrationLoader,
+    new_loader: MigrationLoader,
+) -> tuple[DatabaseSchema, DatabaseSchema]:
+    """Migrate the old and new databases in parallel, and introspect them."""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        old_schema = executor.submit(
+            migrate_and_introspect,
+            f"{VERIFY_DB_ALIAS}_old",
+            databases["old"],
+            old_loader,
+        )
+        new_schema = executor.submit(
+            migrate_and_introspect,
+            f"{VERIFY_DB_ALIAS}_new",
+            databases["new"],
+            new_loader,
+        )
+        return old_schema.result(), new_schema.result()
+
+
+def schema_differences(old: DatabaseSchema, new: DatabaseSchema) -> list[str]:
+    """Describe the differences between the old and the new schemas."""
+    differences = [
+        *_only_in("Extension", old.extensions, new.extensions),
+        *_only_in("Table", old.tables, new.tables),
+    ]
+    for table_name in sorted(old.tables.keys() & new.tables.keys()):
+        old_table = old.tables[table_name]
+        new_table = new.tables[table_name]
+        differences += _only_in(
+            "Column",
+            {f"{table_name}.{name}" for name in old_table.columns},
+            {f"{table_name}.{name}" for name in new_table.columns},
+        )
+        differences += _changed(
+            "Column", table_name, old_table.columns, new_table.columns
+        )
+        differences += _only_in(
+            "Constraint",
+            {f"{table_name}.{name}" for name in old_table.constraints},
+            {f"{table_name}.{name}" for name in new_table.constraints},
+        )
+        differences += _changed(
+            "Constraint", table_name, old_table.constraints, new_table.constraints
+        )
+    return differences
+
+
+def _only_in(kind: str, old: Iterable[str], new: Iterable[str]) -> list[str]:
+    old, new = set(old), set(new)
+    return [
+        *(f"{kind} {name} only in the old migrations" for name in sorted(old - new)),
+        *(f"{kind} {name} only in the remade migrations" for name in sorted(new - old)),
+    ]
+
+
+def _changed(
+    kind: str, table_name: str, old: dict[str, Any], new: dict[str, Any]
+) -> list[str]:
+    return [
+        f"{kind} {table_name}.{name} differs: {old[name]!r} != {new[name]!r}"
+        for name in sorted(old.keys() & new.keys())
+        if old[name] != new[name]
+    ]
@@ -0,0 +1,185 @@
+"""
+Select the old part of the migration history, for a windowed remake.
+
+A windowed remake only replaces the migrations older than a cutoff with a
+compact base, and leaves the recent ones untouched, apart from their
+dependencies on the replaced migrations.
+"""
+
+from __future__ import annotations
+
+import ast
+import datetime as dt
+import re
+import subprocess
+from collections.abc import Iterable
+from pathlib import Path
+
+from django.db.migrations.graph import MigrationGraph
+
+from django_remake_migrations.disk import migration_file_path, migrations_package
+from django_remake_migrations.planner import MigrationKey
+
+GENERATED_ON_RE = re.compile(r"^# Generated by Django \S+ on (\d{4}-\d{2}-\d{2})")
+
+
+def app_migrations_in_order(
+    graph: MigrationGraph, app_label: str
+) -> list[MigrationKey]:
+    """Migrations of the app in the graph, in the order they are applied."""
+    ordered: list[MigrationKey] = []
+    for leaf in graph.leaf_nodes(app_label):
+        for key in graph.forwards_plan(leaf):
+            if key[0] == app_label and key not in ordered:
+                ordered.append(key)
+    return ordered
+
+
+def migration_date(app_label: str, migration_name: str) -> dt.date | None:
+    """Date from the header written by ``makemigrations``, if any."""
+    path = migration_file_path(app_label, migration_name)
+    with path.open(encoding="utf-8") as fh:
+        match = GENERATED_ON_RE.match(fh.readline())
+    if match is None:
+        return None
+    return dt.date.fromisoformat(match.group(1))
+
+
+def migrations_at_ref(app_label: str, ref: str) -> set[str]:
+    """
+    Names of the migrations of the app which exist at the given git ref.
+
+    Raises:
+        subprocess.CalledProcessError: if the ref can't be read.
+
+    """
+    module = migrations_package(app_label)
+    if module is None:
+        return set()
+    result = subprocess.run(  # noqa: S603
+        ["git", "ls-tree", "--name-only", ref, "."],  # noqa: S607
+        cwd=next(iter(module.__path__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        Path(file_name).stem
+        for file_name in result.stdout.splitlines()
+        if file_name.endswith(".py")
+    }
+
+
+def select_window(
+    graph: MigrationGraph,
+    app_labels: Iterable[str],
+    keep_last: int | None = None,
+    older_than: dt.date | None = None,
+    until_ref: str | None = None,
+) -> dict[str, list[MigrationKey]]:
+    """
+    Select the migrations to replace, older than the given cutoff.
+
+    The cutoff is either all but the last ``keep_last`` migrations of each
+    app, the migrations generated before the ``older_than`` date, or the
+    migrations present at the ``until_ref`` git ref. A migration is only
+    selected if all its ancestors from the given apps are selected as well,
+    so that the compact base never depends on a recent migration.
+
+    Returns:
+        The migrations to replace, grouped by app and in the order they apply.
+
+    """
+    app_labels = set(app_labels)
+    candidates: set[MigrationKey] = set()
+    for app_label in sorted(app_labels):
+        app_migrations = app_migrations_in_order(graph, app_label)
+        if keep_last is not None:
+            candidates.update(app_migrations[: max(len(app_migrations) - keep_last, 0)])
+        elif older_than is not None:
+            candidates.update(
+                key
+                for key in app_migrations
+                if (date := migration_date(*key)) is not None and date < older_than
+            )
+        elif until_ref is not None:
+            at_ref = migrations_at_ref(app_label, until_ref)
+            candidates.update(key for key in app_migrations if key[1] in at_ref)
+
+    selected: set[MigrationKey] = set()
+    for key in _graph_in_order(graph):
+        if key in candidates and all(
+            parent.key in selected
+            for parent in graph.node_map[key].parents
+            if parent.key[0] in app_labels
+        ):
+            selected.add(key)
+
+    window: dict[str, list[MigrationKey]] = {}
+    for key in _graph_in_order(graph):
+        if key in selected:
+            window.setdefault(key[0], []).append(key)
+    return window
+
+
+def _graph_in_order(graph: MigrationGraph) -> list[MigrationKey]:
+    """All the nodes of the graph, parents before their children."""
+    ordered: list[MigrationKey] = []
+    seen: set[MigrationKey] = set()
+    for leaf in graph.leaf_nodes():
+        for key in graph.forwards_plan(leaf):
+            if key not in seen:
+                seen.add(key)
+                ordered.append(key)
+    return ordered
+
+
+def rewrite_dependencies(path: Path, mapping: dict[MigrationKey, MigrationKey]) -> bool:
+    """
+    Replace dependencies of the migration file following the given mapping.
+
+    The file is edited in place, only the matching items of the dependencies
+    list are changed, the rest of the file is left as it is.
+
+    Returns:
+        Whether the file was changed.
+
+    """
+    source = path.read_bytes()
+    tree = ast.parse(source)
+    line_offsets = [0]
+    for line in source.splitlines(keepends=True):
+        line_offsets.append(line_offsets[-1] + len(line))
+
+    replacements: list[tuple[int, int, bytes]] = []
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.ClassDef) and node.name == "Migration"):
+            continue
+        for statement in node.body:
+            if not (
+                isinstance(statement, ast.Assign)
+                and any(
+                    isinstance(target, ast.Name) and target.id == "dependencies"
+                    for target in statement.targets
+                )
+                and isinstance(statement.value, (ast.List, ast.Tuple))
+            ):
+                continue
+            for element in statement.value.elts:
+                try:
+                    value = ast.literal_eval(element)
+                except ValueError:
+                    # e.g. swappable_dependency(settings.AUTH_USER_MODEL)
+                    continue
+                if not isinstance(value, tuple) or value not in mapping:
+                    continue
+                start = line_offsets[element.lineno - 1] + element.col_offset
+                end = line_offsets[element.end_lineno - 1] + element.end_col_offset  # type: ignore[operator]
+                replacements.append((start, end, repr(mapping[value]).encode()))
+
+    if not replacements:
+        return False
+    for start, end, text in sorted(replacements, reverse=True):
+        source = source[:start] + text + source[end:]
+    path.write_bytes(source)
+    return True
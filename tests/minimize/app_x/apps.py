@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from django.apps import AppConfig
+
+
+class AppXConfig(AppConfig):
+    name = "tests.minimize.app_x"
+    verbose_name = "App X"
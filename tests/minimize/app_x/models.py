@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+from django.db import models
+
+
+class Tag(models.Model):
+    item = models.ForeignKey("app_y.Item", on_delete=models.CASCADE)
@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from django.apps import AppConfig
+
+
+class AppYConfig(AppConfig):
+    name = "tests.minimize.app_y"
+    verbose_name = "App Y"
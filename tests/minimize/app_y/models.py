@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from django.db import models
+
+
+class Label(models.Model):
+    pass
+
+
+class Item(models.Model):
+    box = models.ForeignKey("app_z.Box", on_delete=models.CASCADE)
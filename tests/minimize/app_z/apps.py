@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from django.apps import AppConfig
+
+
+class AppZConfig(AppConfig):
+    name = "tests.minimize.app_z"
+    verbose_name = "App Z"
@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+from django.db import models
+
+
+class Box(models.Model):
+    label = models.ForeignKey("app_y.Label", on_delete=models.CASCADE)
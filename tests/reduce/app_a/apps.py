@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from django.apps import AppConfig
+
+
+class AppAConfig(AppConfig):
+    name = "tests.reduce.app_a"
+    verbose_name = "App A"
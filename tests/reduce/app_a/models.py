@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+from django.db import models
+
+
+class Author(models.Model):
+    pass
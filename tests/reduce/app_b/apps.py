@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from django.apps import AppConfig
+
+
+class AppBConfig(AppConfig):
+    name = "tests.reduce.app_b"
+    verbose_name = "App B"
@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+from django.db import models
+
+
+class Book(models.Model):
+    author = models.ForeignKey("app_a.Author", on_delete=models.CASCADE)
@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from django.apps import AppConfig
+
+
+class AppCConfig(AppConfig):
+    name = "tests.reduce.app_c"
+    verbose_name = "App C"
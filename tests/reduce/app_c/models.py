@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from django.db import models
+
+
+class Review(models.Model):
+    book = models.ForeignKey("app_b.Book", on_delete=models.CASCADE)
+    reviewer = models.ForeignKey("app_a.Author", on_delete=models.CASCADE)
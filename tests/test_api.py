@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import datetime as dt
+import io
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError
+from django.test import TestCase, override_settings
+
+import django_remake_migrations
+from django_remake_migrations.api import NewMigration
+from django_remake_migrations.conf import app_settings
+from tests.test_simple_case import (
+    migrations_for_squash_app1,
+    migrations_for_squash_app2,
+)
+from tests.utils import setup_test_apps
+
+
+class TestApi(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        with setup_test_apps(
+            tmp_path,
+            "tests.simple.app1",
+            "tests.simple.app2",
+        ) as self.app_mig_dirs:
+            migrations_for_squash_app1(self.app_mig_dirs["app1"])
+            migrations_for_squash_app2(self.app_mig_dirs["app2"])
+            yield
+
+    def test_remake(self):
+        stdout = io.StringIO()
+
+        result = django_remake_migrations.remake(
+            date=dt.date(2024, 1, 2), stdout=stdout
+        )
+
+        assert {
+            app_label: sorted(keys) for app_label, keys in result.old_migrations.items()
+        } == {
+            "app1": [
+                ("app1", "0001_initial"),
+                ("app1", "0002_something"),
+                ("app1", "0003_other_thing"),
+            ],
+            "app2": [("app2", "0001_initial")],
+        }
+        assert result.new_migrations == [
+            NewMigration(
+                app_label="app1",
+                name="0001_remaked_20240102",
+                path=self.app_mig_dirs["app1"] / "0001_remaked_20240102.py",
+                replaces=[
+                    ("app1", "0001_initial"),
+                    ("app1", "0002_something"),
+                    ("app1", "0003_other_thing"),
+                ],
+            ),
+            NewMigration(
+                app_label="app2",
+                name="0001_remaked_20240102",
+                path=self.app_mig_dirs["app2"] / "0001_remaked_20240102.py",
+                replaces=[("app2", "0001_initial")],
+            ),
+        ]
+        assert set(result.written_files) == {
+            migration.path for migration in result.new_migrations
+        }
+        assert list(result.phase_durations) == [
+            "old",
+            "make",
+            "update",
+            "restore",
+            "post",
+        ]
+        # Only the progress is reported, the commands print the outcome
+        assert stdout.getvalue().endswith("Updating new migrations...\n")
+        assert "All done!" not in stdout.getvalue()
+
+    @override_settings(REMAKE_MIGRATIONS_POST_COMMANDS=[["not_a_command"]])
+    def test_remake_writes_no_journal(self):
+        with pytest.raises(CommandError):
+            django_remake_migrations.remake(date=dt.date(2024, 1, 2))
+
+        assert not Path(app_settings.REMAKE_MIGRATIONS_JOURNAL_PATH).exists()
+        assert not Path(".remakemigrations.json").exists()
+
+    def test_resume_without_journal_path(self):
+        with pytest.raises(CommandError, match="A journal path is needed"):
+            django_remake_migrations.remake(resume=True)
+
+    def test_clear_replaces(self):
+        django_remake_migrations.remake(date=dt.date(2024, 1, 2))
+
+        dry_run = django_remake_migrations.clear_replaces(
+            dry_run=True, remove_replaced=True
+        )
+        result = django_remake_migrations.clear_replaces()
+
+        assert (
+            dry_run.cleared
+            == result.cleared
+            == [
+                ("app1", "0001_remaked_20240102"),
+                ("app2", "0001_remaked_20240102"),
+            ]
+        )
+        assert dry_run.deleted == [
+            ("app1", "0001_initial"),
+            ("app1", "0002_something"),
+            ("app1", "0003_other_thing"),
+            ("app2", "0001_initial"),
+        ]
+        assert dry_run.written_files == []
+        assert result.deleted == []
+        assert len(result.written_files) == 2
+        for path in result.written_files:
+            assert "replaces" not in path.read_text()
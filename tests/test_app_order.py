@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import shutil
+from collections.abc import Generator
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+import pytest
+from django.core.management.commands import makemigrations
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.test import TestCase, override_settings
+
+from django_remake_migrations.autodetector import generate_migrations
+from tests.test_minimize_migrations import migration_files, migrations_for_squash
+from tests.utils import run_command, setup_test_apps
+
+
+class TestAppOrder(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        with setup_test_apps(
+            tmp_path,
+            "tests.minimize.app_x",
+            "tests.minimize.app_y",
+            "tests.minimize.app_z",
+        ) as self.app_mig_dirs:
+            for mig_dir in self.app_mig_dirs.values():
+                migrations_for_squash(mig_dir)
+            yield
+
+    def test_computed_order(self):
+        out, err, returncode = run_command("remakemigrations")
+
+        assert returncode == 0
+        # app_y and app_z reference each other, app_x references app_y
+        assert (
+            out == "Removing old migration files...\n"
+            "Creating new migrations...\n"
+            "App order: app_y, app_z, app_x\n"
+            "Updating new migrations...\n"
+            "Wrote 4 file(s), skipped 0 unchanged file(s).\n"
+            "All done!\n"
+        )
+        # Only one of the apps in the cycle is split
+        assert err == (
+            "App app_y has more migrations than before... Replaces might be wrong!\n"
+        )
+        today = datetime.today()
+        assert migration_files(self.app_mig_dirs["app_x"]) == [
+            f"0001_remaked_{today:%Y%m%d}.py",
+            "__init__.py",
+        ]
+        assert migration_files(self.app_mig_dirs["app_z"]) == [
+            f"0001_remaked_{today:%Y%m%d}.py",
+            "__init__.py",
+        ]
+
+    @override_settings(REMAKE_MIGRATIONS_APP_ORDER=["app_z"])
+    def test_pinned_order(self):
+        out, err, returncode = run_command("remakemigrations")
+
+        assert returncode == 0
+        assert "App order: app_z, app_y, app_x\n" in out
+        # The pinned app is processed first, so is the one to split
+        assert err == (
+            "App app_z has more migrations than before... Replaces might be wrong!\n"
+        )
+        today = datetime.today()
+        assert migration_files(self.app_mig_dirs["app_y"]) == [
+            f"0001_remaked_{today:%Y%m%d}.py",
+            "__init__.py",
+        ]
+
+    @override_settings(REMAKE_MIGRATIONS_APP_ORDER=["app_z"])
+    def test_project_autodetector(self):
+        detected_apps: list[str] = []
+
+        class ProjectAutodetector(MigrationAutodetector):
+            def changes(self, *args: Any, **kwargs: Any) -> Any:
+                changes = super().changes(*args, **kwargs)
+                detected_apps.extend(changes)
+                return changes
+
+        class Command(makemigrations.Command):
+            autodetector = ProjectAutodetector
+
+        with mock.patch(
+            "django_remake_migrations.autodetector.get_commands",
+            return_value={"makemigrations": Command()},
+        ):
+            _, err, returncode = run_command("remakemigrations")
+
+        assert returncode == 0
+        assert sorted(detected_apps) == ["app_x", "app_y", "app_z"]
+        # The app order still applies on top of the project's autodetector
+        assert err == (
+            "App app_z has more migrations than before... Replaces might be wrong!\n"
+        )
+
+    def test_app_without_migrations_package(self):
+        shutil.rmtree(self.app_mig_dirs["app_x"])
+
+        changes = generate_migrations("remaked", app_labels=["app_x"])
+
+        assert changes["app_x"][0].name == "0001_remaked"
+        assert changes["app_x"][0].initial
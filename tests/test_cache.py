@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import datetime as dt
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from django.test import TestCase, override_settings
+
+from tests.test_simple_case import (
+    migrations_for_squash_app1,
+    migrations_for_squash_app2,
+)
+from tests.utils import run_command, setup_test_apps
+
+DATE = dt.date(2024, 5, 17)
+
+
+class TestDeterministicOutput(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        self.cache_dir = tmp_path / "cache"
+        with setup_test_apps(
+            tmp_path,
+            "tests.simple.app1",
+            "tests.simple.app2",
+        ) as self.app_mig_dirs:
+            yield
+
+    def remake(self, **options: object) -> tuple[str, dict[str, str]]:
+        for mig_dir in self.app_mig_dirs.values():
+            for path in mig_dir.glob("*.py"):
+                path.unlink()
+        migrations_for_squash_app1(self.app_mig_dirs["app1"])
+        migrations_for_squash_app2(self.app_mig_dirs["app2"])
+        out, err, returncode = run_command("remakemigrations", **options)
+        assert err == ""
+        assert returncode == 0
+        return out, {
+            f"{app_label}/{path.name}": path.read_text()
+            for app_label, mig_dir in self.app_mig_dirs.items()
+            for path in sorted(mig_dir.glob("*.py"))
+        }
+
+    def test_date(self):
+        _, first_files = self.remake(date=DATE)
+        _, second_files = self.remake(date=DATE)
+
+        assert second_files == first_files
+        assert sorted(first_files) == [
+            "app1/0001_remaked_20240517.py",
+            "app1/__init__.py",
+            "app2/0001_remaked_20240517.py",
+            "app2/__init__.py",
+        ]
+        header = first_files["app1/0001_remaked_20240517.py"].split("\n", 1)[0]
+        assert header.startswith("# Generated by Django ")
+        assert header.endswith(" on 2024-05-17 00:00")
+
+    def test_cache(self):
+        out, first_files = self.remake(date=DATE, cache_dir=str(self.cache_dir))
+
+        assert "Restoring" not in out
+        assert len(list(self.cache_dir.glob("*.json"))) == 1
+
+        out, second_files = self.remake(date=DATE, cache_dir=str(self.cache_dir))
+
+        assert out == (
+            "Removing old migration files...\n"
+            "Restoring new migrations from the cache...\n"
+            "Wrote 2 file(s), skipped 0 unchanged file(s).\n"
+            "All done!\n"
+        )
+        assert second_files == first_files
+
+    def test_cache_miss(self):
+        self.remake(date=DATE, cache_dir=str(self.cache_dir))
+        out, _ = self.remake(date=dt.date(2024, 5, 18), cache_dir=str(self.cache_dir))
+        assert "Restoring" not in out
+
+        with override_settings(REMAKE_MIGRATIONS_REPLACES_ALL=True):
+            out, _ = self.remake(date=DATE, cache_dir=str(self.cache_dir))
+        assert "Restoring" not in out
+        assert len(list(self.cache_dir.glob("*.json"))) == 3
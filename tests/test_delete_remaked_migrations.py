@@ -6,7 +6,7 @@ from pathlib import Path
 from textwrap import dedent
 
 import pytest
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from tests.utils import run_command, setup_test_apps
 
@@ -98,6 +98,7 @@ class TestDeleteRemakedMigrations(TestCase):
         ) as self.app_mig_dirs:
             yield
 
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
     def test_basic_case(self):
         """Test removing replaces from a single remaked migration."""
         app1_mig_dir = self.app_mig_dirs["app1"]
@@ -109,6 +110,7 @@ class TestDeleteRemakedMigrations(TestCase):
 
         assert returncode == 0
         assert "Successfully processed 1 migration(s)" in out
+        assert "Wrote 1 file(s), skipped 0 unchanged file(s)." in out
         assert err == ""
 
         # Verify replaces was removed
@@ -226,6 +228,7 @@ class TestDeleteRemakedMigrations(TestCase):
         assert "replaces" not in content
         assert "initial = True" in content
 
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
     def test_multi_line_replaces(self):
         """Test handling of multi-line replaces attribute."""
         app1_mig_dir = self.app_mig_dirs["app1"]
@@ -305,6 +308,7 @@ class TestDeleteRemakedMigrations(TestCase):
         assert "replaces" not in remaked_mig.read_text()
         assert "replaces" in regular_mig.read_text()  # Regular migration untouched
 
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
     def test_remove_replaced(self):
         """Test removing replaces with deleting replaced migrations."""
         app1_mig_dir = self.app_mig_dirs["app1"]
@@ -359,6 +363,7 @@ class TestDeleteRemakedMigrations(TestCase):
         assert old_file_01.exists() is True
         assert old_file_02.exists() is True
 
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
     def test_remove_replaced_missing(self):
         """Test removing replaces with deleting replaced migrations."""
         app1_mig_dir = self.app_mig_dirs["app1"]
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Callable
+from pathlib import Path
+from typing import TextIO
+
+from django_remake_migrations.disk import write_if_changed
+
+
+def writing(content: str) -> Callable[[TextIO], None]:
+    """Callable writing the content to a file object."""
+
+    def write(fh: TextIO) -> None:
+        fh.write(content)
+
+    return write
+
+
+def test_write_if_changed(tmp_path: Path) -> None:
+    path = tmp_path / "0001_initial.py"
+
+    assert write_if_changed(path, "content\n")
+    assert path.read_text() == "content\n"
+
+    # Same content, the file isn't touched
+    os.utime(path, (0, 0))
+    assert not write_if_changed(path, writing("content\n"))
+    assert path.stat().st_mtime == 0
+
+    # Same size, different content
+    assert write_if_changed(path, writing("CONTENT\n"))
+    assert path.read_text() == "CONTENT\n"
+    assert path.stat().st_mtime != 0
+
+    assert write_if_changed(path, "")
+    assert path.read_text() == ""
+
+
+def test_write_if_changed_formatter(tmp_path: Path) -> None:
+    path = tmp_path / "0001_initial.py"
+
+    def upper(new_path: Path) -> None:
+        assert new_path != path
+        new_path.write_text(new_path.read_text().upper())
+
+    assert write_if_changed(path, writing("content\n"), upper)
+    assert path.read_text() == "CONTENT\n"
+
+    # Compared once formatted
+    os.utime(path, (0, 0))
+    assert not write_if_changed(path, writing("content\n"), upper)
+    assert path.stat().st_mtime == 0
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+import sys
+from collections.abc import Generator
+from datetime import datetime
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+from unittest import mock
+
+import pytest
+from django.core.management import CommandError
+from django.test import TestCase, override_settings
+
+from django_remake_migrations.formatting import _black_mode, format_files
+from tests.test_delete_remaked_migrations import create_remaked_migration
+from tests.test_simple_case import (
+    migrations_for_squash_app1,
+    migrations_for_squash_app2,
+)
+from tests.utils import run_command, setup_test_apps
+
+UNFORMATTED = """\
+x = {  'a':37,'b':42,
+'c':927}
+foo(argument_number_one, argument_number_two,)
+def f(a,):
+    return some_function_name(argument_number_one, argument_number_two)[0]
+with (open("a") as a, open("b") as b):
+    pass
+"""
+
+
+def fake_black() -> ModuleType:
+    """A black module recording the files it formats."""
+    black = ModuleType("black")
+    black.DEFAULT_LINE_LENGTH = 88  # type: ignore[attr-defined]
+    black.Mode = SimpleNamespace  # type: ignore[attr-defined]
+    black.TargetVersion = {}  # type: ignore[attr-defined]
+    black.WriteBack = SimpleNamespace(YES="yes")  # type: ignore[attr-defined]
+    black.find_pyproject_toml = mock.Mock(return_value=None)  # type: ignore[attr-defined]
+    black.format_file_in_place = mock.Mock(return_value=True)  # type: ignore[attr-defined]
+    return black
+
+
+class TestFormatting(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        with setup_test_apps(
+            tmp_path,
+            "tests.simple.app1",
+            "tests.simple.app2",
+        ) as self.app_mig_dirs:
+            migrations_for_squash_app1(self.app_mig_dirs["app1"])
+            migrations_for_squash_app2(self.app_mig_dirs["app2"])
+            yield
+
+    def remade_files(self) -> list[Path]:
+        remade_name = f"0001_remaked_{datetime.today():%Y%m%d}.py"
+        return [
+            self.app_mig_dirs["app2"] / remade_name,
+            self.app_mig_dirs["app1"] / remade_name,
+        ]
+
+    def test_in_process(self):
+        black = fake_black()
+        with mock.patch.dict(sys.modules, {"black": black}):
+            _, _, returncode = run_command("remakemigrations")
+
+        assert returncode == 0
+        # Each file is written twice, formatted before each comparison
+        formatted = [call.args[0] for call in black.format_file_in_place.call_args_list]
+        assert [path.name for path in formatted] == [
+            path.name for path in self.remade_files() for _ in range(2)
+        ]
+        assert not any(path.exists() for path in formatted)
+        mode = black.format_file_in_place.call_args.kwargs["mode"]
+        assert mode.line_length == 88
+        # The configuration is read once per run
+        black.find_pyproject_toml.assert_called_once()
+
+    def test_second_run_unchanged(self):
+        pytest.importorskip("black")
+        with (
+            override_settings(REMAKE_MIGRATIONS_POST_COMMANDS=[["not_a_command"]]),
+            pytest.raises(CommandError, match="Unknown command: 'not_a_command'"),
+        ):
+            run_command("remakemigrations")
+        contents = [path.read_text() for path in self.remade_files()]
+
+        out, err, returncode = run_command(
+            "remakemigrations", phase="update", reset_phase=True
+        )
+
+        assert returncode == 0, err
+        # The formatted files compare equal with the formatted output
+        assert out == (
+            "Updating new migrations...\n"
+            "Wrote 0 file(s), skipped 2 unchanged file(s).\n"
+            "All done!\n"
+        )
+        assert [path.read_text() for path in self.remade_files()] == contents
+
+    def test_single_subprocess(self):
+        # Importing a module set to None raises an ImportError
+        with (
+            mock.patch.dict(sys.modules, {"black": None}),
+            mock.patch(
+                "django_remake_migrations.formatting.run_formatters"
+            ) as run_formatters,
+        ):
+            _, _, returncode = run_command("remakemigrations")
+
+        assert returncode == 0
+        run_formatters.assert_called_once()
+        assert run_formatters.call_args.args[0] == [
+            str(path) for path in self.remade_files()
+        ]
+
+    def test_delete_remaked_migrations(self):
+        black = fake_black()
+        app1_mig_dir = self.app_mig_dirs["app1"]
+        for path in app1_mig_dir.iterdir():
+            path.unlink()
+        (app1_mig_dir / "__init__.py").touch()
+        mig_file = create_remaked_migration(app1_mig_dir, "0001")
+
+        with mock.patch.dict(sys.modules, {"black": black}):
+            _, _, returncode = run_command("delete_remaked_migrations")
+
+        assert returncode == 0
+        black.format_file_in_place.assert_called_once()
+        assert black.format_file_in_place.call_args.args[0].name == mig_file.name
+        assert "replaces" not in mig_file.read_text()
+
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
+    def test_disabled(self):
+        black = fake_black()
+        with mock.patch.dict(sys.modules, {"black": black}):
+            _, _, returncode = run_command("remakemigrations")
+
+        assert returncode == 0
+        black.format_file_in_place.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "pyproject",
+    [
+        "",
+        "[tool.black]\nline-length = 40\nskip-string-normalization = true\n",
+        "[tool.black]\nskip-magic-trailing-comma = true\npreview = true\n",
+        "[tool.black]\nunstable = true\n",
+        '[tool.black]\npreview = true\nenable-unstable-feature = ["hug_comparator"]\n',
+        '[project]\nname = "project"\nrequires-python = ">=3.11"\n',
+        '[tool.black]\ntarget-version = ["py310"]\nexclude = "migrations"\n',
+    ],
+)
+@override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=True)
+def test_same_as_black_cli(tmp_path: Path, pyproject: str) -> None:
+    pytest.importorskip("black")
+    (tmp_path / "pyproject.toml").write_text(pyproject)
+    in_process = tmp_path / "in_process.py"
+    in_process.write_text(UNFORMATTED)
+    cli = tmp_path / "cli.py"
+    cli.write_text(UNFORMATTED)
+
+    with mock.patch(
+        "django_remake_migrations.formatting.run_formatters"
+    ) as run_formatters:
+        format_files([in_process])
+    subprocess.run(  # noqa: S603
+        [sys.executable, "-m", "black", "--quiet", "--fast", str(cli)], check=True
+    )
+
+    run_formatters.assert_not_called()
+    assert in_process.read_text() == cli.read_text()
+    assert in_process.read_text() != UNFORMATTED
+
+
+@pytest.mark.parametrize(
+    "pyproject",
+    [
+        '[tool.black]\nforce-exclude = "excluded"\n',
+        '[tool.black]\nrequired-version = "1"\n',
+        # Requires preview
+        '[tool.black]\nenable-unstable-feature = ["hug_comparator"]\n',
+        '[tool.black]\ntarget-version = ["py1"]\n',
+        "[tool.black]\nline-length = [\n",
+    ],
+)
+def test_mode_not_reproducible(tmp_path: Path, pyproject: str) -> None:
+    black = pytest.importorskip("black")
+    (tmp_path / "pyproject.toml").write_text(pyproject)
+
+    assert _black_mode(black, [tmp_path / "module.py"]) is None
+
+
+@override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=True)
+def test_force_exclude(tmp_path: Path) -> None:
+    pytest.importorskip("black")
+    if shutil.which("black") is None:
+        pytest.skip("The black executable isn't on the PATH")
+    (tmp_path / "pyproject.toml").write_text(
+        '[tool.black]\nforce-exclude = "excluded"\n'
+    )
+    excluded = tmp_path / "excluded.py"
+    excluded.write_text(UNFORMATTED)
+    included = tmp_path / "included.py"
+    included.write_text(UNFORMATTED)
+
+    format_files([excluded, included])
+
+    # Formatted by the black executable, which honours force-exclude
+    assert excluded.read_text() == UNFORMATTED
+    assert included.read_text() != UNFORMATTED
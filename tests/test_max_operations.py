@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+from collections.abc import Generator
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError
+from django.db import OperationalError, migrations
+from django.db.migrations import Migration
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, override_settings
+
+from django_remake_migrations.benchmark import database_connection
+from django_remake_migrations.disk import unload_app_migrations
+from django_remake_migrations.planner import split_migrations
+from tests.test_minimize_migrations import migration_files, migrations_for_squash
+from tests.utils import EMPTY_MIGRATION, run_command, setup_test_apps
+
+
+def make_migration(
+    app_label: str, name: str, operations: int, dependencies: list[tuple[str, str]]
+) -> Migration:
+    # Like the Migration classes of migration files
+    migration_class = type(
+        "Migration",
+        (Migration,),
+        {
+            "operations": [
+                migrations.CreateModel(f"Model{index}", fields=[])
+                for index in range(operations)
+            ],
+            "dependencies": dependencies,
+        },
+    )
+    return migration_class(name, app_label)
+
+
+def test_split_migrations():
+    remade = {
+        ("a", "0001_remaked"): make_migration("a", "0001_remaked", 5, []),
+        ("a", "0002_remaked"): make_migration(
+            "a", "0002_remaked", 1, [("a", "0001_remaked")]
+        ),
+        ("b", "0001_remaked"): make_migration(
+            "b", "0001_remaked", 2, [("a", "0001_remaked")]
+        ),
+    }
+
+    parts = split_migrations(remade, 2)
+
+    assert parts == {
+        ("a", "0001_remaked"): [
+            ("a", "0001_remaked"),
+            ("a", "0002_remaked"),
+            ("a", "0003_remaked"),
+        ],
+        ("a", "0002_remaked"): [("a", "0004_remaked")],
+    }
+    assert sorted(remade) == [
+        ("a", "0001_remaked"),
+        ("a", "0002_remaked"),
+        ("a", "0003_remaked"),
+        ("a", "0004_remaked"),
+        ("b", "0001_remaked"),
+    ]
+    assert [len(remade[key].operations) for key in sorted(remade)] == [2, 2, 1, 1, 2]
+    # Operations keep their order across the parts
+    assert [
+        operation.describe()
+        for key in sorted(remade)[:3]
+        for operation in remade[key].operations
+    ] == [f"Create model Model{index}" for index in range(5)]
+    assert remade["a", "0001_remaked"].dependencies == []
+    assert remade["a", "0002_remaked"].dependencies == [("a", "0001_remaked")]
+    assert remade["a", "0003_remaked"].dependencies == [("a", "0002_remaked")]
+    # Dependencies on a split migration point to its last part
+    assert remade["a", "0004_remaked"].dependencies == [("a", "0003_remaked")]
+    assert remade["b", "0001_remaked"].dependencies == [("a", "0003_remaked")]
+
+
+def test_split_migrations_max_migrations():
+    remade = {
+        ("a", "0001_remaked"): make_migration("a", "0001_remaked", 6, []),
+        ("a", "0002_remaked"): make_migration(
+            "a", "0002_remaked", 3, [("a", "0001_remaked")]
+        ),
+    }
+
+    parts = split_migrations(remade, 1, max_migrations={"a": 3})
+
+    # The extra part goes to the migration with the most operations
+    assert parts == {
+        ("a", "0001_remaked"): [("a", "0001_remaked"), ("a", "0002_remaked")],
+        ("a", "0002_remaked"): [("a", "0003_remaked")],
+    }
+    assert [len(remade[key].operations) for key in sorted(remade)] == [3, 3, 3]
+
+
+def test_split_migrations_small_enough():
+    remade = {("a", "0001_remaked"): make_migration("a", "0001_remaked", 2, [])}
+
+    assert split_migrations(remade, 2) == {}
+    assert list(remade) == [("a", "0001_remaked")]
+
+
+@override_settings(
+    REMAKE_MIGRATIONS_APP_ORDER=["app_x"],
+    REMAKE_MIGRATIONS_MINIMIZE_MIGRATIONS=True,
+    REMAKE_MIGRATIONS_MAX_OPERATIONS=1,
+)
+class TestMaxOperations(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        with setup_test_apps(
+            tmp_path,
+            "tests.minimize.app_x",
+            "tests.minimize.app_y",
+            "tests.minimize.app_z",
+        ) as self.app_mig_dirs:
+            for mig_dir in self.app_mig_dirs.values():
+                migrations_for_squash(mig_dir)
+            (self.app_mig_dirs["app_y"] / "0002_second.py").write_text(EMPTY_MIGRATION)
+            (self.app_mig_dirs["app_y"] / "0003_third.py").write_text(EMPTY_MIGRATION)
+            self.tmp_path = tmp_path
+            yield
+
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
+    def test_split(self):
+        out, err, returncode = run_command("remakemigrations")
+
+        assert returncode == 0, err
+        assert err == ""
+        assert "Merged 1 migration(s)...\nSplit 1 migration(s)...\n" in out
+
+        today = datetime.today()
+        assert migration_files(self.app_mig_dirs["app_y"]) == [
+            f"0001_remaked_{today:%Y%m%d}.py",
+            f"0002_remaked_{today:%Y%m%d}.py",
+            f"0003_remaked_{today:%Y%m%d}.py",
+            "__init__.py",
+        ]
+        contents = [
+            path.read_text() for path in sorted(self.app_mig_dirs["app_y"].glob("0*"))
+        ]
+        # Each part has a single operation
+        assert [content.count("        migrations.") for content in contents] == [
+            1,
+            1,
+            1,
+        ]
+        # Each part replaces its own old migrations
+        assert "replaces = [('app_y', '0001_initial')]" in contents[0]
+        assert "replaces = [('app_y', '0002_second')]" in contents[1]
+        assert "replaces = [('app_y', '0003_third')]" in contents[2]
+        assert f"('app_y', '0001_remaked_{today:%Y%m%d}')," in contents[1]
+        content = (
+            self.app_mig_dirs["app_z"] / f"0001_remaked_{today:%Y%m%d}.py"
+        ).read_text()
+        assert f"('app_y', '0002_remaked_{today:%Y%m%d}')" in content
+
+    def test_rerun_after_failed_part(self):
+        _, err, returncode = run_command("remakemigrations")
+        assert returncode == 0, err
+        today = datetime.today()
+        second_part = ("app_y", f"0002_remaked_{today:%Y%m%d}")
+        second_path = self.app_mig_dirs["app_y"] / f"{second_part[1]}.py"
+        content = second_path.read_text()
+        failing_sql = "SELECT id FROM missing"
+        second_path.write_text(
+            content[: content.rindex("    ]")]
+            + f"        migrations.RunSQL({failing_sql!r}),\n"
+            + "    ]\n"
+        )
+        for app_label in self.app_mig_dirs:
+            # Load the migrations as they were rewritten
+            unload_app_migrations(app_label)
+        settings_dict = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": str(self.tmp_path / "split.sqlite3"),
+        }
+
+        with database_connection("split", settings_dict) as connection:
+            executor = MigrationExecutor(connection)
+            with pytest.raises(OperationalError, match="no such table: missing"):
+                executor.migrate(executor.loader.graph.leaf_nodes())
+
+            executor = MigrationExecutor(connection)
+            plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+        # The first part is applied, the failed one is still pending
+        assert ("app_y", f"0001_remaked_{today:%Y%m%d}") in (
+            executor.loader.applied_migrations
+        )
+        assert second_part not in executor.loader.applied_migrations
+        assert second_part in [
+            (migration.app_label, migration.name) for migration, _ in plan
+        ]
+
+    def test_not_enough_old_migrations(self):
+        (self.app_mig_dirs["app_y"] / "0003_third.py").unlink()
+
+        out, err, returncode = run_command("remakemigrations")
+
+        assert returncode == 0, err
+        # The parts couldn't replace their own old migrations
+        assert err == (
+            "App app_y doesn't have enough old migrations to split its new "
+            "migrations into parts of 1 operations.\n"
+        )
+        assert "Split" not in out
+        today = datetime.today()
+        assert migration_files(self.app_mig_dirs["app_y"]) == [
+            f"0001_remaked_{today:%Y%m%d}.py",
+            f"0002_remaked_{today:%Y%m%d}.py",
+            "__init__.py",
+        ]
+
+    @override_settings(REMAKE_MIGRATIONS_REPLACES_ALL=True)
+    def test_replaces_all(self):
+        with pytest.raises(CommandError, match="REMAKE_MIGRATIONS_REPLACES_ALL"):
+            run_command("remakemigrations")
+
+    @override_settings(REMAKE_MIGRATIONS_MINIMIZE_MIGRATIONS=False)
+    def test_streaming(self):
+        with pytest.raises(CommandError, match="REMAKE_MIGRATIONS_MAX_OPERATIONS"):
+            run_command("remakemigrations", streaming=True)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from django.test import TestCase
+
+from tests.test_simple_case import (
+    migrations_for_squash_app1,
+    migrations_for_squash_app2,
+)
+from tests.utils import run_command, setup_test_apps
+
+
+class TestMeasure(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        self.tmp_path = tmp_path
+        with setup_test_apps(
+            tmp_path,
+            "tests.simple.app1",
+            "tests.simple.app2",
+        ) as self.app_mig_dirs:
+            migrations_for_squash_app1(self.app_mig_dirs["app1"])
+            migrations_for_squash_app2(self.app_mig_dirs["app2"])
+            yield
+
+    def test_markdown_report(self):
+        out, err, returncode = run_command("remakemigrations", measure=True)
+
+        assert err == ""
+        assert returncode == 0
+        assert out.startswith(
+            "Measuring old migrations...\n"
+            "Removing old migration files...\n"
+            "Creating new migrations...\n"
+            "App order: app2, app1\n"
+            "Updating new migrations...\n"
+            "Measuring new migrations...\n"
+            "| Metric | Before | After | Change |\n"
+        )
+        # 4 first party migrations + 2 from contenttypes, down to 2 + 2
+        assert "| Graph nodes | 6 | 4 | -33.3% |\n" in out
+        assert "| Fresh migrate time (s) |" in out
+        assert out.endswith("All done!\n")
+
+    def test_json_report(self):
+        report_path = self.tmp_path / "report.json"
+
+        out, err, returncode = run_command(
+            "remakemigrations", measure=True, measure_output=str(report_path)
+        )
+
+        assert err == ""
+        assert returncode == 0
+        assert f"Measurements written to {report_path}\n" in out
+
+        report = json.loads(report_path.read_text())
+        assert report["before"]["nodes"] == 6
+        assert report["after"]["nodes"] == 4
+        # Old migrations were empty, new ones create the models
+        assert report["after"]["operations"] > report["before"]["operations"]
+        assert report["after"]["size"] > 0
+        assert report["after"]["load_time"] > 0
+        assert report["after"]["migrate_time"] > 0
+
+    def test_migrations_not_applicable_to_sqlite(self):
+        migration_0003 = self.app_mig_dirs["app1"] / "0003_other_thing.py"
+        migration_0003.write_text(
+            migration_0003.read_text().replace(
+                "operations = []",
+                "operations = [migrations.RunSQL('CREATE EXTENSION hstore')]",
+            )
+        )
+
+        out, err, returncode = run_command("remakemigrations", measure=True)
+
+        assert returncode == 0
+        assert err == (
+            "The old migrations can't be applied to SQLite, the fresh migrate "
+            'time isn\'t measured. OperationalError: near "EXTENSION": syntax error\n'
+        )
+        # The other metrics are still measured
+        assert "| Graph nodes | 6 | 4 | -33.3% |\n" in out
+        assert "| Fresh migrate time (s) | n/a | " in out
+        assert out.endswith("All done!\n")
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from django.db import models
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.test import TestCase, override_settings
+
+from tests.test_minimize_migrations import migrations_for_squash
+from tests.utils import run_command, setup_test_apps
+
+
+# Make migrations in two runs, which build the state of the models twice
+@override_settings(
+    REMAKE_MIGRATIONS_FIRST_APPS=["app1"], REMAKE_MIGRATIONS_MEMOIZE_FIELDS=True
+)
+class TestFieldMemoization(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        self.tmp_path = tmp_path
+        with setup_test_apps(
+            tmp_path,
+            "tests.minimize.app_x",
+            "tests.minimize.app_y",
+            "tests.minimize.app_z",
+            "tests.simple.app1",
+            "tests.simple.app2",
+        ) as self.app_mig_dirs:
+            yield
+
+    def remake(self, **options: object) -> dict[str, bytes]:
+        for mig_dir in self.app_mig_dirs.values():
+            for path in mig_dir.glob("*.py"):
+                path.unlink()
+            migrations_for_squash(mig_dir)
+        _, err, returncode = run_command(
+            "remakemigrations", date=dt.date(2024, 6, 1), **options
+        )
+        assert returncode == 0, err
+        return {
+            f"{app_label}/{path.name}": path.read_bytes()
+            for app_label, mig_dir in self.app_mig_dirs.items()
+            for path in sorted(mig_dir.glob("*.py"))
+        }
+
+    def test_same_output(self):
+        with override_settings(REMAKE_MIGRATIONS_MEMOIZE_FIELDS=False):
+            plain_files = self.remake()
+        clone = models.Field.__dict__["clone"]
+        deep_deconstruct = MigrationAutodetector.__dict__["deep_deconstruct"]
+
+        memoized_files = self.remake()
+
+        assert memoized_files == plain_files
+        # The Django internals are restored
+        assert models.Field.__dict__["clone"] is clone
+        assert MigrationAutodetector.__dict__["deep_deconstruct"] is deep_deconstruct
+
+    def test_counters(self):
+        output = self.tmp_path / "profile.json"
+
+        self.remake(profile=True, profile_output=str(output))
+
+        cache = json.loads(output.read_text())["cache"]
+        assert cache["deconstruct"]["hits"] > 0
+        assert cache["deconstruct"]["misses"] > 0
+        assert cache["deep_deconstruct"]["hits"] > 0
+        assert cache["serialize"]["misses"] > 0
+
+    @override_settings(REMAKE_MIGRATIONS_MEMOIZE_FIELDS=False)
+    def test_disabled(self):
+        out, err, returncode = run_command("remakemigrations", profile=True)
+
+        assert returncode == 0, err
+        assert "| Cache | Hits | Misses |" not in out
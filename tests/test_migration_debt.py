@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError
+from django.test import TestCase
+
+from tests.test_simple_case import (
+    migrations_for_squash_app1,
+    migrations_for_squash_app2,
+)
+from tests.utils import run_command, setup_test_apps
+
+
+class TestMigrationDebt(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        self.tmp_path = tmp_path
+        with setup_test_apps(
+            tmp_path,
+            "tests.simple.app1",
+            "tests.simple.app2",
+        ) as self.app_mig_dirs:
+            migrations_for_squash_app1(self.app_mig_dirs["app1"])
+            migrations_for_squash_app2(self.app_mig_dirs["app2"])
+            yield
+
+    def test_markdown_report(self):
+        out, err, returncode = run_command("migration_debt")
+
+        assert returncode == 0
+        assert err == ""
+        lines = out.splitlines()
+        assert lines[0] == (
+            "| App | Migrations | Size (bytes) | Import time (s) | Operations "
+            "| Graph depth | Migrate time (s) |"
+        )
+        assert [line.split(" | ")[0] for line in lines[2:]] == [
+            "| app1",
+            "| app2",
+            "| Total",
+        ]
+        assert lines[2].startswith("| app1 | 3 | ")
+        assert lines[4].startswith("| Total | 4 | ")
+
+    def test_json_report(self):
+        report_path = self.tmp_path / "debt.json"
+        out, _, returncode = run_command(
+            "migration_debt", "app1", "--format", "json", "--output", str(report_path)
+        )
+
+        assert returncode == 0
+        assert out == ""
+        report = json.loads(report_path.read_text())
+        assert [app["app_label"] for app in report["apps"]] == ["app1"]
+        app1 = report["apps"][0]
+        assert app1["migrations"] == 3
+        assert app1["depth"] == 3
+        assert app1["operations"] == 0
+        assert app1["size"] > 0
+        assert app1["migrate_time"] > 0
+
+    def test_fail_over(self):
+        with pytest.raises(
+            CommandError,
+            match=r"^App app1 is over the migrations threshold: 3 > 2$",
+        ):
+            run_command("migration_debt", "--fail-over", "migrations=2")
+
+        _, _, returncode = run_command("migration_debt", "--fail-over", "migrations=3")
+        assert returncode == 0
+
+    def test_fail_over_invalid(self):
+        with pytest.raises(CommandError, match="expected METRIC=VALUE"):
+            run_command("migration_debt", "--fail-over", "bytes=2")
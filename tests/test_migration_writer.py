@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import datetime as dt
+from io import StringIO
+
+import pytest
+from django.db import migrations, models
+from django.db.migrations.writer import MigrationWriter
+
+from django_remake_migrations.management.migration_writer import (
+    CustomMigrationWriter,
+)
+
+
+def make_migration(**attributes: object) -> migrations.Migration:
+    migration = migrations.Migration("0001_remaked_20240517", "app1")
+    migration.dependencies = [  # type: ignore[misc]
+        ("app2", "0001_remaked_20240517"),
+        ("__setting__", "AUTH_USER_MODEL"),
+    ]
+    migration.operations = [  # type: ignore[misc]
+        migrations.CreateModel(
+            name="Book",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                ("published", models.DateField(default=dt.date(2024, 1, 1))),
+            ],
+        ),
+        migrations.RunSQL("SELECT 1", migrations.RunSQL.noop),
+    ]
+    for name, value in attributes.items():
+        setattr(migration, name, value)
+    return migration
+
+
+@pytest.mark.parametrize(
+    "attributes",
+    [
+        {},
+        {"initial": True},
+        {"replaces": [("app1", "0001_initial"), ("app1", "0002_book")]},
+        {"operations": [], "dependencies": []},
+    ],
+)
+def test_same_output_as_django(attributes):
+    migration = make_migration(**attributes)
+
+    expected = MigrationWriter(migration, include_header=False).as_string()
+    writer = CustomMigrationWriter(migration, include_header=False)
+
+    assert writer.as_string() == expected
+    output = StringIO()
+    writer.write(output)
+    assert output.getvalue() == expected
+
+
+def test_header():
+    migration = make_migration()
+
+    text = CustomMigrationWriter(
+        migration, generated_on=dt.date(2024, 5, 17)
+    ).as_string()
+
+    header, rest = text.split("\n", 1)
+    assert header.startswith("# Generated by Django ")
+    assert header.endswith(" on 2024-05-17 00:00")
+    assert rest == "\n" + MigrationWriter(migration, include_header=False).as_string()
+
+
+def test_extra_attributes():
+    migration = make_migration(
+        initial=True,
+        replaces=[("app1", "0001_initial")],
+        run_before=[("other", "0001_initial")],
+    )
+
+    text = CustomMigrationWriter(
+        migration, include_header=False, replaces_module="_replaced"
+    ).as_string()
+
+    assert text.startswith(
+        "import datetime\n"
+        "from django.conf import settings\n"
+        "from django.db import migrations, models\n"
+        "from . import _replaced\n"
+        "\n\n"
+        "class Migration(migrations.Migration):\n"
+        "    run_before = [('other', '0001_initial')]\n"
+        "\n"
+        "    replaces = _replaced.REPLACED\n"
+        "\n"
+        "    initial = True\n"
+        "\n"
+        "    dependencies = [\n"
+    )
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Generator
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from django.test import TestCase, override_settings
+
+from tests.utils import EMPTY_MIGRATION, run_command, setup_test_apps
+
+
+def migrations_for_squash(mig_dir: Path) -> None:
+    (mig_dir / "__init__.py").touch()
+    initial_0001 = mig_dir / "0001_initial.py"
+    initial_0001.write_text(EMPTY_MIGRATION)
+
+
+def migration_files(mig_dir: Path) -> list[str]:
+    return sorted(file for file in os.listdir(mig_dir) if file != "__pycache__")
+
+
+# Process app_x first, which forces Django to split it
+@override_settings(REMAKE_MIGRATIONS_APP_ORDER=["app_x"])
+class TestMinimizeMigrations(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        with setup_test_apps(
+            tmp_path,
+            "tests.minimize.app_x",
+            "tests.minimize.app_y",
+            "tests.minimize.app_z",
+        ) as self.app_mig_dirs:
+            for mig_dir in self.app_mig_dirs.values():
+                migrations_for_squash(mig_dir)
+            yield
+
+    def test_split_without_minimize(self):
+        _, err, returncode = run_command("remakemigrations")
+
+        assert returncode == 0
+        # app_x isn't part of the cycle between app_y and app_z, but is split
+        assert err == (
+            "App app_x has more migrations than before... Replaces might be wrong!\n"
+            "App app_y has more migrations than before... Replaces might be wrong!\n"
+        )
+        today = datetime.today()
+        assert migration_files(self.app_mig_dirs["app_x"]) == [
+            f"0001_remaked_{today:%Y%m%d}.py",
+            f"0002_remaked_{today:%Y%m%d}.py",
+            "__init__.py",
+        ]
+
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
+    @override_settings(REMAKE_MIGRATIONS_MINIMIZE_MIGRATIONS=True)
+    def test_minimize(self):
+        out, err, returncode = run_command("remakemigrations")
+
+        assert returncode == 0
+        assert (
+            out == "Removing old migration files...\n"
+            "Creating new migrations...\n"
+            "App order: app_x, app_y, app_z\n"
+            "Updating new migrations...\n"
+            "Merged 1 migration(s)...\n"
+            "Wrote 5 file(s), skipped 0 unchanged file(s).\n"
+            "All done!\n"
+        )
+        # app_y really needs to be split, because of the cycle with app_z
+        assert err == (
+            "App app_y has more migrations than before... Replaces might be wrong!\n"
+        )
+
+        today = datetime.today()
+        remade_name = f"0001_remaked_{today:%Y%m%d}"
+        assert migration_files(self.app_mig_dirs["app_x"]) == [
+            f"{remade_name}.py",
+            "__init__.py",
+        ]
+        content = (self.app_mig_dirs["app_x"] / f"{remade_name}.py").read_text()
+        # The foreign key is back in the CreateModel operation
+        assert "migrations.AddField" not in content
+        assert "('item', models.ForeignKey(" in content
+        assert (
+            "    dependencies = [\n"
+            f"        ('app_y', '0001_remaked_{today:%Y%m%d}'),\n"
+            "    ]\n" in content
+        )
+        assert "replaces = [('app_x', '0001_initial')]" in content
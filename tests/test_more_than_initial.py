@@ -6,8 +6,10 @@ from datetime import datetime
 from pathlib import Path
 
 import pytest
+from django.db.migrations.loader import MigrationLoader
 from django.test import TestCase, override_settings
 
+from django_remake_migrations.benchmark import MigrationSetStats, measure_migration_set
 from tests.utils import EMPTY_MIGRATION, run_command, setup_test_apps
 
 
@@ -33,6 +35,7 @@ class TestReplacesWarning(TestCase):
         ) as self.app_mig_dirs:
             yield
 
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
     def test_prints_replaces_warning(self):
         app_a_mig_dir = self.app_mig_dirs["app_a"]
         migrations_for_squash_app_a(app_a_mig_dir)
@@ -44,7 +47,9 @@ class TestReplacesWarning(TestCase):
         assert (
             out == "Removing old migration files...\n"
             "Creating new migrations...\n"
+            "App order: app_a, app_b\n"
             "Updating new migrations...\n"
+            "Wrote 3 file(s), skipped 0 unchanged file(s).\n"
             "All done!\n"
         )
         assert (
@@ -98,6 +103,7 @@ class TestReplacesAll(TestCase):
         ) as self.app_mig_dirs:
             yield
 
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
     @override_settings(REMAKE_MIGRATIONS_REPLACES_ALL=True)
     def test_replaces_all(self):
         app_a_mig_dir = self.app_mig_dirs["app_a"]
@@ -110,7 +116,9 @@ class TestReplacesAll(TestCase):
         assert (
             out == "Removing old migration files...\n"
             "Creating new migrations...\n"
+            "App order: app_a, app_b\n"
             "Updating new migrations...\n"
+            "Wrote 3 file(s), skipped 0 unchanged file(s).\n"
             "All done!\n"
         )
         assert err == ""
@@ -139,6 +147,7 @@ class TestReplaceOtherApps(TestCase):
         ) as self.app_mig_dirs:
             yield
 
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
     @override_settings(
         REMAKE_MIGRATIONS_REPLACES_ALL=True,
         REMAKE_MIGRATIONS_REPLACE_OTHER_APP={"app_a": ["app_b"]},
@@ -154,7 +163,9 @@ class TestReplaceOtherApps(TestCase):
         assert (
             out == "Removing old migration files...\n"
             "Creating new migrations...\n"
+            "App order: app_a, app_b\n"
             "Updating new migrations...\n"
+            "Wrote 3 file(s), skipped 0 unchanged file(s).\n"
             "All done!\n"
         )
         assert err == ""
@@ -177,3 +188,84 @@ class TestReplaceOtherApps(TestCase):
             "replaces = [('app_a', '0001_initial'), ('app_b', '0001_initial')]"
             in content_app_a_second
         )
+
+
+def many_migrations(mig_dir: Path, app_label: str, count: int) -> None:
+    (mig_dir / "__init__.py").touch()
+    previous = None
+    for number in range(1, count + 1):
+        name = f"{number:04d}_step"
+        dependencies = f"[({app_label!r}, {previous!r})]" if previous else "[]"
+        (mig_dir / f"{name}.py").write_text(
+            "from django.db import migrations\n"
+            "class Migration(migrations.Migration):\n"
+            f"    dependencies = {dependencies}\n"
+        )
+        previous = name
+
+
+@override_settings(
+    REMAKE_MIGRATIONS_REPLACES_ALL=True,
+    REMAKE_MIGRATIONS_REPLACE_OTHER_APP={"app_a": ["app_b"]},
+)
+class TestReplacesModule(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        with setup_test_apps(
+            tmp_path,
+            "tests.more_than_initial.app_a",
+            "tests.more_than_initial.app_b",
+        ) as self.app_mig_dirs:
+            yield
+
+    def remake(self) -> MigrationSetStats:
+        for app_label, mig_dir in self.app_mig_dirs.items():
+            for path in mig_dir.glob("*.py"):
+                path.unlink()
+            many_migrations(mig_dir, app_label, 100)
+        _, err, returncode = run_command("remakemigrations")
+        assert err == ""
+        assert returncode == 0
+        return measure_migration_set(self.app_mig_dirs)
+
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
+    @override_settings(REMAKE_MIGRATIONS_REPLACES_MODULE=True)
+    def test_replaces_module(self):
+        self.remake()
+
+        app_a_mig_dir = self.app_mig_dirs["app_a"]
+        today = datetime.today()
+        for name in (f"0001_remaked_{today:%Y%m%d}", f"0002_remaked_{today:%Y%m%d}"):
+            content = (app_a_mig_dir / f"{name}.py").read_text()
+            assert "from . import _replaced\n" in content
+            assert "    replaces = _replaced.REPLACED\n" in content
+            assert "('app_a', '0001_step')" not in content
+        replaced = (app_a_mig_dir / "_replaced.py").read_text()
+        assert replaced.startswith(
+            '"""Migrations replaced by the remade migrations of this app."""\n\n'
+            "REPLACED = [\n"
+            "    ('app_a', '0001_step'),\n"
+            "    ('app_a', '0002_step'),\n"
+        )
+        assert replaced.endswith("    ('app_b', '0100_step'),\n]\n")
+
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        assert len(loader.replacements) == 3
+        remade = loader.graph.nodes["app_a", f"0002_remaked_{today:%Y%m%d}"]
+        assert len(remade.replaces) == 200
+
+        _, err, returncode = run_command("delete_remaked_migrations")
+        assert err == ""
+        assert returncode == 0
+        assert not (app_a_mig_dir / "_replaced.py").exists()
+        content = (app_a_mig_dir / f"0001_remaked_{today:%Y%m%d}.py").read_text()
+        assert "_replaced" not in content
+
+    def test_replaces_module_smaller(self):
+        inline = self.remake()
+        with override_settings(REMAKE_MIGRATIONS_REPLACES_MODULE=True):
+            shared = self.remake()
+
+        assert shared.nodes == inline.nodes
+        # The replaces module is accounted for in the size
+        assert shared.size < inline.size
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import sys
+from collections.abc import Generator
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from django_remake_migrations.multi import main, plan_remake
+from tests.utils import EMPTY_MIGRATION
+
+SETTINGS_TEMPLATE = """\
+from tests.settings import *
+
+INSTALLED_APPS = [*INSTALLED_APPS, {apps}]
+MIGRATION_MODULES = {migration_modules}
+REMAKE_MIGRATIONS_JOURNAL_PATH = {journal_path}
+"""
+
+
+def test_plan_remake():
+    plan = plan_remake(
+        {
+            "project_a": {"shared": "app_s", "a": "app_a"},
+            "project_b": {"shared": "app_s", "b": "app_b"},
+            "project_c": {"c": "app_c"},
+        }
+    )
+
+    assert plan.shared_packages == ["shared"]
+    assert plan.waves == [
+        {"project_a": ["app_a", "app_s"], "project_c": ["app_c"]},
+        {"project_b": ["app_b"]},
+    ]
+
+
+def test_plan_remake_nothing_left():
+    plan = plan_remake(
+        {
+            "project_a": {"shared": "app_s", "a": "app_a"},
+            "project_b": {"shared": "app_s"},
+        }
+    )
+
+    assert plan.waves == [{"project_a": ["app_a", "app_s"]}]
+
+
+@pytest.fixture
+def projects(tmp_path: Path) -> Generator[dict[str, Path], None, None]:
+    """Two projects, sharing the app2 migrations package."""
+    mig_dirs = {}
+    for name in ["app1_a", "app1_b", "app2"]:
+        mig_dirs[name] = tmp_path / f"migrations_{name}"
+        mig_dirs[name].mkdir()
+        (mig_dirs[name] / "__init__.py").touch()
+        (mig_dirs[name] / "0001_initial.py").write_text(EMPTY_MIGRATION)
+
+    projects = {
+        "settings_a": (
+            "'tests.simple.app1', 'tests.simple.app2'",
+            {"app1": "migrations_app1_a", "app2": "migrations_app2"},
+        ),
+        "settings_b": (
+            "'tests.simple.app2', 'tests.delete.app1'",
+            {"app1": "migrations_app1_b", "app2": "migrations_app2"},
+        ),
+    }
+    for settings_module, (installed_apps, migration_modules) in projects.items():
+        (tmp_path / f"{settings_module}.py").write_text(
+            SETTINGS_TEMPLATE.format(
+                apps=installed_apps,
+                migration_modules=migration_modules,
+                journal_path=repr(str(tmp_path / "journal.json")),
+            )
+        )
+
+    sys.path.insert(0, str(tmp_path))
+    try:
+        yield mig_dirs
+    finally:
+        sys.path.remove(str(tmp_path))
+
+
+def test_remake_projects(projects, tmp_path, capsys):
+    returncode = main(["settings_a", "settings_b", "--jobs", "2"])
+
+    out, _ = capsys.readouterr()
+    assert returncode == 0, out
+    assert "== settings_a (app1, app2): done in" in out
+    assert "== settings_b (app1): done in" in out
+    assert out.endswith(
+        "Remade 3 app(s) for 2 settings module(s) in 2 wave(s), "
+        "1 shared app(s) remade once.\n"
+    )
+
+    remade_name = f"0001_remaked_{datetime.today():%Y%m%d}.py"
+    for mig_dir in projects.values():
+        assert sorted(path.name for path in mig_dir.glob("0*.py")) == [remade_name]
+    # Shared migrations are remade once, by the first project
+    content = (projects["app2"] / remade_name).read_text()
+    # Formatted by black, when it's installed
+    assert "replaces = [('app2', '0001_initial')]" in content.replace('"', "'")
+    # The journal of each project is removed once it succeeded
+    assert not list(tmp_path.glob("journal*.json"))
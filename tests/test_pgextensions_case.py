@@ -21,6 +21,7 @@ class TestSimpleCase(TestCase):
         ) as self.app_mig_dirs:
             yield
 
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
     @override_settings(
         REMAKE_MIGRATIONS_EXTENSIONS={
             "app1": ["django.contrib.postgres.operations.TrigramExtension"]
@@ -37,7 +38,9 @@ class TestSimpleCase(TestCase):
         assert (
             out == "Removing old migration files...\n"
             "Creating new migrations...\n"
+            "App order: app1\n"
             "Updating new migrations...\n"
+            "Wrote 1 file(s), skipped 0 unchanged file(s).\n"
             "All done!\n"
         )
         assert err == ""
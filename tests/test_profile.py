@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError
+from django.db.migrations.state import ModelState
+from django.test import TestCase
+
+from tests.test_simple_case import (
+    migrations_for_squash_app1,
+    migrations_for_squash_app2,
+)
+from tests.utils import run_command, setup_test_apps
+
+
+class TestProfile(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        self.tmp_path = tmp_path
+        with setup_test_apps(
+            tmp_path,
+            "tests.simple.app1",
+            "tests.simple.app2",
+        ) as self.app_mig_dirs:
+            migrations_for_squash_app1(self.app_mig_dirs["app1"])
+            migrations_for_squash_app2(self.app_mig_dirs["app2"])
+            yield
+
+    def test_markdown(self):
+        from_model = ModelState.__dict__["from_model"]
+
+        out, err, returncode = run_command("remakemigrations", profile=True)
+
+        assert returncode == 0, err
+        report = out.split("All done!\n", 1)[1]
+        assert report.startswith(
+            "| App | Calls | Autodetector (s) | Serialization (s) | Total (s) |\n"
+        )
+        assert "| Model | Calls |" in report
+        assert "| app1.book | " in report
+        assert "| django.db.models.fields.related.ForeignKey | " in report
+        # The fields aren't memoized by default
+        assert "| Cache | Hits | Misses |" not in report
+        # The Django internals are restored
+        assert ModelState.__dict__["from_model"] is from_model
+
+    def test_json(self):
+        output = self.tmp_path / "profile.json"
+
+        out, err, returncode = run_command(
+            "remakemigrations", profile=True, profile_output=str(output)
+        )
+
+        assert returncode == 0, err
+        assert out.endswith(f"Profile written to {output}\n")
+        report = json.loads(output.read_text())
+        models = {entry["name"]: entry for entry in report["models"]}
+        book = models["app1.book"]
+        assert book["autodetector_time"] > 0
+        assert book["serialization_time"] > 0
+        assert book["total_time"] == pytest.approx(
+            book["autodetector_time"] + book["serialization_time"]
+        )
+        # Sorted by decreasing total time
+        totals = [entry["total_time"] for entry in report["field_classes"]]
+        assert totals == sorted(totals, reverse=True)
+        assert {"app1", "app2"} <= {entry["name"] for entry in report["apps"]}
+
+    def test_jobs(self):
+        with pytest.raises(CommandError, match="--profile can't be used with --jobs"):
+            run_command("remakemigrations", profile=True, jobs=2)
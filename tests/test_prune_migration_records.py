@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from collections.abc import Generator
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+from django.core.management import CommandError
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+from django.test import TestCase
+
+from django_remake_migrations.disk import unload_app_migrations
+from django_remake_migrations.records import (
+    delete_migration_records,
+    stale_migration_records,
+)
+from tests.utils import run_command, setup_test_apps
+
+
+def remade_migration(mig_dir: Path) -> None:
+    (mig_dir / "__init__.py").touch()
+    (mig_dir / "0001_remaked_20240101.py").write_text(
+        dedent("""\
+            from django.db import migrations
+
+
+            class Migration(migrations.Migration):
+                initial = True
+
+                replaces = [('app1', '0001_old'), ('app1', '0002_old')]
+
+                operations = []
+        """)
+    )
+
+
+class TestPruneMigrationRecords(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        with setup_test_apps(tmp_path, "tests.delete.app1") as self.app_mig_dirs:
+            remade_migration(self.app_mig_dirs["app1"])
+            yield
+
+    def setUp(self):
+        self.recorder = MigrationRecorder(connection)
+        for app_label, migration_name in [
+            ("app1", "0001_old"),
+            ("app1", "0002_old"),
+            ("app1", "0003_deleted"),
+            ("contenttypes", "0099_deleted"),
+            ("uninstalled", "0001_initial"),
+        ]:
+            self.recorder.record_applied(app_label, migration_name)
+
+    def recorded(self, app_label: str) -> list[str]:
+        return sorted(
+            name for app, name in self.recorder.applied_migrations() if app == app_label
+        )
+
+    def test_dry_run(self):
+        out, _, returncode = run_command("prune_migration_records", dry_run=True)
+
+        assert returncode == 0
+        # The replaced migrations are kept, the remade one isn't recorded yet
+        assert out == (
+            "Would delete 2 row(s) from default:\n  - app1: 1\n  - contenttypes: 1\n"
+        )
+        assert self.recorded("app1") == ["0001_old", "0002_old", "0003_deleted"]
+
+    def test_prune(self):
+        self.recorder.record_applied("app1", "0001_remaked_20240101")
+
+        out, _, returncode = run_command("prune_migration_records")
+
+        assert returncode == 0
+        assert out == (
+            "Deleted 2 row(s) from default:\n  - app1: 1\n  - contenttypes: 1\n"
+        )
+        # The replaced migrations are kept while the remade one replaces them
+        assert self.recorded("app1") == [
+            "0001_old",
+            "0001_remaked_20240101",
+            "0002_old",
+        ]
+        assert ("app1", "0001_remaked_20240101") in MigrationLoader(
+            connection
+        ).applied_migrations
+        assert "0001_initial" in self.recorded("contenttypes")
+        assert "0099_deleted" not in self.recorded("contenttypes")
+        assert self.recorded("uninstalled") == ["0001_initial"]
+
+        out, _, _ = run_command("prune_migration_records")
+        assert out == "No stale migration rows in default.\n"
+
+    def test_prune_after_clearing_replaces(self):
+        self.recorder.record_applied("app1", "0001_remaked_20240101")
+        migration_path = self.app_mig_dirs["app1"] / "0001_remaked_20240101.py"
+        migration_path.write_text(
+            migration_path.read_text().replace(
+                "replaces = [('app1', '0001_old'), ('app1', '0002_old')]", ""
+            )
+        )
+        unload_app_migrations("app1")
+
+        out, _, returncode = run_command("prune_migration_records", "app1")
+
+        assert returncode == 0
+        assert out == "Deleted 3 row(s) from default:\n  - app1: 3\n"
+        assert self.recorded("app1") == ["0001_remaked_20240101"]
+        assert ("app1", "0001_remaked_20240101") in MigrationLoader(
+            connection
+        ).applied_migrations
+
+    def test_app_labels(self):
+        out, _, returncode = run_command("prune_migration_records", "contenttypes")
+
+        assert returncode == 0
+        assert out == "Deleted 1 row(s) from default:\n  - contenttypes: 1\n"
+        assert "0003_deleted" in self.recorded("app1")
+
+    def test_unknown_database(self):
+        with pytest.raises(CommandError, match="Unknown database: other"):
+            run_command("prune_migration_records", databases=["other"])
+
+    def test_batches(self):
+        self.recorder.record_applied("app1", "0004_deleted")
+        stale = stale_migration_records(
+            connection, MigrationLoader(None, ignore_no_migrations=True)
+        )
+
+        with self.assertNumQueries(5):
+            # Savepoint, 2 batches for app1, 1 for contenttypes, release
+            assert delete_migration_records(connection, stale, batch_size=1) == 3
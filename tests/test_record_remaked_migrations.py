@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError
+from django.db import connection
+from django.db.migrations.recorder import MigrationRecorder
+from django.test import TestCase
+
+from tests.test_prune_migration_records import remade_migration
+from tests.utils import run_command, setup_test_apps
+
+
+class TestRecordRemakedMigrations(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        with setup_test_apps(tmp_path, "tests.delete.app1") as self.app_mig_dirs:
+            remade_migration(self.app_mig_dirs["app1"])
+            yield
+
+    def setUp(self):
+        self.recorder = MigrationRecorder(connection)
+
+    def is_recorded(self) -> bool:
+        return ("app1", "0001_remaked_20240101") in self.recorder.applied_migrations()
+
+    def test_record(self):
+        self.recorder.record_applied("app1", "0001_old")
+        self.recorder.record_applied("app1", "0002_old")
+
+        out, _, returncode = run_command("record_remaked_migrations", dry_run=True)
+        assert returncode == 0
+        assert out == "Would record 1 migration(s) in default\n"
+        assert not self.is_recorded()
+
+        with self.assertNumQueries(5):
+            # Read the tables and the recorded migrations, then a single insert
+            out, _, returncode = run_command("record_remaked_migrations")
+        assert returncode == 0
+        assert out == "Recorded 1 migration(s) in default\n"
+        assert self.is_recorded()
+
+        out, _, _ = run_command("record_remaked_migrations")
+        assert out == "No migrations to record in default.\n"
+
+    def test_not_applied(self):
+        out, _, returncode = run_command("record_remaked_migrations")
+
+        assert returncode == 0
+        assert out == "No migrations to record in default.\n"
+        assert not self.is_recorded()
+
+    def test_partially_applied(self):
+        self.recorder.record_applied("app1", "0001_old")
+
+        with pytest.raises(
+            CommandError,
+            match=re.escape(
+                "Migration app1.0001_remaked_20240101 is partially applied on "
+                "database 'default', these migrations aren't applied: app1.0002_old"
+            ),
+        ):
+            run_command("record_remaked_migrations")
+        assert not self.is_recorded()
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+from collections.abc import Generator
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from django.db import migrations
+from django.db.migrations import Migration
+from django.db.migrations.loader import MigrationLoader
+from django.test import TestCase
+
+from django_remake_migrations.disk import unload_app_migrations
+from django_remake_migrations.planner import reduce_dependencies
+from tests.test_minimize_migrations import migrations_for_squash
+from tests.test_window import write_migration
+from tests.utils import run_command, setup_test_apps
+
+
+def make_migration(
+    app_label: str, name: str, dependencies: list[tuple[str, str]]
+) -> Migration:
+    # Like the Migration classes of migration files
+    migration_class = type("Migration", (Migration,), {"dependencies": dependencies})
+    return migration_class(name, app_label)
+
+
+def test_reduce_dependencies():
+    user_dependency = migrations.swappable_dependency("auth.User")
+    remade = {
+        ("a", "0001_remaked"): make_migration("a", "0001_remaked", []),
+        ("a", "0002_remaked"): make_migration(
+            "a", "0002_remaked", [("a", "0001_remaked")]
+        ),
+        ("b", "0001_remaked"): make_migration(
+            "b", "0001_remaked", [("a", "0002_remaked")]
+        ),
+        ("c", "0001_remaked"): make_migration(
+            "c",
+            "0001_remaked",
+            [
+                user_dependency,
+                ("contenttypes", "0002_remove_content_type_name"),
+                ("a", "0001_remaked"),
+                ("a", "0002_remaked"),
+                ("b", "0001_remaked"),
+            ],
+        ),
+        ("c", "0002_remaked"): make_migration(
+            "c", "0002_remaked", [("c", "0001_remaked"), ("b", "0001_remaked")]
+        ),
+    }
+
+    removed = reduce_dependencies(remade)
+
+    assert removed == [
+        (("c", "0001_remaked"), ("a", "0001_remaked")),
+        (("c", "0001_remaked"), ("a", "0002_remaked")),
+        (("c", "0002_remaked"), ("b", "0001_remaked")),
+    ]
+    # Swappable and third party dependencies are kept
+    assert remade["c", "0001_remaked"].dependencies == [
+        user_dependency,
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("b", "0001_remaked"),
+    ]
+    # Dependencies within an app are kept
+    assert remade["a", "0002_remaked"].dependencies == [("a", "0001_remaked")]
+    assert remade["c", "0002_remaked"].dependencies == [("c", "0001_remaked")]
+
+
+def test_reduce_dependencies_nothing_to_remove():
+    remade = {
+        ("a", "0001_remaked"): make_migration("a", "0001_remaked", []),
+        ("b", "0001_remaked"): make_migration(
+            "b", "0001_remaked", [("a", "0001_remaked")]
+        ),
+    }
+
+    assert reduce_dependencies(remade) == []
+    assert remade["b", "0001_remaked"].dependencies == [("a", "0001_remaked")]
+
+
+OLD_MIGRATIONS = {
+    "app_a": """\
+        dependencies = []
+        operations = [
+            migrations.CreateModel(name="Author", fields=[("id", AUTO_FIELD)]),
+        ]
+    """,
+    "app_b": """\
+        dependencies = [("app_a", "0001_initial")]
+        operations = [
+            migrations.CreateModel(
+                name="Book",
+                fields=[
+                    ("id", AUTO_FIELD),
+                    (
+                        "author",
+                        models.ForeignKey(
+                            on_delete=django.db.models.deletion.CASCADE,
+                            to="app_a.author",
+                        ),
+                    ),
+                ],
+            ),
+        ]
+    """,
+    "app_c": """\
+        dependencies = [("app_a", "0001_initial"), ("app_b", "0001_initial")]
+        operations = [
+            migrations.CreateModel(
+                name="Review",
+                fields=[
+                    ("id", AUTO_FIELD),
+                    (
+                        "book",
+                        models.ForeignKey(
+                            on_delete=django.db.models.deletion.CASCADE,
+                            to="app_b.book",
+                        ),
+                    ),
+                    (
+                        "reviewer",
+                        models.ForeignKey(
+                            on_delete=django.db.models.deletion.CASCADE,
+                            to="app_a.author",
+                        ),
+                    ),
+                ],
+            ),
+        ]
+    """,
+}
+
+
+class TestReduceDependencies(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        with setup_test_apps(
+            tmp_path,
+            "tests.reduce.app_a",
+            "tests.reduce.app_b",
+            "tests.reduce.app_c",
+        ) as self.app_mig_dirs:
+            for mig_dir in self.app_mig_dirs.values():
+                migrations_for_squash(mig_dir)
+            yield
+
+    def test_remake(self):
+        out, err, returncode = run_command("remakemigrations")
+
+        assert returncode == 0, err
+        assert "Removed 1 redundant dependency(ies)...\n" in out
+        migration_name = f"0001_remaked_{datetime.today():%Y%m%d}"
+        for app_label in self.app_mig_dirs:
+            # Load the migrations as they were rewritten
+            unload_app_migrations(app_label)
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        # app_a is reached through app_b
+        assert loader.disk_migrations["app_c", migration_name].dependencies == [
+            ("app_b", migration_name)
+        ]
+        assert loader.graph.forwards_plan(("app_c", migration_name)) == [
+            ("app_a", migration_name),
+            ("app_b", migration_name),
+            ("app_c", migration_name),
+        ]
+
+    def test_window(self):
+        for app_label, body in OLD_MIGRATIONS.items():
+            write_migration(
+                self.app_mig_dirs[app_label], "0001_initial", "2020-01-01", body
+            )
+
+        out, err, returncode = run_command("remakemigrations", keep_last=0)
+
+        assert returncode == 0, err
+        assert "Removed 1 redundant dependency(ies)...\n" in out
+        migration_name = f"0001_remaked_{datetime.today():%Y%m%d}"
+        for app_label in self.app_mig_dirs:
+            unload_app_migrations(app_label)
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        assert loader.disk_migrations["app_c", migration_name].dependencies == [
+            ("app_b", migration_name)
+        ]
+
+    def test_streaming(self):
+        out, err, returncode = run_command("remakemigrations", streaming=True)
+
+        assert returncode == 0, err
+        assert "Kept the redundant dependencies" in out
+        assert "Removed" not in out
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Generator
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+import pytest
+from django.core.management import CommandError
+from django.test import TestCase, override_settings
+
+from django_remake_migrations.steps import Remake
+from tests.test_simple_case import (
+    migrations_for_squash_app1,
+    migrations_for_squash_app2,
+)
+from tests.utils import run_command, setup_test_apps
+
+
+class TestResume(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        self.journal_path = tmp_path / "journal.json"
+        with setup_test_apps(
+            tmp_path,
+            "tests.simple.app1",
+            "tests.simple.app2",
+        ) as self.app_mig_dirs:
+            migrations_for_squash_app1(self.app_mig_dirs["app1"])
+            migrations_for_squash_app2(self.app_mig_dirs["app2"])
+            yield
+
+    def test_resume_after_failure(self):
+        with (
+            override_settings(REMAKE_MIGRATIONS_POST_COMMANDS=[["not_a_command"]]),
+            pytest.raises(CommandError, match="Unknown command: 'not_a_command'"),
+        ):
+            run_command("remakemigrations")
+
+        journal = json.loads(self.journal_path.read_text())
+        assert journal["completed_phases"] == ["old", "make", "update", "restore"]
+        assert sorted(journal["old_migrations"]["app1"]) == [
+            ["app1", "0001_initial"],
+            ["app1", "0002_something"],
+            ["app1", "0003_other_thing"],
+        ]
+
+        out, err, returncode = run_command("remakemigrations", resume=True)
+
+        # Only the post commands are run again
+        assert out == (
+            "Resuming from the 'post' phase...\n"
+            "Wrote 0 file(s), skipped 0 unchanged file(s).\n"
+            "All done!\n"
+        )
+        assert err == ""
+        assert returncode == 0
+        # All phases completed, there is nothing left to resume
+        assert not self.journal_path.exists()
+
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
+    def test_resume_interrupted_old_phase(self):
+        handle_old_migration_file = Remake.handle_old_migration_file
+        handled: list[str] = []
+
+        def fail_on_second_file(**kwargs: Any) -> dict[Path, Path]:
+            if handled:
+                raise KeyboardInterrupt
+            handled.append(kwargs["migration_name"])
+            return handle_old_migration_file(**kwargs)
+
+        with (
+            mock.patch.object(
+                Remake, "handle_old_migration_file", side_effect=fail_on_second_file
+            ),
+            pytest.raises(KeyboardInterrupt),
+        ):
+            run_command("remakemigrations", keep_old_migrations=True)
+
+        # All the old migrations were recorded before touching any file, and
+        # the backup made before the interruption
+        journal = json.loads(self.journal_path.read_text())
+        assert journal["completed_phases"] == []
+        assert sum(len(keys) for keys in journal["old_migrations"].values()) == 4
+        assert len(journal["renamed_files"]) == 1
+
+        _, err, returncode = run_command("remakemigrations", resume=True)
+
+        assert err == ""
+        assert returncode == 0
+        today = datetime.today()
+        remade_file = self.app_mig_dirs["app1"] / f"0001_remaked_{today:%Y%m%d}.py"
+        assert (
+            "    replaces = [('app1', '0001_initial'), "
+            "('app1', '0002_something'), "
+            "('app1', '0003_other_thing')]\n"
+        ) in remade_file.read_text()
+        # The file backed up before the interruption is restored as well
+        assert sorted(
+            path.name for path in self.app_mig_dirs["app1"].glob("000[1-3]_*.py")
+        ) == [
+            "0001_initial.py",
+            f"0001_remaked_{today:%Y%m%d}.py",
+            "0002_something.py",
+            "0003_other_thing.py",
+        ]
+
+    def test_journal_removed_after_success(self):
+        _, err, returncode = run_command("remakemigrations")
+
+        assert returncode == 0, err
+        assert not self.journal_path.exists()
+        with pytest.raises(CommandError, match="No journal found"):
+            run_command("remakemigrations", phase="old")
+
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
+    def test_update_phase_after_edit(self):
+        with (
+            override_settings(REMAKE_MIGRATIONS_POST_COMMANDS=[["not_a_command"]]),
+            pytest.raises(CommandError, match="Unknown command: 'not_a_command'"),
+        ):
+            run_command("remakemigrations")
+
+        today = datetime.today()
+        remade_file = self.app_mig_dirs["app1"] / f"0001_remaked_{today:%Y%m%d}.py"
+        content = remade_file.read_text()
+        replaces = (
+            "    replaces = [('app1', '0001_initial'), "
+            "('app1', '0002_something'), "
+            "('app1', '0003_other_thing')]\n"
+        )
+        assert replaces in content
+        # Edit the file by hand, which loses the replaces
+        remade_file.write_text(content.replace(replaces, ""))
+
+        with pytest.raises(CommandError, match="The 'update' phase already completed"):
+            run_command("remakemigrations", phase="update")
+        out, err, returncode = run_command(
+            "remakemigrations", phase="update", reset_phase=True
+        )
+
+        assert out == (
+            "Updating new migrations...\n"
+            # The edited migration is written, the other one is unchanged
+            "Wrote 1 file(s), skipped 1 unchanged file(s).\n"
+            "All done!\n"
+        )
+        assert err == ""
+        assert returncode == 0
+        assert replaces in remade_file.read_text()
+        # The post phase is still pending
+        assert self.journal_path.exists()
+
+    def test_old_phase_after_run(self):
+        with (
+            override_settings(REMAKE_MIGRATIONS_POST_COMMANDS=[["not_a_command"]]),
+            pytest.raises(CommandError, match="Unknown command: 'not_a_command'"),
+        ):
+            run_command("remakemigrations")
+        remade_name = f"0001_remaked_{datetime.today():%Y%m%d}.py"
+
+        # The new migrations would be taken for the old ones
+        with pytest.raises(CommandError, match="The 'old' phase already completed"):
+            run_command("remakemigrations", phase="old")
+
+        assert (self.app_mig_dirs["app1"] / remade_name).exists()
+
+    def test_reset_phase_without_phase(self):
+        with pytest.raises(CommandError, match="--reset-phase can only be used"):
+            run_command("remakemigrations", reset_phase=True)
+
+    def test_resume_without_journal(self):
+        with pytest.raises(CommandError, match="No journal found"):
+            run_command("remakemigrations", resume=True)
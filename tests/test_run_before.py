@@ -24,6 +24,7 @@ class TestRunBefore(TestCase):
         ) as self.app_mig_dirs:
             yield
 
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
     @override_settings(
         REMAKE_MIGRATIONS_RUN_BEFORE={"app1": [("oauth2_provider", "0001_initial")]},
     )
@@ -38,7 +39,9 @@ class TestRunBefore(TestCase):
         assert (
             out == "Removing old migration files...\n"
             "Creating new migrations...\n"
+            "App order: app2, app1\n"
             "Updating new migrations...\n"
+            "Wrote 2 file(s), skipped 0 unchanged file(s).\n"
             "All done!\n"
         )
         assert err == ""
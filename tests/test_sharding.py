@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from django.test import TestCase, override_settings
+
+from django_remake_migrations.app_graph import connected_components
+from tests.test_minimize_migrations import migrations_for_squash
+from tests.utils import run_command, setup_test_apps
+
+
+def test_connected_components():
+    graph = {
+        "a": {"b"},
+        "b": set(),
+        "c": {"d"},
+        "d": {"c"},
+        "e": set(),
+    }
+
+    assert connected_components(graph) == [["a", "b"], ["c", "d"], ["e"]]
+
+
+# Process app_x first, which forces Django to split it
+@override_settings(REMAKE_MIGRATIONS_APP_ORDER=["app_x"])
+class TestShardedAutodetection(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        with setup_test_apps(
+            tmp_path,
+            "tests.minimize.app_x",
+            "tests.minimize.app_y",
+            "tests.minimize.app_z",
+            "tests.simple.app1",
+            "tests.simple.app2",
+        ) as self.app_mig_dirs:
+            yield
+
+    def remake(self, *args: str) -> tuple[str, dict[str, str]]:
+        for mig_dir in self.app_mig_dirs.values():
+            for path in mig_dir.glob("*.py"):
+                path.unlink()
+            migrations_for_squash(mig_dir)
+        out, err, returncode = run_command("remakemigrations", *args)
+        assert returncode == 0, err
+        return out, {
+            # Skip the header, with the generation time
+            f"{app_label}/{path.name}": path.read_text().split("\n", 1)[1]
+            for app_label, mig_dir in self.app_mig_dirs.items()
+            for path in sorted(mig_dir.glob("0*.py"))
+        }
+
+    def test_same_output(self):
+        _, single_process_files = self.remake()
+        out, sharded_files = self.remake("--jobs", "2")
+
+        assert "Detecting changes in 2 shard(s)...\n" in out
+        assert sharded_files == single_process_files
+        # Both shards generated migrations, with the split of app_x
+        assert len(single_process_files) == 7
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from collections.abc import Generator
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError
+from django.db.migrations.loader import MigrationLoader
+from django.test import TestCase, override_settings
+
+from django_remake_migrations.disk import unload_app_migrations
+from tests.test_minimize_migrations import migration_files
+from tests.test_simple_case import (
+    migrations_for_squash_app1,
+    migrations_for_squash_app2,
+)
+from tests.utils import run_command, setup_test_apps
+
+
+class TestSideBySide(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        with setup_test_apps(
+            tmp_path,
+            "tests.simple.app1",
+            "tests.simple.app2",
+        ) as self.app_mig_dirs:
+            migrations_for_squash_app1(self.app_mig_dirs["app1"])
+            migrations_for_squash_app2(self.app_mig_dirs["app2"])
+            yield
+
+    def test_side_by_side(self):
+        old_files = {
+            app_label: migration_files(mig_dir)
+            for app_label, mig_dir in self.app_mig_dirs.items()
+        }
+        new_modules = {
+            app_label: f"{settings.MIGRATION_MODULES[app_label]}_remade"
+            for app_label in self.app_mig_dirs
+        }
+
+        out, err, returncode = run_command("remakemigrations", side_by_side=True)
+
+        assert returncode == 0
+        assert err == ""
+        assert out == (
+            "Listing old migration files...\n"
+            "Creating new migrations...\n"
+            "App order: app2, app1\n"
+            "Updating new migrations...\n"
+            "Wrote 2 file(s), skipped 0 unchanged file(s).\n"
+            "Switch to the new migrations with the MIGRATION_MODULES setting:\n"
+            "MIGRATION_MODULES = {\n"
+            f"    'app1': {new_modules['app1']!r},\n"
+            f"    'app2': {new_modules['app2']!r},\n"
+            "}\n"
+            "All done!\n"
+        )
+        # The old migrations are untouched
+        for app_label, mig_dir in self.app_mig_dirs.items():
+            assert migration_files(mig_dir) == old_files[app_label]
+        remade_name = f"0001_remaked_{datetime.today():%Y%m%d}"
+        for mig_dir in self.app_mig_dirs.values():
+            new_dir = mig_dir.with_name(f"{mig_dir.name}_remade")
+            assert migration_files(new_dir) == [f"{remade_name}.py", "__init__.py"]
+
+        with override_settings(MIGRATION_MODULES=new_modules):
+            for app_label in new_modules:
+                unload_app_migrations(app_label)
+            loader = MigrationLoader(None, ignore_no_migrations=True)
+        assert loader.graph.leaf_nodes("app1") == [("app1", remade_name)]
+        assert loader.replacements["app1", remade_name].replaces == [
+            ("app1", "0001_initial"),
+            ("app1", "0002_something"),
+            ("app1", "0003_other_thing"),
+        ]
+        assert loader.graph.nodes["app1", remade_name].dependencies == [
+            ("app2", remade_name)
+        ]
+
+    def test_second_run(self):
+        _, err, returncode = run_command("remakemigrations", side_by_side=True)
+        assert returncode == 0, err
+        mig_dir = self.app_mig_dirs["app1"]
+        new_dir = mig_dir.with_name(f"{mig_dir.name}_remade")
+        stale = new_dir / "0002_stale.py"
+        stale.write_text("")
+
+        with pytest.raises(
+            CommandError,
+            match=r"package already contains migrations, written by a previous run",
+        ):
+            run_command("remakemigrations", side_by_side=True)
+
+        out, err, returncode = run_command(
+            "remakemigrations", side_by_side=True, clear_side_by_side=True
+        )
+
+        assert returncode == 0, err
+        assert "All done!\n" in out
+        remade_name = f"0001_remaked_{datetime.today():%Y%m%d}"
+        assert migration_files(new_dir) == [f"{remade_name}.py", "__init__.py"]
+
+    def test_clear_without_side_by_side(self):
+        with pytest.raises(
+            CommandError,
+            match=r"--clear-side-by-side can only be used with --side-by-side",
+        ):
+            run_command("remakemigrations", clear_side_by_side=True)
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from collections.abc import Generator
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import pytest
+from django.db import migrations
+from django.test import TestCase, override_settings
+
+from django_remake_migrations import signals
+from django_remake_migrations.steps import Remake
+from tests.test_simple_case import (
+    migrations_for_squash_app1,
+    migrations_for_squash_app2,
+)
+from tests.utils import run_command, setup_test_apps
+
+ALL_SIGNALS = {
+    "phase_started": signals.phase_started,
+    "phase_finished": signals.phase_finished,
+    "old_migrations_collected": signals.old_migrations_collected,
+    "migrations_generated": signals.migrations_generated,
+    "pre_migration_write": signals.pre_migration_write,
+    "post_migration_write": signals.post_migration_write,
+    "post_command_finished": signals.post_command_finished,
+}
+
+
+class TestSignals(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        with setup_test_apps(
+            tmp_path,
+            "tests.simple.app1",
+            "tests.simple.app2",
+        ) as self.app_mig_dirs:
+            migrations_for_squash_app1(self.app_mig_dirs["app1"])
+            migrations_for_squash_app2(self.app_mig_dirs["app2"])
+            yield
+
+    @pytest.fixture(autouse=True)
+    def receivers(self) -> Generator[None, None, None]:
+        self.events: list[tuple[str, dict[str, Any]]] = []
+
+        def make_receiver(name: str) -> Any:
+            def receiver(sender: type, **kwargs: Any) -> None:
+                assert sender is Remake
+                kwargs.pop("signal")
+                self.events.append((name, kwargs))
+
+            return receiver
+
+        receivers = {name: make_receiver(name) for name in ALL_SIGNALS}
+        for name, signal in ALL_SIGNALS.items():
+            signal.connect(receivers[name])
+        yield
+        for name, signal in ALL_SIGNALS.items():
+            signal.disconnect(receivers[name])
+
+    @override_settings(REMAKE_MIGRATIONS_POST_COMMANDS=[["check"]])
+    def test_signals_sent(self):
+        _, _, returncode = run_command("remakemigrations")
+
+        assert returncode == 0
+        today = datetime.today()
+        remade_name = f"0001_remaked_{today:%Y%m%d}"
+        app1_path = str(self.app_mig_dirs["app1"] / f"{remade_name}.py")
+        assert [
+            (name, kwargs.get("phase") or kwargs.get("path") or kwargs.get("args"))
+            for name, kwargs in self.events
+            if name not in {"pre_migration_write", "post_migration_write"}
+            or kwargs["path"] == app1_path
+        ] == [
+            ("phase_started", "old"),
+            ("old_migrations_collected", None),
+            ("phase_finished", "old"),
+            ("phase_started", "make"),
+            ("pre_migration_write", app1_path),
+            ("post_migration_write", app1_path),
+            ("migrations_generated", None),
+            ("phase_finished", "make"),
+            ("phase_started", "update"),
+            ("pre_migration_write", app1_path),
+            ("post_migration_write", app1_path),
+            ("phase_finished", "update"),
+            ("phase_started", "restore"),
+            ("phase_finished", "restore"),
+            ("phase_started", "post"),
+            ("post_command_finished", ["check"]),
+            ("phase_finished", "post"),
+        ]
+        payloads = dict(self.events)
+        assert sorted(payloads["old_migrations_collected"]["old_migrations"]) == [
+            "app1",
+            "app2",
+        ]
+        assert sorted(
+            path.name for path in payloads["migrations_generated"]["paths"]
+        ) == [f"{remade_name}.py", f"{remade_name}.py"]
+        assert payloads["post_migration_write"]["migration"].name == remade_name
+        for name, kwargs in self.events:
+            assert kwargs["remake"].migration_name == f"remaked_{today:%Y%m%d}"
+            if name != "phase_started" and name != "pre_migration_write":
+                assert kwargs["duration"] >= 0
+
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
+    def test_transform_before_write(self):
+        def add_operation(sender: type, migration: Any, **kwargs: Any) -> None:
+            if migration.app_label == "app1" and migration.replaces:
+                migration.operations.append(migrations.RunSQL("SELECT 1"))
+
+        signals.pre_migration_write.connect(add_operation)
+        try:
+            _, _, returncode = run_command("remakemigrations")
+        finally:
+            signals.pre_migration_write.disconnect(add_operation)
+
+        assert returncode == 0
+        remade_name = f"0001_remaked_{datetime.today():%Y%m%d}"
+        content = (self.app_mig_dirs["app1"] / f"{remade_name}.py").read_text()
+        assert "migrations.RunSQL(\n            sql='SELECT 1',\n" in content
@@ -7,7 +7,7 @@ from pathlib import Path
 from textwrap import dedent
 
 import pytest
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from tests.utils import EMPTY_MIGRATION, run_command, setup_test_apps
 
@@ -63,6 +63,7 @@ class TestSimpleCase(TestCase):
         ) as self.app_mig_dirs:
             yield
 
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
     def test_success_all_steps(self):
         app1_mig_dir = self.app_mig_dirs["app1"]
         migrations_for_squash_app1(app1_mig_dir)
@@ -74,7 +75,9 @@ class TestSimpleCase(TestCase):
         assert (
             out == "Removing old migration files...\n"
             "Creating new migrations...\n"
+            "App order: app2, app1\n"
             "Updating new migrations...\n"
+            "Wrote 2 file(s), skipped 0 unchanged file(s).\n"
             "All done!\n"
         )
         assert err == ""
@@ -129,7 +132,9 @@ class TestKeepOldMigrations(TestCase):
         assert (
             out == "Backing up old migration files...\n"
             "Creating new migrations...\n"
+            "App order: app2, app1\n"
             "Updating new migrations...\n"
+            "Wrote 2 file(s), skipped 0 unchanged file(s).\n"
             "All done!\n"
         )
         assert err == ""
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError
+from django.test import TestCase, override_settings
+
+from tests.test_simple_case import (
+    migrations_for_squash_app1,
+    migrations_for_squash_app2,
+)
+from tests.utils import run_command, setup_test_apps
+
+
+class TestStateSnapshot(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        self.snapshot_path = tmp_path / "migrations_state.json"
+        with (
+            setup_test_apps(
+                tmp_path,
+                "tests.simple.app1",
+                "tests.simple.app2",
+            ) as self.app_mig_dirs,
+            override_settings(
+                REMAKE_MIGRATIONS_STATE_SNAPSHOT_PATH=str(self.snapshot_path)
+            ),
+        ):
+            migrations_for_squash_app1(self.app_mig_dirs["app1"])
+            migrations_for_squash_app2(self.app_mig_dirs["app2"])
+            yield
+
+    def remake(self) -> None:
+        out, err, returncode = run_command("remakemigrations")
+        assert returncode == 0, err
+        assert "Writing the state snapshot...\n" in out
+
+    def test_snapshot(self):
+        self.remake()
+
+        snapshot = json.loads(self.snapshot_path.read_text())
+        assert snapshot["app_labels"] == ["app1", "app2", "contenttypes"]
+        assert any("name='app1.Book'" in model for model in snapshot["models"])
+
+        out, _, returncode = run_command("check_migration_state")
+
+        assert returncode == 0
+        assert out == "No changes detected\n"
+
+    def test_migration_files_changed(self):
+        self.remake()
+        remade_file = next(self.app_mig_dirs["app1"].glob("0001_remaked_*.py"))
+        remade_file.write_text(remade_file.read_text() + "\n# Edited\n")
+
+        out, _, returncode = run_command("check_migration_state")
+
+        assert returncode == 0
+        assert out == (
+            "The migration files changed since the snapshot.\n"
+            "Running makemigrations --check...\n"
+            "No changes detected\n"
+        )
+
+    def test_models_changed(self):
+        self.remake()
+        snapshot = json.loads(self.snapshot_path.read_text())
+        snapshot["models"] = snapshot["models"][1:]
+        self.snapshot_path.write_text(json.dumps(snapshot))
+
+        out, _, returncode = run_command("check_migration_state")
+
+        assert returncode == 0
+        assert out.startswith(
+            "The models changed since the snapshot.\n"
+            "Running makemigrations --check...\n"
+        )
+
+    def test_no_snapshot(self):
+        out, _, returncode = run_command("check_migration_state")
+
+        assert out.startswith("No state snapshot found.\n")
+        # The old migrations don't create the models
+        assert returncode == 1
+
+    @override_settings(REMAKE_MIGRATIONS_STATE_SNAPSHOT_PATH=None)
+    def test_not_configured(self):
+        with pytest.raises(CommandError, match="REMAKE_MIGRATIONS_STATE_SNAPSHOT"):
+            run_command("check_migration_state")
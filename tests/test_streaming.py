@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import sys
+from collections.abc import Generator
+from datetime import datetime
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+from django.core.management import CommandError
+from django.test import TestCase, override_settings
+
+from django_remake_migrations.steps import Remake
+from tests.test_simple_case import (
+    migrations_for_squash_app1,
+    migrations_for_squash_app2,
+)
+from tests.utils import run_command, setup_test_apps
+
+
+class TestStreaming(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        with setup_test_apps(
+            tmp_path,
+            "tests.simple.app1",
+            "tests.simple.app2",
+        ) as self.app_mig_dirs:
+            migrations_for_squash_app1(self.app_mig_dirs["app1"])
+            migrations_for_squash_app2(self.app_mig_dirs["app2"])
+            yield
+
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
+    def test_success(self):
+        out, err, returncode = run_command("remakemigrations", streaming=True)
+
+        assert (
+            out == "Removing old migration files...\n"
+            "Creating new migrations...\n"
+            "App order: app2, app1\n"
+            "Updating new migrations...\n"
+            "Kept the redundant dependencies, the migrations of other apps aren't "
+            "loaded in streaming mode...\n"
+            "Wrote 2 file(s), skipped 0 unchanged file(s).\n"
+            "All done!\n"
+        )
+        assert err == ""
+        assert returncode == 0
+
+        today = datetime.today()
+        app1_mig_dir = self.app_mig_dirs["app1"]
+        content = (app1_mig_dir / f"0001_remaked_{today:%Y%m%d}.py").read_text()
+        assert (
+            "    dependencies = [\n"
+            f"        ('app2', '0001_remaked_{today:%Y%m%d}'),\n"
+            "    ]\n" in content
+        )
+        assert (
+            "replaces = [('app1', '0001_initial'), "
+            "('app1', '0002_something'), "
+            "('app1', '0003_other_thing')]" in content
+        )
+        # Migration modules were released
+        assert not [
+            module_name
+            for module_name in sys.modules
+            if module_name.startswith(f"{app1_mig_dir.name}.")
+        ]
+
+    @override_settings(REMAKE_MIGRATIONS_MINIMIZE_MIGRATIONS=True)
+    def test_minimize_not_supported(self):
+        with pytest.raises(CommandError, match="--streaming can't be used"):
+            run_command("remakemigrations", streaming=True)
+
+    def test_squashed_migrations(self):
+        (self.app_mig_dirs["app1"] / "0001_squashed_0002_something.py").write_text(
+            dedent(
+                """\
+                from django.db import migrations
+
+                class Migration(migrations.Migration):
+                    replaces = [
+                        ('app1', '0001_initial'),
+                        ('app1', '0002_something'),
+                    ]
+                    dependencies = [
+                        ('app2', '0001_initial'),
+                    ]
+                    operations = []
+                """
+            )
+        )
+        remake = Remake("remaked_20240101")
+
+        streaming_migrations = remake.find_old_migrations(streaming=True)
+
+        # The replaced migrations are excluded, like in the migration graph
+        assert sorted(streaming_migrations) == [
+            ("app1", "0001_squashed_0002_something"),
+            ("app1", "0003_other_thing"),
+            ("app2", "0001_initial"),
+        ]
+        assert sorted(streaming_migrations) == sorted(remake.find_old_migrations())
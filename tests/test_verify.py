@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import datetime as dt
+import sqlite3
+import subprocess
+from collections.abc import Generator
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+
+from tests.utils import run_command, setup_test_apps
+
+
+class TestVerifyRemakedMigrations(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        self.tmp_path = tmp_path
+        with setup_test_apps(
+            tmp_path,
+            "tests.minimize.app_x",
+            "tests.minimize.app_y",
+            "tests.minimize.app_z",
+        ) as self.app_mig_dirs:
+            for mig_dir in self.app_mig_dirs.values():
+                (mig_dir / "__init__.py").touch()
+            # The old migrations, as they were created over time
+            _, err, returncode = run_command("makemigrations", "app_y", "app_z")
+            assert returncode == 0, err
+            _, err, returncode = run_command("makemigrations", "app_x")
+            assert returncode == 0, err
+            yield
+
+    def remake(self, keep_old_migrations: bool = True) -> None:
+        _, err, returncode = run_command(
+            "remakemigrations", keep_old_migrations=keep_old_migrations
+        )
+        assert err == ""
+        assert returncode == 0
+
+    def test_kept_old_migrations(self):
+        self.remake()
+
+        out, err, returncode = run_command("verify_remaked_migrations")
+
+        assert returncode == 0
+        assert err == ""
+        assert out == (
+            "Migrating the old and remade migrations...\nNo schema differences found.\n"
+        )
+
+    def test_package_helpers(self):
+        app_y_dir = self.app_mig_dirs["app_y"]
+        (app_y_dir / "helpers").mkdir()
+        (app_y_dir / "helpers" / "__init__.py").write_text("OPERATIONS = []\n")
+        (old_migration,) = app_y_dir.glob("0001_*.py")
+        with old_migration.open("a") as migration_file:
+            migration_file.write(
+                "from .helpers import OPERATIONS\nMigration.operations += OPERATIONS\n"
+            )
+        self.remake()
+
+        out, err, returncode = run_command("verify_remaked_migrations")
+
+        assert returncode == 0
+        assert err == ""
+        assert out.endswith("No schema differences found.\n")
+
+    def test_backups(self):
+        self.remake()
+        for mig_dir in self.app_mig_dirs.values():
+            for path in mig_dir.glob("0*.py"):
+                if "_remaked_" not in path.name:
+                    path.rename(path.with_suffix(".py-backup"))
+
+        out, _, returncode = run_command("verify_remaked_migrations")
+
+        assert returncode == 0
+        assert out.endswith("No schema differences found.\n")
+
+    def test_old_ref(self):
+        def git(*args: str) -> None:
+            subprocess.run(  # noqa: S603
+                [  # noqa: S607
+                    "git",
+                    "-c",
+                    "user.name=test",
+                    "-c",
+                    "user.email=test@example.com",
+                    *args,
+                ],
+                cwd=self.tmp_path,
+                check=True,
+                capture_output=True,
+            )
+
+        git("init", "-q")
+        git("add", ".")
+        git("commit", "-q", "-m", "Old migrations")
+        self.remake(keep_old_migrations=False)
+
+        out, _, returncode = run_command("verify_remaked_migrations", old_ref="HEAD")
+
+        assert returncode == 0
+        assert out.endswith("No schema differences found.\n")
+
+    def test_differences(self):
+        self.remake()
+        remade = (
+            self.app_mig_dirs["app_y"] / f"0001_remaked_{dt.date.today():%Y%m%d}.py"
+        )
+        content = remade.read_text()
+        extra_index = "CREATE INDEX extra_idx ON app_y_label (id)"
+        remade.write_text(
+            content[: content.rindex("    ]")]
+            + f"        migrations.RunSQL({extra_index!r}),\n"
+            + "    ]\n"
+        )
+
+        out = StringIO()
+        with pytest.raises(CommandError, match=r"^Found 1 schema difference\(s\)\.$"):
+            call_command("verify_remaked_migrations", stdout=out)
+
+        assert out.getvalue() == (
+            "Migrating the old and remade migrations...\n"
+            "Constraint app_y_label.extra_idx only in the remade migrations\n"
+        )
+
+    def test_no_old_migrations(self):
+        self.remake(keep_old_migrations=False)
+
+        with pytest.raises(CommandError, match="No old migrations found"):
+            run_command("verify_remaked_migrations")
+
+    def file_databases(self) -> dict[str, dict[str, str]]:
+        return {
+            name: {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": str(self.tmp_path / f"verify_{name}.sqlite3"),
+            }
+            for name in ("old", "new")
+        }
+
+    def table_names(self, database: dict[str, str]) -> set[str]:
+        with sqlite3.connect(database["NAME"]) as connection:
+            rows = connection.execute(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') "
+                "AND name NOT LIKE 'sqlite_%'"
+            )
+            return {row[0] for row in rows}
+
+    def test_databases_cleaned_up(self):
+        self.remake()
+        databases = self.file_databases()
+        for database in databases.values():
+            with sqlite3.connect(database["NAME"]) as connection:
+                connection.execute("CREATE TABLE existing (id integer)")
+
+        with override_settings(REMAKE_MIGRATIONS_VERIFY_DATABASES=databases):
+            out, _, returncode = run_command("verify_remaked_migrations")
+
+        assert returncode == 0
+        assert out.endswith("No schema differences found.\n")
+        # Tables which existed before are kept
+        assert self.table_names(databases["old"]) == {"existing"}
+        assert self.table_names(databases["new"]) == {"existing"}
+
+    def test_databases_cleaned_up_after_failure(self):
+        self.remake()
+        remade = (
+            self.app_mig_dirs["app_y"] / f"0001_remaked_{dt.date.today():%Y%m%d}.py"
+        )
+        content = remade.read_text()
+        create_view = "CREATE VIEW app_y_view AS SELECT 1"
+        failing_sql = "SELECT id FROM missing"
+        remade.write_text(
+            content[: content.rindex("    ]")]
+            + f"        migrations.RunSQL({create_view!r}),\n"
+            + f"        migrations.RunSQL({failing_sql!r}),\n"
+            + "    ]\n"
+        )
+        databases = self.file_databases()
+
+        with (
+            override_settings(REMAKE_MIGRATIONS_VERIFY_DATABASES=databases),
+            pytest.raises(OperationalError, match="no such table: missing"),
+        ):
+            call_command("verify_remaked_migrations", stdout=StringIO())
+
+        assert self.table_names(databases["old"]) == set()
+        assert self.table_names(databases["new"]) == set()
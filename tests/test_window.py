@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import datetime as dt
+import subprocess
+from collections.abc import Generator
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+from django.core.management import CommandError
+from django.db.migrations.loader import MigrationLoader
+from django.test import TestCase, override_settings
+
+from tests.test_minimize_migrations import migration_files
+from tests.utils import run_command, setup_test_apps
+
+APP2_MIGRATIONS = {
+    "0001_initial": (
+        "2020-01-01",
+        """\
+        dependencies = []
+        operations = [
+            migrations.CreateModel(
+                name="Author",
+                fields=[("id", AUTO_FIELD)],
+            ),
+        ]
+        """,
+    ),
+    "0002_author_name": (
+        "2020-06-01",
+        """\
+        dependencies = [("app2", "0001_initial")]
+        operations = [
+            migrations.AddField(
+                model_name="author",
+                name="name",
+                field=models.CharField(max_length=100, default=""),
+            ),
+        ]
+        """,
+    ),
+    "0003_remove_author_name": (
+        "2024-01-01",
+        """\
+        dependencies = [("app2", "0002_author_name")]
+        operations = [
+            migrations.RemoveField(model_name="author", name="name"),
+        ]
+        """,
+    ),
+}
+
+APP1_INITIAL = """\
+    dependencies = [
+        ("app2", "0001_initial"),
+    ]
+    operations = [
+        migrations.CreateModel(
+            name="Book",
+            fields=[
+                ("id", AUTO_FIELD),
+                (
+                    "fk",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="app2.author",
+                    ),
+                ),
+            ],
+        ),
+    ]
+"""
+
+
+def write_migration(mig_dir: Path, name: str, date: str, body: str) -> None:
+    (mig_dir / f"{name}.py").write_text(
+        f"# Generated by Django 5.2 on {date} 12:00\n\n"
+        "import django.db.models.deletion\n"
+        "from django.db import migrations, models\n\n"
+        "AUTO_FIELD = models.AutoField(\n"
+        "    auto_created=True, primary_key=True, serialize=False, verbose_name='ID'\n"
+        ")\n\n\n"
+        "class Migration(migrations.Migration):\n"
+        + "".join(f"    {line}\n" for line in dedent(body).splitlines())
+    )
+
+
+class TestWindowedRemake(TestCase):
+    @pytest.fixture(autouse=True)
+    def tmp_path_fixture(self, tmp_path: Path) -> Generator[None, None, None]:
+        self.tmp_path = tmp_path
+        with setup_test_apps(
+            tmp_path,
+            "tests.simple.app1",
+            "tests.simple.app2",
+        ) as self.app_mig_dirs:
+            for mig_dir in self.app_mig_dirs.values():
+                (mig_dir / "__init__.py").touch()
+            for name, (date, body) in APP2_MIGRATIONS.items():
+                write_migration(self.app_mig_dirs["app2"], name, date, body)
+            write_migration(
+                self.app_mig_dirs["app1"], "0001_initial", "2024-01-01", APP1_INITIAL
+            )
+            yield
+
+    def assert_compacted(self, out: str) -> None:
+        assert out == (
+            "Creating new migrations replacing 2 migration(s) from 1 app(s)...\n"
+            "Updating recent migrations...\n"
+            "Removing old migration files...\n"
+            "Wrote 1 file(s), skipped 0 unchanged file(s).\n"
+            "All done!\n"
+        )
+        remade_name = f"0001_remaked_{dt.date.today():%Y%m%d}"
+        assert migration_files(self.app_mig_dirs["app2"]) == [
+            f"{remade_name}.py",
+            "0003_remove_author_name.py",
+            "__init__.py",
+        ]
+        base = (self.app_mig_dirs["app2"] / f"{remade_name}.py").read_text()
+        assert (
+            "replaces = [('app2', '0001_initial'), ('app2', '0002_author_name')]"
+            in base
+        )
+        assert "('name', models.CharField(default='', max_length=100))" in base
+        # Recent migrations now depend on the base
+        recent = (self.app_mig_dirs["app2"] / "0003_remove_author_name.py").read_text()
+        assert f"dependencies = [('app2', '{remade_name}')]" in recent
+        assert 'migrations.RemoveField(model_name="author", name="name")' in recent
+        app1 = (self.app_mig_dirs["app1"] / "0001_initial.py").read_text()
+        assert f"        ('app2', '{remade_name}'),\n" in app1
+
+        # The migrations still load and reach the same state
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        assert loader.graph.leaf_nodes("app2") == [("app2", "0003_remove_author_name")]
+        state = loader.project_state()
+        assert list(state.models["app2", "author"].fields) == ["id"]
+        assert list(state.models["app1", "book"].fields) == ["id", "fk"]
+
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
+    def test_keep_last(self):
+        out, err, returncode = run_command("remakemigrations", keep_last=1)
+
+        assert returncode == 0
+        assert err == ""
+        self.assert_compacted(out)
+
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
+    def test_older_than(self):
+        out, err, returncode = run_command(
+            "remakemigrations", older_than=dt.date(2021, 1, 1)
+        )
+
+        assert returncode == 0
+        assert err == ""
+        self.assert_compacted(out)
+
+    @override_settings(REMAKE_MIGRATIONS_FORMAT_MIGRATIONS=False)
+    def test_until_ref(self):
+        def git(*args: str) -> None:
+            subprocess.run(  # noqa: S603
+                [  # noqa: S607
+                    "git",
+                    "-c",
+                    "user.name=test",
+                    "-c",
+                    "user.email=test@example.com",
+                    *args,
+                ],
+                cwd=self.tmp_path,
+                check=True,
+                capture_output=True,
+            )
+
+        recent_files = [
+            self.app_mig_dirs["app2"] / "0003_remove_author_name.py",
+            self.app_mig_dirs["app1"] / "0001_initial.py",
+        ]
+        recent_contents = [path.read_text() for path in recent_files]
+        for path in recent_files:
+            path.unlink()
+        git("init", "-q")
+        git("add", ".")
+        git("commit", "-q", "-m", "Old migrations")
+        for path, content in zip(recent_files, recent_contents, strict=True):
+            path.write_text(content)
+
+        out, err, returncode = run_command("remakemigrations", until_ref="HEAD")
+
+        assert returncode == 0
+        assert err == ""
+        self.assert_compacted(out)
+
+    def test_nothing_to_compact(self):
+        out, _, returncode = run_command("remakemigrations", keep_last=3)
+
+        assert returncode == 0
+        assert out == (
+            "No migrations older than the cutoff.\n"
+            "Wrote 0 file(s), skipped 0 unchanged file(s).\n"
+            "All done!\n"
+        )
+
+    def test_not_with_resume(self):
+        with pytest.raises(CommandError, match="can't be used with --resume"):
+            run_command("remakemigrations", keep_last=1, resume=True)
@@ -61,6 +61,7 @@ def setup_test_apps(
                 "django.contrib.contenttypes",
             ],
             MIGRATION_MODULES=migration_modules,
+            REMAKE_MIGRATIONS_JOURNAL_PATH=str(tmp_path / "journal.json"),
         ):
             yield app_mig_dirs
     finally: